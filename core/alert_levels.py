@@ -0,0 +1,126 @@
+# core/alert_levels.py
+"""
+Détection Module 3 : niveaux flood/drought par seuils, noyau batch
+(N stations × D jours) compilé par Numba si disponible, repli NumPy sinon.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import numpy as np
+
+# Optionnel: compilation JIT du noyau (repli NumPy sinon)
+try:
+    from numba import njit  # type: ignore
+    NUMBA_AVAILABLE = True
+except Exception:  # pragma: no cover
+    NUMBA_AVAILABLE = False
+
+
+LEVEL_FROM_CODE = ("green", "yellow", "orange", "red")
+LEVEL_NAMES = np.array(LEVEL_FROM_CODE)
+THRESHOLD_KEYS = ("yellow", "orange", "red")
+
+
+def level_thresholds(rules: Dict[str, Any], risk_type: str) -> np.ndarray:
+    """
+    Seuils [yellow, orange, red] d'un risque, rendus croissants (cumul max)
+    pour que np.searchsorted reste valide même si les règles saisies ne le sont pas.
+    """
+    thr = np.array([rules[risk_type][k] for k in THRESHOLD_KEYS], dtype=np.float64)
+    return np.maximum.accumulate(thr)
+
+
+def classify_levels(values: Any, thresholds: np.ndarray) -> np.ndarray:
+    """Codes niveau int8 (0..3) : nombre de seuils franchis (valeur >= seuil)."""
+    return np.searchsorted(thresholds, values, side="right").astype(np.int8)
+
+
+def _levels_kernel_py(pr: np.ndarray, flood_thr: np.ndarray, dry_thr: np.ndarray):
+    """
+    Noyau scalaire (compilé par Numba si disponible).
+    pr: précipitations (N, D), NaN autorisés ; seuils: [yellow, orange, red].
+    Retourne (flood_code, drought_code, max_1d, idx_max_1d, max_streak, idx_streak),
+    codes niveau int8 0..3, index -1 si non défini.
+    """
+    n, d = pr.shape
+    flood_code = np.zeros(n, dtype=np.int8)
+    drought_code = np.zeros(n, dtype=np.int8)
+    max_1d = np.zeros(n, dtype=np.float64)
+    idx_max = np.full(n, -1, dtype=np.int64)
+    max_streak = np.zeros(n, dtype=np.int64)
+    idx_streak = np.full(n, -1, dtype=np.int64)
+
+    for i in range(n):
+        best, best_j = 0.0, -1
+        streak, streak_start, longest, longest_start = 0, 0, 0, -1
+        for j in range(d):
+            v = pr[i, j]
+            if v == v:  # non-NaN
+                if best_j < 0 or v > best:
+                    best, best_j = v, j
+            else:
+                v = 0.0
+            if v < 1.0:
+                if streak == 0:
+                    streak_start = j
+                streak += 1
+                if streak > longest:  # strict : première série la plus longue
+                    longest, longest_start = streak, streak_start
+            else:
+                streak = 0
+
+        flood_code[i] = np.searchsorted(flood_thr, best, side="right") if best_j >= 0 else 0
+        drought_code[i] = np.searchsorted(dry_thr, longest, side="right")
+
+        max_1d[i] = best if best_j >= 0 else 0.0
+        idx_max[i] = best_j
+        max_streak[i] = longest
+        idx_streak[i] = longest_start
+
+    return flood_code, drought_code, max_1d, idx_max, max_streak, idx_streak
+
+
+def _levels_kernel_np(pr: np.ndarray, flood_thr: np.ndarray, dry_thr: np.ndarray):
+    """Repli NumPy du noyau : vectorisé sur les stations, boucle sur les jours."""
+    n, d = pr.shape
+    has = ~np.isnan(pr).all(axis=1)
+    filled = np.where(np.isnan(pr), -np.inf, pr)
+    idx_max = np.where(has, filled.argmax(axis=1), -1).astype(np.int64)
+    max_1d = np.where(has, filled.max(axis=1), 0.0)
+
+    dry = np.nan_to_num(pr, nan=0.0) < 1.0
+    streak = np.zeros(n, dtype=np.int64)
+    streak_start = np.zeros(n, dtype=np.int64)
+    max_streak = np.zeros(n, dtype=np.int64)
+    idx_streak = np.full(n, -1, dtype=np.int64)
+    for j in range(d):
+        col = dry[:, j]
+        streak_start = np.where(col & (streak == 0), j, streak_start)
+        streak = np.where(col, streak + 1, 0)
+        better = streak > max_streak
+        max_streak = np.where(better, streak, max_streak)
+        idx_streak = np.where(better, streak_start, idx_streak)
+
+    flood_code = np.where(has, classify_levels(max_1d, flood_thr), 0).astype(np.int8)
+    drought_code = classify_levels(max_streak, dry_thr)
+    return flood_code, drought_code, max_1d, idx_max, max_streak, idx_streak
+
+
+# Dispatcher construit une seule fois par process (import du module) ;
+# séquentiel : la page ne traite qu'une série à la fois
+if NUMBA_AVAILABLE:
+    _levels_kernel = njit(cache=True)(_levels_kernel_py)
+else:
+    _levels_kernel = _levels_kernel_np
+
+
+def compute_levels_batch(pr: np.ndarray, rules: Dict[str, Any]):
+    """
+    Niveaux flood/drought pour un lot de séries journalières (N, D).
+    Les codes int8 sont retournés tels quels ; LEVEL_NAMES[codes] fait la conversion.
+    """
+    flood_thr = level_thresholds(rules, "flood")
+    dry_thr = level_thresholds(rules, "drought")
+    pr = np.ascontiguousarray(np.atleast_2d(pr), dtype=np.float64)
+    return _levels_kernel(pr, flood_thr, dry_thr)
@@ -13,15 +13,25 @@ from pathlib import Path
 
 # Machine Learning
 try:
-    from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+    from sklearn.ensemble import (
+        RandomForestClassifier, RandomForestRegressor, HistGradientBoostingRegressor
+    )
     from sklearn.preprocessing import StandardScaler
     from sklearn.model_selection import train_test_split, cross_val_score
     from sklearn.metrics import accuracy_score, mean_squared_error, r2_score
+    import joblib
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
     print("⚠️ scikit-learn non disponible - Fonctionnalités ML limitées")
 
+# Compression rapide des modèles sauvegardés (optionnel, sinon zlib)
+try:
+    import lz4  # noqa: F401
+    MODEL_COMPRESS = ('lz4', 3)
+except ImportError:
+    MODEL_COMPRESS = ('zlib', 3)
+
 # Deep Learning (optionnel)
 try:
     import tensorflow as tf
@@ -33,6 +43,23 @@ except ImportError:
     print("⚠️ TensorFlow non disponible - LSTM désactivé")
 
 
+def _mixed_precision_policy() -> Optional[str]:
+    """
+    Politique de précision mixte adaptée au matériel :
+    'mixed_float16' sur GPU (Tensor Cores), None sur CPU où le float16
+    est émulé et plus lent que le float32
+    """
+    
+    if not TF_AVAILABLE:
+        return None
+    try:
+        if tf.config.list_physical_devices('GPU'):
+            return 'mixed_float16'
+    except Exception:
+        pass
+    return None
+
+
 class DischargePredictor:
     """
     Prédicteur de débit utilisant Machine Learning
@@ -41,7 +68,7 @@ class DischargePredictor:
     
     def __init__(
         self,
-        model_type: str = 'ensemble',  # 'lstm', 'rf', 'ensemble'
+        model_type: str = 'ensemble',  # 'lstm', 'rf', 'hgbt', 'ensemble'
         lookback_days: int = 30,
         forecast_horizon: int = 10
     ):
@@ -49,7 +76,7 @@ class DischargePredictor:
         Initialise le prédicteur
         
         Args:
-            model_type: Type de modèle ('lstm', 'rf', 'ensemble')
+            model_type: Type de modèle ('lstm', 'rf', 'hgbt', 'ensemble')
             lookback_days: Nombre de jours d'historique pour prédiction
             forecast_horizon: Horizon de prévision (jours)
         """
@@ -108,8 +135,9 @@ class DischargePredictor:
             
             layers.Dense(32, activation='relu'),
             
-            # Output layer (prévision multi-horizon)
-            layers.Dense(self.forecast_horizon)
+            # Output layer (prévision multi-horizon), toujours en float32
+            # pour une perte stable en précision mixte
+            layers.Dense(self.forecast_horizon, dtype='float32')
         ])
         
         # Compilation
@@ -121,6 +149,41 @@ class DischargePredictor:
         
         return model
     
+    @staticmethod
+    def prepare(
+        data: pd.DataFrame,
+        target_col: str = 'discharge'
+    ) -> Tuple[np.ndarray, np.ndarray, 'StandardScaler', List[str]]:
+        """
+        Prépare une seule fois la matrice de features normalisée, partagée
+        entre les entraînements RF/HGBT et LSTM (argument `prepared`)
+        
+        Args:
+            data: DataFrame avec features
+            target_col: Colonne cible
+        
+        Returns:
+            (X, y, scaler, feature_names) - X normalisé et y en float32
+        """
+        
+        if not SKLEARN_AVAILABLE:
+            raise ImportError("scikit-learn requis")
+        
+        feature_cols = [c for c in data.columns if c != target_col]
+        scaler = StandardScaler()
+        X = scaler.fit_transform(data[feature_cols].to_numpy(dtype=np.float64)).astype(np.float32)
+        y = data[target_col].to_numpy(dtype=np.float32)
+        
+        return X, y, scaler, feature_cols
+    
+    def _adopt_prepared(self, prepared: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+        """Reprend scaler et noms de features d'un résultat de prepare()"""
+        
+        X, y, scaler, feature_names = prepared
+        self.scaler = scaler
+        self.feature_names = list(feature_names)
+        return X, y
+    
     def prepare_sequences(
         self,
         data: pd.DataFrame,
@@ -163,12 +226,14 @@ class DischargePredictor:
     
     def train_lstm(
         self,
-        data: pd.DataFrame,
+        data: Optional[pd.DataFrame] = None,
         target_col: str = 'discharge',
         validation_split: float = 0.2,
         epochs: int = 100,
         batch_size: int = 32,
-        verbose: int = 1
+        verbose: int = 1,
+        mixed_precision: bool = True,
+        prepared: Optional[Tuple] = None
     ) -> Dict:
         """
         Entraîne le modèle LSTM
@@ -180,6 +245,9 @@ class DischargePredictor:
             epochs: Nombre d'epochs
             batch_size: Taille des batchs
             verbose: Verbosité
+            mixed_precision: Calculs en float16 sur GPU (poids et perte
+                en float32, loss scaling automatique à la compilation)
+            prepared: Résultat de prepare() (remplace data/target_col)
         
         Returns:
             Historique d'entraînement
@@ -188,22 +256,65 @@ class DischargePredictor:
         if not TF_AVAILABLE:
             raise ImportError("TensorFlow requis")
         
-        # Préparer données
-        X, y = self.prepare_sequences(data, target_col)
-        
-        # Normaliser
-        n_samples, n_timesteps, n_features = X.shape
-        X_reshaped = X.reshape(-1, n_features)
-        X_scaled = self.scaler.fit_transform(X_reshaped)
-        X = X_scaled.reshape(n_samples, n_timesteps, n_features)
-        
-        # Split train/val
-        X_train, X_val, y_train, y_val = train_test_split(
-            X, y, test_size=validation_split, shuffle=False
-        )
-        
-        # Créer modèle
-        self.lstm_model = self.create_lstm_model(n_features)
+        # Préparer données : matrice jour × feature normalisée une seule fois,
+        # les fenêtres sont découpées à la volée par tf.data (aucune copie
+        # lookback_days × n_features par échantillon)
+        n_days = len(prepared[0]) if prepared is not None else len(data)
+        n_samples = n_days - self.lookback_days - self.forecast_horizon + 1
+        if n_samples <= 1:
+            raise ValueError("Historique trop court pour lookback_days + forecast_horizon")
+        n_rows = n_samples + self.lookback_days - 1
+        
+        if prepared is not None:
+            X_all, y_data = self._adopt_prepared(prepared)
+            X_scaled = X_all[:n_rows]
+        else:
+            feature_cols = [c for c in data.columns if c != target_col]
+            self.feature_names = feature_cols
+            X_scaled = self.scaler.fit_transform(
+                data[feature_cols].to_numpy(dtype=np.float64)[:n_rows]
+            ).astype(np.float32)
+            y_data = data[target_col].to_numpy(dtype=np.float32)
+        n_features = X_scaled.shape[1]
+        
+        # Cibles : y[i] = débits des forecast_horizon jours suivant la fenêtre i
+        y = np.lib.stride_tricks.sliding_window_view(
+            y_data[self.lookback_days:], self.forecast_horizon
+        )[:n_samples]
+        
+        # Split train/val chronologique (même découpe que train_test_split sans shuffle)
+        n_val = int(np.ceil(n_samples * validation_split))
+        n_train = n_samples - n_val
+        y_val = y[n_train:]
+        
+        train_ds = keras.utils.timeseries_dataset_from_array(
+            X_scaled[:n_train + self.lookback_days - 1],
+            y[:n_train],
+            sequence_length=self.lookback_days,
+            batch_size=batch_size,
+            shuffle=True,
+            seed=42
+        ).prefetch(tf.data.AUTOTUNE)
+        
+        val_ds = keras.utils.timeseries_dataset_from_array(
+            X_scaled[n_train:],
+            y_val,
+            sequence_length=self.lookback_days,
+            batch_size=batch_size,
+            shuffle=False
+        ).cache().prefetch(tf.data.AUTOTUNE)
+        
+        # Créer modèle (la politique ne s'applique qu'aux couches créées ici)
+        policy = _mixed_precision_policy() if mixed_precision else None
+        if policy:
+            previous_policy = keras.mixed_precision.global_policy()
+            keras.mixed_precision.set_global_policy(policy)
+            try:
+                self.lstm_model = self.create_lstm_model(n_features)
+            finally:
+                keras.mixed_precision.set_global_policy(previous_policy)
+        else:
+            self.lstm_model = self.create_lstm_model(n_features)
         
         # Callbacks
         early_stop = callbacks.EarlyStopping(
@@ -221,10 +332,9 @@ class DischargePredictor:
         
         # Entraînement
         history = self.lstm_model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
+            train_ds,
+            validation_data=val_ds,
             epochs=epochs,
-            batch_size=batch_size,
             callbacks=[early_stop, reduce_lr],
             verbose=verbose
         )
@@ -233,7 +343,7 @@ class DischargePredictor:
         self.training_history['lstm'] = history.history
         
         # Évaluation
-        y_pred = self.lstm_model.predict(X_val, verbose=0)
+        y_pred = self.lstm_model.predict(val_ds, verbose=0)
         mse = mean_squared_error(y_val, y_pred)
         r2 = r2_score(y_val.flatten(), y_pred.flatten())
         
@@ -244,12 +354,45 @@ class DischargePredictor:
             'best_epoch': len(history.history['loss']) - early_stop.patience
         }
     
+    def _tabular_split(
+        self,
+        data: Optional[pd.DataFrame],
+        target_col: str,
+        prepared: Optional[Tuple]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Split train/test (80/20) normalisé pour les modèles arborescents"""
+        
+        # Matrice déjà normalisée : simple découpe
+        if prepared is not None:
+            X, y = self._adopt_prepared(prepared)
+            return train_test_split(X, y, test_size=0.2, random_state=42)
+        
+        # Préparer données
+        feature_cols = [c for c in data.columns if c != target_col]
+        self.feature_names = feature_cols
+        
+        X = data[feature_cols].values
+        y = data[target_col].values
+        
+        # Split
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+        
+        # Normaliser
+        X_train_scaled = self.scaler.fit_transform(X_train)
+        X_test_scaled = self.scaler.transform(X_test)
+        
+        return X_train_scaled, X_test_scaled, y_train, y_test
+    
     def train_random_forest(
         self,
-        data: pd.DataFrame,
+        data: Optional[pd.DataFrame] = None,
         target_col: str = 'discharge',
         n_estimators: int = 100,
-        max_depth: int = 20
+        max_depth: int = 20,
+        max_features: Union[str, float, None] = 'sqrt',
+        prepared: Optional[Tuple] = None
     ) -> Dict:
         """
         Entraîne Random Forest pour prévision
@@ -259,6 +402,9 @@ class DischargePredictor:
             target_col: Colonne cible
             n_estimators: Nombre d'arbres
             max_depth: Profondeur max
+            max_features: Features candidates par split ('sqrt' : arbres
+                plus rapides et moins corrélés)
+            prepared: Résultat de prepare() (remplace data/target_col)
         
         Returns:
             Métriques d'entraînement
@@ -267,26 +413,20 @@ class DischargePredictor:
         if not SKLEARN_AVAILABLE:
             raise ImportError("scikit-learn requis")
         
-        # Préparer données
-        feature_cols = [c for c in data.columns if c != target_col]
-        self.feature_names = feature_cols
-        
-        X = data[feature_cols].values
-        y = data[target_col].values
+        # Variante histogrammes : même interface, même emplacement de modèle
+        if self.model_type == 'hgbt':
+            # max_depth propre au HGBT (défaut 8), non hérité de RF
+            return self.train_gradient_boosting(data, target_col, prepared=prepared)
         
-        # Split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+        X_train_scaled, X_test_scaled, y_train, y_test = self._tabular_split(
+            data, target_col, prepared
         )
         
-        # Normaliser
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
         # Entraîner
         self.rf_model = RandomForestRegressor(
             n_estimators=n_estimators,
             max_depth=max_depth,
+            max_features=max_features,
             random_state=42,
             n_jobs=-1
         )
@@ -315,6 +455,77 @@ class DischargePredictor:
         
         return self.training_history['rf']
     
+    def train_gradient_boosting(
+        self,
+        data: Optional[pd.DataFrame] = None,
+        target_col: str = 'discharge',
+        max_iter: int = 500,
+        max_depth: Optional[int] = 8,
+        learning_rate: float = 0.1,
+        prepared: Optional[Tuple] = None
+    ) -> Dict:
+        """
+        Entraîne un Gradient Boosting à histogrammes (HistGradientBoosting)
+        
+        Les features sont discrétisées en 255 classes : coût par arbre en
+        O(N·F) au lieu de O(N·F·log N), généralement bien plus rapide que
+        Random Forest à précision comparable sur données tabulaires.
+        Le modèle occupe l'emplacement `rf_model` (predict/save inchangés).
+        
+        Args:
+            data: DataFrame avec features
+            target_col: Colonne cible
+            max_iter: Nombre max d'itérations de boosting
+            max_depth: Profondeur max des arbres
+            learning_rate: Taux d'apprentissage
+            prepared: Résultat de prepare() (remplace data/target_col)
+        
+        Returns:
+            Métriques d'entraînement
+        """
+        
+        if not SKLEARN_AVAILABLE:
+            raise ImportError("scikit-learn requis")
+        
+        # Normalisation sans effet sur les arbres, conservée pour predict
+        X_train_scaled, X_test_scaled, y_train, y_test = self._tabular_split(
+            data, target_col, prepared
+        )
+        
+        # Entraîner (arrêt anticipé sur 10 % de validation interne)
+        self.rf_model = HistGradientBoostingRegressor(
+            max_iter=max_iter,
+            max_depth=max_depth,
+            learning_rate=learning_rate,
+            early_stopping=True,
+            random_state=42
+        )
+        
+        self.rf_model.fit(X_train_scaled, y_train)
+        
+        # Évaluation
+        y_pred = self.rf_model.predict(X_test_scaled)
+        
+        mse = mean_squared_error(y_test, y_pred)
+        r2 = r2_score(y_test, y_pred)
+        
+        # Cross-validation
+        cv_scores = cross_val_score(
+            self.rf_model, X_train_scaled, y_train,
+            cv=5, scoring='r2', n_jobs=-1
+        )
+        
+        self.is_trained = True
+        self.training_history['hgbt'] = {
+            'test_mse': float(mse),
+            'test_r2': float(r2),
+            'cv_r2_mean': float(cv_scores.mean()),
+            'cv_r2_std': float(cv_scores.std()),
+            'n_iter': int(self.rf_model.n_iter_)
+        }
+        
+        return self.training_history['hgbt']
+    
     def predict(
         self,
         recent_data: pd.DataFrame,
@@ -408,27 +619,46 @@ class DischargePredictor:
             'training_history': self.training_history
         }
         
-        # Sauvegarder LSTM
+        # Sauvegarder LSTM (format natif Keras + SavedModel pour l'inférence
+        # en mode graphe via tf.saved_model.load)
         if self.lstm_model is not None and TF_AVAILABLE:
-            lstm_path = filepath.replace('.pkl', '_lstm.h5')
+            lstm_path = filepath.replace('.pkl', '_lstm.keras')
             self.lstm_model.save(lstm_path)
             model_data['lstm_path'] = lstm_path
+            
+            if hasattr(self.lstm_model, 'export'):
+                savedmodel_path = filepath.replace('.pkl', '_lstm_savedmodel')
+                try:
+                    self.lstm_model.export(savedmodel_path)
+                    model_data['lstm_savedmodel_path'] = savedmodel_path
+                except Exception:
+                    pass
         
         # Sauvegarder RF et scaler
         if self.rf_model is not None and SKLEARN_AVAILABLE:
             model_data['rf_model'] = self.rf_model
             model_data['scaler'] = self.scaler
         
-        # Pickle
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
+        # joblib compressé : tableaux numpy des arbres sérialisés en bloc
+        if SKLEARN_AVAILABLE:
+            joblib.dump(model_data, filepath, compress=MODEL_COMPRESS)
+        else:
+            with open(filepath, 'wb') as f:
+                pickle.dump(model_data, f)
     
     @classmethod
     def load_model(cls, filepath: str) -> 'DischargePredictor':
-        """Charge un modèle sauvegardé"""
-        
-        with open(filepath, 'rb') as f:
-            model_data = pickle.load(f)
+        """Charge un modèle sauvegardé (joblib, ou ancien fichier pickle)"""
+        
+        model_data = None
+        if SKLEARN_AVAILABLE:
+            try:
+                model_data = joblib.load(filepath)
+            except Exception:
+                model_data = None
+        if model_data is None:
+            with open(filepath, 'rb') as f:
+                model_data = pickle.load(f)
         
         # Recréer prédicteur
         predictor = cls(
@@ -581,6 +811,50 @@ class RiskClassifier:
         }
 
 
+def _rolling_sum_mean(
+    values: np.ndarray,
+    window: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Somme et moyenne glissantes (min_periods=1, NaN ignorés) en O(n)
+    par différences de sommes cumulées, sans passer par pandas.rolling
+    
+    Args:
+        values: Série float64 contiguë
+        window: Taille de fenêtre (jours)
+    
+    Returns:
+        (somme, moyenne) - NaN là où la fenêtre ne contient aucune valeur
+    """
+    
+    valid = ~np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    ccount = np.concatenate(([0], np.cumsum(valid)))
+    
+    hi = np.arange(1, len(values) + 1)
+    lo = np.maximum(hi - window, 0)
+    
+    sums = csum[hi] - csum[lo]
+    counts = ccount[hi] - ccount[lo]
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    sums = np.where(counts > 0, sums, np.nan)
+    
+    return sums, means
+
+
+def _dry_streak(is_dry: np.ndarray) -> np.ndarray:
+    """
+    Longueur de la séquence sèche en cours (0 les jours humides),
+    calculée par cumsum avec remise à zéro vectorisée
+    """
+    
+    c = np.cumsum(is_dry)
+    reset = np.maximum.accumulate(np.where(is_dry == 0, c, 0))
+    return c - reset
+
+
 def create_features_from_weather(
     weather_data: pd.DataFrame
 ) -> pd.DataFrame:
@@ -603,32 +877,50 @@ def create_features_from_weather(
         df['month'] = df['date'].dt.month
         df['week'] = df['date'].dt.isocalendar().week
     
-    # Features cumulatives
+    # Colonnes numériques en float64 contigus (NaN conservés)
+    precip = (
+        np.ascontiguousarray(pd.to_numeric(df['precipitation_sum'], errors='coerce').to_numpy(dtype=np.float64))
+        if 'precipitation_sum' in df.columns else None
+    )
+    tmax = (
+        np.ascontiguousarray(pd.to_numeric(df['temperature_2m_max'], errors='coerce').to_numpy(dtype=np.float64))
+        if 'temperature_2m_max' in df.columns else None
+    )
+    
+    # Features cumulatives (toutes les colonnes sont assemblées puis jointes en une fois)
+    new_cols = {}
     for window in [7, 14, 30]:
-        if 'precipitation_sum' in df.columns:
-            df[f'precip_cumsum_{window}d'] = df['precipitation_sum'].rolling(window, min_periods=1).sum()
-            df[f'precip_mean_{window}d'] = df['precipitation_sum'].rolling(window, min_periods=1).mean()
+        if precip is not None:
+            sums, means = _rolling_sum_mean(precip, window)
+            new_cols[f'precip_cumsum_{window}d'] = sums
+            new_cols[f'precip_mean_{window}d'] = means
         
-        if 'temperature_2m_max' in df.columns:
-            df[f'temp_mean_{window}d'] = df['temperature_2m_max'].rolling(window, min_periods=1).mean()
+        if tmax is not None:
+            new_cols[f'temp_mean_{window}d'] = _rolling_sum_mean(tmax, window)[1]
     
     # Streak de jours secs
-    if 'precipitation_sum' in df.columns:
-        df['is_dry'] = (df['precipitation_sum'] < 1).astype(int)
-        df['dry_streak'] = df['is_dry'].groupby((df['is_dry'] != df['is_dry'].shift()).cumsum()).cumsum()
+    if precip is not None:
+        is_dry = (precip < 1).astype(np.int64)
+        new_cols['is_dry'] = is_dry
+        new_cols['dry_streak'] = _dry_streak(is_dry)
     
     # Différences
-    if 'temperature_2m_max' in df.columns:
-        df['temp_diff'] = df['temperature_2m_max'].diff()
+    if tmax is not None:
+        new_cols['temp_diff'] = np.concatenate(([np.nan], np.diff(tmax)))
     
-    if 'precipitation_sum' in df.columns:
-        df['precip_diff'] = df['precipitation_sum'].diff()
+    if precip is not None:
+        new_cols['precip_diff'] = np.concatenate(([np.nan], np.diff(precip)))
     
     # Indicateurs dérivés
-    if 'temperature_2m_max' in df.columns and 'precipitation_sum' in df.columns:
+    if tmax is not None and precip is not None:
         # Évapotranspiration simplifiée (Hargreaves)
-        df['et0'] = 0.0023 * df['temperature_2m_max'] * 17.8
-        df['water_deficit'] = df['et0'] - df['precipitation_sum']
+        et0 = 0.0023 * tmax * 17.8
+        new_cols['et0'] = et0
+        new_cols['water_deficit'] = et0 - precip
+    
+    if new_cols:
+        df = df.drop(columns=[c for c in new_cols if c in df.columns])
+        df = pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
     
     # Remplir NaN
     df = df.fillna(method='bfill').fillna(0)
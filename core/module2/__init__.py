@@ -21,7 +21,7 @@ Version: 2.0.0
 
 from core.module2.risk_mapper import RiskMapper, RiskType, RiskLayer
 from core.module2.flood_zones import FloodZoneAnalyzer, FloodRiskLevel
-from core.module2.drought_zones import DroughtZoneAnalyzer, DroughtSeverity
+from core.module2.drought_zones import DroughtZoneAnalyzer, DroughtSeverity, dry_runs
 from core.module2.multi_risk import MultiRiskAnalyzer
 from core.module2.filters import (
     TemporalFilter,
@@ -29,7 +29,11 @@ from core.module2.filters import (
     RiskFilter,
     AlertLevelFilter,
     AlertLevel,
-    CompositeFilter
+    CompositeFilter,
+    LayerBitmapIndex,
+    PERIOD_OPTIONS,
+    RISK_TYPE_OPTIONS,
+    ALERT_LEVEL_OPTIONS
 )
 from core.module2.zone_info import (
     ZoneInfoProvider,
@@ -54,6 +58,7 @@ __all__ = [
     'FloodRiskLevel',
     'DroughtZoneAnalyzer',
     'DroughtSeverity',
+    'dry_runs',
     'MultiRiskAnalyzer',
     
     # Filters
@@ -63,6 +68,10 @@ __all__ = [
     'AlertLevelFilter',
     'AlertLevel',
     'CompositeFilter',
+    'LayerBitmapIndex',
+    'PERIOD_OPTIONS',
+    'RISK_TYPE_OPTIONS',
+    'ALERT_LEVEL_OPTIONS',
     
     # Zone info
     'ZoneInfoProvider',
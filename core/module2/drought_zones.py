@@ -4,7 +4,7 @@ Module 2 - Drought Zones Analyzer
 Analyse et cartographie des zones en sécheresse
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
@@ -16,6 +16,53 @@ from core.module2.utils import (
     format_area
 )
 
+# Optionnel: compilation JIT du balayage des séries sèches (repli NumPy sinon)
+try:
+    from numba import njit  # type: ignore
+    NUMBA_AVAILABLE = True
+except Exception:  # pragma: no cover
+    NUMBA_AVAILABLE = False
+
+
+def _dry_runs_py(precip: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Séries de jours secs (precip < seuil, NaN => non sec) en une passe :
+    (débuts, longueurs). Compilé par Numba si disponible.
+    """
+    n = precip.shape[0]
+    starts = np.empty(n, dtype=np.int64)
+    lengths = np.empty(n, dtype=np.int64)
+    k = 0
+    cur = 0
+    for i in range(n):
+        if precip[i] < threshold:
+            if cur == 0:
+                starts[k] = i
+            cur += 1
+        elif cur:
+            lengths[k] = cur
+            k += 1
+            cur = 0
+    if cur:
+        lengths[k] = cur
+        k += 1
+    return starts[:k], lengths[:k]
+
+
+def _dry_runs_np(precip: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Repli NumPy : run-length par fronts montants/descendants du masque sec."""
+    dry = (precip < threshold).astype(np.int8)
+    edges = np.diff(dry, prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+# Dispatcher construit une seule fois par process (import du module)
+if NUMBA_AVAILABLE:
+    dry_runs = njit(cache=True, boundscheck=False)(_dry_runs_py)
+else:
+    dry_runs = _dry_runs_np
+
 
 class DroughtSeverity(Enum):
     """Niveaux de sévérité de la sécheresse (basé sur US Drought Monitor)"""
@@ -7,9 +7,12 @@ Système de filtrage pour la visualisation cartographique :
 - Filtres temporels (jour, décade, mois, saison, année)
 - Filtres par type de risque
 - Filtres par niveau d'alerte
+- Index bitmap des couches (filtrage par intersection d'ensembles)
 """
 
-from typing import List, Optional, Set, Tuple
+from bisect import bisect_left, bisect_right
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 from dataclasses import dataclass
 from datetime import datetime, date, timedelta
 from enum import Enum
@@ -37,6 +40,40 @@ class AlertLevel(Enum):
     EXTREME = "extreme"  # Alerte maximale
 
 
+# ========================================
+# OPTIONS UI (libellé -> valeur de filtre)
+# ========================================
+# Définies une fois à l'import : le script de page est ré-exécuté à chaque
+# rerun Streamlit, pas les modules importés. Lecture seule (MappingProxyType).
+
+PERIOD_OPTIONS: Mapping[str, TemporalPeriod] = MappingProxyType({
+    "Aujourd'hui": TemporalPeriod.TODAY,
+    "7 derniers jours": TemporalPeriod.WEEK,
+    "30 derniers jours": TemporalPeriod.MONTH,
+    "3 derniers mois": TemporalPeriod.QUARTER,
+    "Personnalisée": TemporalPeriod.CUSTOM
+})
+
+RISK_TYPE_OPTIONS: Mapping[str, str] = MappingProxyType({
+    'Inondation': 'flood',
+    'Sécheresse': 'drought',
+    'Tempête': 'storm',
+    'Érosion': 'erosion',
+    'Chaleur': 'heat'
+})
+
+ALERT_LEVEL_OPTIONS: Mapping[str, str] = MappingProxyType({
+    '🟢 Faible': 'low',
+    '🟡 Modéré': 'moderate',
+    '🟠 Élevé': 'high',
+    '🔴 Critique': 'critical'
+})
+
+PERIOD_LABELS = tuple(PERIOD_OPTIONS)
+RISK_TYPE_LABELS = tuple(RISK_TYPE_OPTIONS)
+ALERT_LEVEL_LABELS = tuple(ALERT_LEVEL_OPTIONS)
+
+
 @dataclass
 class TemporalFilter:
     """
@@ -331,6 +368,43 @@ class CompositeFilter:
         
         return filtered
     
+    def apply_indexed(self, index: 'LayerBitmapIndex') -> List:
+        """
+        Applique les filtres via un index bitmap pré-calculé
+        
+        Même résultat que apply(), mais chaque critère élémentaire est
+        évalué une fois par valeur distincte (et non une fois par couche),
+        puis les bitmaps sont combinés par ET/OU.
+        
+        Args:
+            index: Index bitmap des couches
+        
+        Returns:
+            Couches filtrées (ordre d'origine conservé)
+        """
+        start_date, end_date = self.temporal.get_date_range()
+        
+        hits = index.between(start_date, end_date)
+        hits &= index.union(index.by_risk, self.risk.is_included)
+        hits &= index.union(index.by_level, self.alert_level.is_included)
+        
+        filtered = index.layers_for(hits)
+        
+        # Filtre spatial (bbox) : appliqué sur le sous-ensemble restant
+        if self.spatial_bbox:
+            min_lon, min_lat, max_lon, max_lat = self.spatial_bbox
+            
+            filtered = [
+                layer for layer in filtered
+                if hasattr(layer, 'properties') and
+                   layer.properties.get('center_lat') and
+                   layer.properties.get('center_lon') and
+                   (min_lon <= layer.properties['center_lon'] <= max_lon) and
+                   (min_lat <= layer.properties['center_lat'] <= max_lat)
+            ]
+        
+        return filtered
+    
     def get_summary(self) -> dict:
         """
         Résumé des critères de filtrage
@@ -344,4 +418,105 @@ class CompositeFilter:
             'alert_levels': [level.value for level in self.alert_level.levels] if self.alert_level.levels else ['all'],
             'spatial_filter': 'bbox' if self.spatial_bbox else 'none',
             'include_forecast': self.temporal.include_forecast
-        }
\ No newline at end of file
+        }
+
+
+class LayerBitmapIndex:
+    """
+    Index bitmap des couches cartographiques
+    
+    Chaque valeur élémentaire de filtre (type de risque, niveau) est associée
+    à un bitmap (entier Python, bit i = couche i). Un changement de filtre se
+    résume alors à quelques OU/ET sur ces entiers au lieu d'évaluer les
+    prédicats couche par couche. Les horodatages sont triés une fois pour
+    répondre aux plages temporelles par recherche dichotomique.
+    
+    Attributes:
+        layers: Couches indexées (l'indice est l'identifiant du bit)
+        by_risk: {type de risque: bitmap}
+        by_level: {niveau: bitmap}
+    """
+    
+    def __init__(self, layers: List):
+        self.layers = list(layers)
+        self.by_risk: Dict[str, int] = {}
+        self.by_level: Dict[str, int] = {}
+        
+        timed = []
+        
+        for i, layer in enumerate(self.layers):
+            bit = 1 << i
+            
+            risk_type = getattr(layer, 'risk_type', None)
+            if risk_type is not None:
+                key = risk_type.value if hasattr(risk_type, 'value') else str(risk_type)
+                self.by_risk[key] = self.by_risk.get(key, 0) | bit
+            
+            level = getattr(layer, 'level', None)
+            if level is not None:
+                self.by_level[level] = self.by_level.get(level, 0) | bit
+            
+            timestamp = getattr(layer, 'timestamp', None)
+            if timestamp is not None:
+                timed.append((timestamp, i))
+        
+        timed.sort(key=lambda item: item[0])
+        self._timestamps = [t for t, _ in timed]
+        self._timed_ids = [i for _, i in timed]
+    
+    def __len__(self) -> int:
+        return len(self.layers)
+    
+    @staticmethod
+    def union(bitmaps: Dict[str, int], predicate) -> int:
+        """
+        OU des bitmaps dont la valeur satisfait le prédicat
+        
+        Args:
+            bitmaps: {valeur: bitmap}
+            predicate: Fonction valeur -> bool (ex: RiskFilter.is_included)
+        
+        Returns:
+            Bitmap résultant
+        """
+        bits = 0
+        for value, bitmap in bitmaps.items():
+            if predicate(value):
+                bits |= bitmap
+        return bits
+    
+    def between(self, start: datetime, end: datetime) -> int:
+        """
+        Bitmap des couches dont l'horodatage est dans [start, end]
+        
+        Args:
+            start: Début de plage (inclus)
+            end: Fin de plage (incluse)
+        
+        Returns:
+            Bitmap résultant
+        """
+        lo = bisect_left(self._timestamps, start)
+        hi = bisect_right(self._timestamps, end)
+        
+        bits = 0
+        for i in self._timed_ids[lo:hi]:
+            bits |= 1 << i
+        return bits
+    
+    def layers_for(self, bits: int) -> List:
+        """
+        Reconstruit la liste des couches d'un bitmap
+        
+        Args:
+            bits: Bitmap de couches
+        
+        Returns:
+            Couches correspondantes, dans l'ordre d'indexation
+        """
+        layers = []
+        while bits:
+            low = bits & -bits
+            layers.append(self.layers[low.bit_length() - 1])
+            bits ^= low
+        return layers
@@ -4,14 +4,82 @@ Module 2 - Utilitaires
 Fonctions helpers pour la cartographie et l'analyse spatiale
 """
 
-from typing import Dict, List, Tuple, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Optional
 import numpy as np
 from datetime import datetime
 
+# Géométrie (optionnel) : simplification topologique des polygones
+try:
+    from shapely.geometry import shape, mapping
+    SHAPELY_AVAILABLE = True
+except ImportError:
+    SHAPELY_AVAILABLE = False
+
+# JSON rapide (optionnel) : parsing des colonnes GeoJSON texte
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
 # ========================================
 # COLOR SCALES
 # ========================================
 
+# Couleurs des statuts de risque (low..extreme) et des niveaux d'alerte
+RISK_STATUS_COLORS: Mapping[str, str] = MappingProxyType({
+    'low': '#28a745',
+    'moderate': '#ffc107',
+    'high': '#fd7e14',
+    'critical': '#dc3545',
+    'extreme': '#721c24'
+})
+
+ALERT_LEVEL_COLORS: Mapping[str, str] = MappingProxyType({
+    'yellow': '#ffc107',
+    'orange': '#fd7e14',
+    'red': '#dc3545',
+    'extreme': '#721c24'
+})
+
+# Styles de fond de carte (libellé -> style Mapbox)
+MAP_STYLE_OPTIONS: Mapping[str, str] = MappingProxyType({
+    "OpenStreetMap Standard": "open-street-map",
+    "OpenStreetMap Satellite": "satellite",
+    "Satellite Streets (Mapbox)": "satellite-streets",
+    "Outdoor (Mapbox)": "outdoors"
+})
+
+MAP_STYLE_LABELS = tuple(MAP_STYLE_OPTIONS)
+
+
+def _legend_items_html(items: Tuple[Tuple[str, str], ...]) -> Tuple[str, ...]:
+    """Pré-formate les entrées de légende (classes CSS legend-item / legend-color)"""
+    return tuple(
+        f'<div class="legend-item"><div class="legend-color" style="background: {color};"></div>{label}</div>'
+        for color, label in items
+    )
+
+
+# Entrées HTML des légendes de carte, par type de risque
+MAP_LEGEND_HTML: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    'flood': _legend_items_html((
+        ('#28a745', 'Faible'),
+        ('#ffc107', 'Modéré'),
+        ('#fd7e14', 'Élevé'),
+        ('#dc3545', 'Critique')
+    )),
+    'drought': _legend_items_html((
+        ('#fef0d9', 'Faible'),
+        ('#fdcc8a', 'Modéré'),
+        ('#fc8d59', 'Élevé'),
+        ('#d7301f', 'Critique')
+    ))
+})
+
+
 def create_risk_color_scale(risk_type: str = 'flood') -> Dict[str, str]:
     """
     Crée une échelle de couleurs pour les niveaux de risque
@@ -250,6 +318,80 @@ def point_in_bbox(lat: float, lon: float, bbox: Tuple[float, float, float, float
     return min_lon <= lon <= max_lon and min_lat <= lat <= max_lat
 
 
+def _round_coordinates(coords, precision: int):
+    """Arrondit récursivement des coordonnées GeoJSON (et retire les doublons consécutifs)"""
+    if coords and isinstance(coords[0], (int, float)):
+        return [round(c, precision) for c in coords]
+    
+    rounded = [_round_coordinates(c, precision) for c in coords]
+    
+    # Niveau "liste de positions" : les sommets confondus après arrondi sont retirés
+    if rounded and rounded[0] and isinstance(rounded[0][0], (int, float)):
+        deduped = [rounded[0]]
+        for position in rounded[1:]:
+            if position != deduped[-1]:
+                deduped.append(position)
+        # Un anneau fermé doit garder au moins 4 positions
+        if len(deduped) >= 4 or len(deduped) == len(rounded):
+            return deduped
+    
+    return rounded
+
+
+def parse_geojson(value):
+    """
+    Parse une géométrie GeoJSON reçue sous forme de texte (ST_AsGeoJSON)
+    
+    Args:
+        value: Géométrie (dict déjà parsé, str ou bytes)
+    
+    Returns:
+        Géométrie sous forme de dict (None si illisible)
+    """
+    if isinstance(value, (str, bytes)):
+        try:
+            return _json_loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def simplify_geometry(
+    geometry: Optional[Dict],
+    tolerance: float = 0.005,
+    precision: int = 5
+) -> Optional[Dict]:
+    """
+    Allège une géométrie GeoJSON pour l'affichage web
+    
+    Simplification topologique (shapely, si disponible) puis réduction de la
+    précision des coordonnées (5 décimales ≈ 1 m).
+    
+    Args:
+        geometry: Géométrie GeoJSON
+        tolerance: Tolérance de simplification (degrés)
+        precision: Nombre de décimales conservées
+    
+    Returns:
+        Géométrie allégée
+    """
+    geometry = parse_geojson(geometry)
+    
+    if not geometry or 'coordinates' not in geometry:
+        return geometry
+    
+    if SHAPELY_AVAILABLE and tolerance > 0:
+        try:
+            geometry = mapping(shape(geometry).simplify(tolerance, preserve_topology=True))
+        except Exception:
+            pass
+    
+    return {
+        'type': geometry['type'],
+        'coordinates': _round_coordinates(list(geometry['coordinates']), precision)
+    }
+
+
 # ========================================
 # RISK CLASSIFICATION
 # ========================================
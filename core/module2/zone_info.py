@@ -204,13 +204,41 @@ class ZoneDetails:
     active_alerts: List[ActiveAlert] = field(default_factory=list)
     metadata: Dict = field(default_factory=dict)
     
+    # Cache du statut de risque : (horodatage, nb alertes, statut)
+    _risk_status_cache: Optional[Tuple[datetime, int, Dict]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    
+    # Durée de validité du statut mis en cache (les alertes expirent dans le temps)
+    RISK_STATUS_TTL = timedelta(seconds=30)
+    
     def get_risk_status(self) -> Dict:
         """
         Évalue le statut de risque global de la zone
         
+        Le résultat est mis en cache sur l'instance pendant RISK_STATUS_TTL
+        et invalidé si la liste des alertes change de taille.
+        
         Returns:
             Statut multi-risques
         """
+        now = datetime.now()
+        cached = self._risk_status_cache
+        
+        if (
+            cached is not None
+            and now - cached[0] < self.RISK_STATUS_TTL
+            and cached[1] == len(self.active_alerts)
+        ):
+            return dict(cached[2])
+        
+        risks = self._compute_risk_status()
+        self._risk_status_cache = (now, len(self.active_alerts), risks)
+        
+        return dict(risks)
+    
+    def _compute_risk_status(self) -> Dict:
+        """Calcule le statut multi-risques (sans cache)"""
         risks = {
             'flood': 'low',
             'drought': 'low',
@@ -1,11 +1,33 @@
 # core/open_meteo.py
 from __future__ import annotations
 
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
 from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Optional
+from pathlib import Path
+from typing import Any, Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Décodage JSON rapide (payloads climat riches en flottants), stdlib sinon
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
 
 FORECAST_API = "https://api.open-meteo.com/v1/forecast"
 SEASONAL_API = "https://seasonal-api.open-meteo.com/v1/seasonal"
@@ -19,6 +41,114 @@ HOURLY_VARS = "temperature_2m,relative_humidity_2m,precipitation,wind_speed_10m,
 FORECAST_MAX_DAYS = 16
 SEASONAL_MAX_DAYS = 215  # ~7 mois (ordre de grandeur, selon produits Open-Meteo)
 
+# Pool de connexions + reprises automatiques sur erreurs transitoires
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 16
+HTTP_RETRY = Retry(
+    total=2,
+    backoff_factor=0.3,
+    status_forcelist=(429, 502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+)
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def http_session() -> requests.Session:
+    """
+    Session HTTP partagée (keep-alive) : évite une poignée de main TLS
+    par appel Open-Meteo. Le module étant importé une seule fois, la session
+    survit aux reruns Streamlit.
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    max_retries=HTTP_RETRY,
+                )
+                session.mount("https://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate"})
+                _SESSION = session
+    return _SESSION
+
+
+# =====================================================
+# Cache disque des réponses (survit aux redémarrages du process)
+# =====================================================
+DISK_CACHE_DIR = Path(os.environ.get("ONACC_CACHE", os.path.join(tempfile.gettempdir(), "onacc_cache")))
+FORECAST_DISK_TTL = 3 * 3600  # prévisions recalculées plusieurs fois par jour
+LONG_RANGE_DISK_TTL = 24 * 3600  # seasonal / climate
+
+
+def _disk_cache_path(url: str, params: Dict[str, Any]) -> Path:
+    # La clé embarque URL + tous les paramètres (variables, modèle, dates...)
+    raw = json.dumps({"url": url, "params": params}, sort_keys=True, default=str)
+    return DISK_CACHE_DIR / f"{hashlib.sha1(raw.encode('utf-8')).hexdigest()}.json.gz"
+
+
+_LAST_PRUNE = 0.0
+PRUNE_INTERVAL_S = 600
+
+
+def _prune_disk_cache(max_age: int) -> None:
+    # Supprime les entrées (et .tmp orphelins) plus anciennes que le plus long TTL,
+    # au plus une fois toutes les PRUNE_INTERVAL_S secondes par process
+    global _LAST_PRUNE
+    now = time.time()
+    if now - _LAST_PRUNE < PRUNE_INTERVAL_S:
+        return
+    _LAST_PRUNE = now
+    cutoff = now - max_age
+    for entry in DISK_CACHE_DIR.glob("*"):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                entry.unlink()
+        except OSError:
+            pass
+
+
+def get_json_cached(
+    url: str,
+    params: Dict[str, Any],
+    timeout: Any,
+    ttl: int,
+    context: Optional[str] = None,
+) -> dict:
+    """
+    GET JSON via la session partagée, avec cache disque gzip de durée `ttl` (s).
+    Un cache illisible ou indisponible est ignoré (appel HTTP normal).
+    """
+    path = _disk_cache_path(url, params)
+    try:
+        if time.time() - path.stat().st_mtime < ttl:
+            with gzip.open(path, "rb") as f:
+                return _json_loads(f.read())
+    except (OSError, ValueError):
+        pass
+
+    r = http_session().get(url, params=params, timeout=timeout)
+    if not r.ok:
+        if context:
+            _raise_http_error(r, context)
+        r.raise_for_status()
+    data = _json_loads(r.content)
+
+    try:
+        DISK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp, "wb") as f:
+            f.write(_json_dumps(data))
+        os.replace(tmp, path)  # écriture atomique
+        _prune_disk_cache(max(ttl, LONG_RANGE_DISK_TTL))
+    except OSError:
+        pass
+    return data
+
 
 @dataclass(frozen=True)
 class HorizonPlan:
@@ -95,10 +225,8 @@ def fetch_daily_forecast(lat: float, lon: float, days: int, seasonal: bool = Fal
             "timezone": "auto",
         }
 
-    r = requests.get(url, params=params, timeout=45)
-    if not r.ok:
-        _raise_http_error(r, "Open-Meteo daily fetch failed")
-    return r.json()
+    ttl = LONG_RANGE_DISK_TTL if seasonal else FORECAST_DISK_TTL
+    return get_json_cached(url, params, timeout=45, ttl=ttl, context="Open-Meteo daily fetch failed")
 
 
 def fetch_climate_daily(
@@ -127,10 +255,9 @@ def fetch_climate_daily(
     if apikey:
         params["apikey"] = apikey
 
-    r = requests.get(CLIMATE_API, params=params, timeout=60)
-    if not r.ok:
-        _raise_http_error(r, "Open-Meteo climate fetch failed")
-    return r.json()
+    return get_json_cached(
+        CLIMATE_API, params, timeout=60, ttl=LONG_RANGE_DISK_TTL, context="Open-Meteo climate fetch failed"
+    )
 
 
 def fetch_hourly_nowcast(
@@ -151,7 +278,7 @@ def fetch_hourly_nowcast(
         "forecast_days": int(forecast_days),
         "timezone": timezone,
     }
-    r = requests.get(FORECAST_API, params=params, timeout=45)
+    r = http_session().get(FORECAST_API, params=params, timeout=45)
     if not r.ok:
         _raise_http_error(r, "Open-Meteo hourly fetch failed")
-    return r.json()
+    return _json_loads(r.content)
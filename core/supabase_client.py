@@ -6,6 +6,23 @@ from typing import Optional, Callable
 import streamlit as st
 from supabase import Client, create_client
 
+# Pool HTTP partagé (httpx est une dépendance de supabase-py, mais
+# l'option `httpx_client` n'existe que dans les versions récentes)
+try:
+    import httpx
+    from supabase.lib.client_options import SyncClientOptions
+    HTTPX_POOL_AVAILABLE = True
+except Exception:
+    HTTPX_POOL_AVAILABLE = False
+
+# Connexion courte, lecture longue : l'upsert RPC par blocs de 5000 lignes et
+# les lectures paginées gardent le délai par défaut de postgrest (120 s)
+HTTP_CONNECT_TIMEOUT_S = 10.0
+HTTP_READ_TIMEOUT_S = 120.0
+HTTP_MAX_KEEPALIVE = 10
+HTTP_MAX_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY_S = 30.0
+
 
 def _read_secret(*keys: str) -> Optional[str]:
     """
@@ -55,9 +72,38 @@ def _get_service_key() -> str:
     return key
 
 
+def _new_http_pool() -> "httpx.Client":
+    # Un pool keep-alive par client (url, key), jamais partagé : avec
+    # postgrest < 2, create_session réécrit base_url/en-têtes du client httpx
+    # et .auth() y inscrit Authorization, une clé ou un JWT fuiterait sinon
+    # d'un client Supabase à l'autre
+    try:
+        import h2  # noqa: F401
+        http2 = True
+    except ImportError:
+        http2 = False
+    return httpx.Client(
+        http2=http2,
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT_S, connect=HTTP_CONNECT_TIMEOUT_S),
+        limits=httpx.Limits(
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            max_connections=HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S,
+        ),
+    )
+
+
 @st.cache_resource(show_spinner=False)
 def _client(url: str, key: str) -> Client:
-    # Cache par (url, key)
+    # Cache par (url, key) : le pool vit aussi longtemps que le client
+    if HTTPX_POOL_AVAILABLE:
+        pool = _new_http_pool()
+        try:
+            options = SyncClientOptions(httpx_client=pool)
+            return create_client(url, key, options=options)
+        except TypeError:
+            # supabase-py trop ancien : pas d'option httpx_client
+            pool.close()
     return create_client(url, key)
 
 
@@ -79,22 +125,41 @@ def supabase_user(access_token: str) -> Client:
     (les signatures varient selon supabase-py, on gère plusieurs cas)
     """
     c = supa_anon()
+    # Fallback silencieux si la version actuelle ne supporte pas l'injection
+    _inject_token(c, access_token)
+    return c
+
 
+@st.cache_resource(show_spinner=False, max_entries=64, ttl=3600)
+def _user_client(url: str, key: str, access_token: str) -> Client:
+    # Cache par (url, key, token) : un client dédié par session utilisateur
+    c = create_client(url, key)
+    _inject_token(c, access_token)
+    return c
+
+
+def _inject_token(c: Client, access_token: str) -> None:
     # Compat supabase-py: postgrest.auth(<token>) ou postgrest.auth(token=<token>)
     try:
         c.postgrest.auth(access_token)  # type: ignore[arg-type]
-        return c
+        return
     except Exception:
         pass
 
     try:
         c.postgrest.auth(token=access_token)  # type: ignore[call-arg]
-        return c
     except Exception:
         pass
 
-    # Fallback: pas de support dans la version actuelle
-    return c
+
+def supabase_user_cached(access_token: str) -> Client:
+    """
+    Client en contexte utilisateur (RLS), mis en cache par jeton :
+    - réutilise le pool HTTP (keep-alive) d'un appel PostgREST à l'autre
+    - le jeton n'est injecté qu'à la création (pas de ré-injection sur le
+      client anon partagé à chaque requête)
+    """
+    return _user_client(_get_supabase_url(), _get_anon_key(), access_token)
 
 
 def supabase_service() -> Client:
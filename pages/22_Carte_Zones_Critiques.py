@@ -1,6 +1,7 @@
 # pages/22_Carte_Zones_Critiques.py
 import streamlit as st
 import pandas as pd
+import branca.colormap
 import folium
 from streamlit_folium import st_folium
 from datetime import date
@@ -8,6 +9,7 @@ from datetime import date
 from core.auth import is_logged_in
 from core.ui import approval_gate
 from core.supabase_client import supabase_user
+from core.module2.utils import parse_geojson
 from core.vigilance_scores import (
     IC_FLOOD_SCORE, IC_DROUGHT_SCORE, SOURCE_HOURLY,
     RISK_FLOOD, RISK_DROUGHT
@@ -54,42 +56,49 @@ if df_geo.empty:
     st.error("Aucune géométrie disponible. Vérifiez ref_admin_units.geom et la view v_admin_units_geojson.")
     st.stop()
 
-# 3) Jointure
-df = df_geo.merge(df_scores, left_on="code", right_on="admin_code", how="inner")
-if df.empty:
-    st.warning("Aucune correspondance code ↔ score. Vérifiez que mnocc_stations.admin_code correspond à ref_admin_units.code.")
-    st.stop()
+# 3) Jointure (dict code -> score : la table des scores est petite)
+score_map = dict(zip(df_scores["admin_code"], df_scores["value"].astype(float)))
 
-# FeatureCollection
 features = []
-for _, r in df.iterrows():
+for code, name, geometry in zip(df_geo["code"], df_geo["name"], df_geo["geojson"]):
+    score = score_map.get(code)
+    if score is None:
+        continue
     features.append({
         "type": "Feature",
         "properties": {
-            "code": r["code"],
-            "name": r["name"],
-            "score": float(r["value"]),
+            "code": code,
+            "name": name,
+            "score": score,
         },
-        "geometry": r["geojson"],
+        "geometry": parse_geojson(geometry),
     })
+
+if not features:
+    st.warning("Aucune correspondance code ↔ score. Vérifiez que mnocc_stations.admin_code correspond à ref_admin_units.code.")
+    st.stop()
+
 fc = {"type": "FeatureCollection", "features": features}
 
 # Carte
 m = folium.Map(location=[6.5, 12.5], zoom_start=6, tiles="cartodbpositron")
 
-folium.Choropleth(
-    geo_data=fc,
-    data=df,
-    columns=["code", "value"],
-    key_on="feature.properties.code",
-    fill_opacity=0.75,
-    line_opacity=0.2,
-    legend_name=f"{indicator_code} — {valid_date}",
-).add_to(m)
+# Une seule couche GeoJson (couleur + infobulle) : la FeatureCollection
+# n'est sérialisée et rendue qu'une fois dans le navigateur
+vmin, vmax = float(min(score_map.values())), float(max(score_map.values()))
+colormap = branca.colormap.linear.YlOrRd_09.scale(vmin, vmax if vmax > vmin else vmin + 1.0)
+colormap.caption = f"{indicator_code} — {valid_date}"
 
 folium.GeoJson(
     fc,
     name="Zones",
+    style_function=lambda f: {
+        "fillColor": colormap(f["properties"]["score"]),
+        "fillOpacity": 0.75,
+        "color": "#000000",
+        "weight": 1,
+        "opacity": 0.2,
+    },
     tooltip=folium.GeoJsonTooltip(
         fields=["name", "code", "score"],
         aliases=["Territoire", "Code", "Score"],
@@ -97,6 +106,8 @@ folium.GeoJson(
     )
 ).add_to(m)
 
+colormap.add_to(m)
+
 folium.LayerControl().add_to(m)
 
 st_folium(m, height=650, width=None)
@@ -31,6 +31,7 @@ from core.supabase_client import supabase_user
 
 # Import Module 2
 from core.module2 import (
+    dry_runs,
     RiskMapper,
     FloodZoneAnalyzer,
     FloodRiskLevel,
@@ -43,6 +44,7 @@ from core.module2 import (
     RiskFilter,
     AlertLevelFilter,
     CompositeFilter,
+    LayerBitmapIndex,
     ZoneInfoProvider,
     ZoneDetails,
     ZoneType,
@@ -55,7 +57,21 @@ from core.module2.utils import (
     get_risk_color_scale,
     get_risk_level_label,
     format_area,
-    create_choropleth_map
+    create_choropleth_map,
+    RISK_STATUS_COLORS,
+    ALERT_LEVEL_COLORS,
+    MAP_STYLE_OPTIONS,
+    MAP_STYLE_LABELS,
+    MAP_LEGEND_HTML
+)
+
+from core.module2.filters import (
+    PERIOD_OPTIONS,
+    PERIOD_LABELS,
+    RISK_TYPE_OPTIONS,
+    RISK_TYPE_LABELS,
+    ALERT_LEVEL_OPTIONS,
+    ALERT_LEVEL_LABELS
 )
 
 st.set_page_config(
@@ -207,6 +223,29 @@ st.markdown("""
             margin: 2rem 0;
             border: none;
         }
+        
+        /* Radio de navigation rendu comme une barre d'onglets */
+        .st-key-active_tab div[role="radiogroup"] {
+            gap: 0;
+            border-bottom: 1px solid #e0e0e0;
+            margin-bottom: 1rem;
+        }
+        
+        .st-key-active_tab div[role="radiogroup"] > label {
+            padding: 0.6rem 1rem;
+            margin: 0;
+            border-bottom: 3px solid transparent;
+            cursor: pointer;
+        }
+        
+        .st-key-active_tab div[role="radiogroup"] > label > div:first-child {
+            display: none;
+        }
+        
+        .st-key-active_tab div[role="radiogroup"] > label:has(input:checked) {
+            border-bottom-color: #43e97b;
+            font-weight: 700;
+        }
     </style>
 """, unsafe_allow_html=True)
 
@@ -304,13 +343,15 @@ def analyze_flood_risk_from_forecast(forecast_data: Dict) -> Dict:
         if not precipitation:
             return {'risk_level': 'low', 'confidence': 0, 'periods': []}
         
-        # Analyser cumul et intensité
-        total_precip = sum(precipitation)
-        max_precip = max(precipitation)
+        # Analyser cumul et intensité (une seule conversion NumPy)
+        pr = np.asarray(precipitation, dtype=float)
+        total_precip = float(np.nansum(pr))
+        max_precip = float(np.nanmax(pr)) if np.isfinite(pr).any() else 0.0
         
-        # Détecter épisodes intenses
-        intense_days = [(dates[i], p) for i, p in enumerate(precipitation) if p > 50 and i < len(dates)]
-        critical_days = [(dates[i], p) for i, p in enumerate(precipitation) if p > 100 and i < len(dates)]
+        # Détecter épisodes intenses (jours datés uniquement)
+        pr_dated = pr[:len(dates)]
+        intense_days = [(dates[i], float(pr_dated[i])) for i in np.flatnonzero(pr_dated > 50)]
+        critical_days = [(dates[i], float(pr_dated[i])) for i in np.flatnonzero(pr_dated > 100)]
         
         # Classification
         risk_level = 'low'
@@ -367,33 +408,18 @@ def analyze_drought_risk_from_forecast(forecast_data: Dict) -> Dict:
         if not precipitation:
             return {'severity': 'normal', 'confidence': 0, 'periods': []}
         
-        # Jours secs consécutifs
-        max_dry_streak = 0
-        current_streak = 0
-        dry_periods = []
-        streak_start = None
-        
-        for i, p in enumerate(precipitation):
-            if p < 1:  # Jour sec
-                if current_streak == 0:
-                    streak_start = dates[i] if i < len(dates) else None
-                current_streak += 1
-                max_dry_streak = max(max_dry_streak, current_streak)
-            else:
-                if current_streak >= 5:
-                    dry_periods.append({
-                        'start_date': streak_start,
-                        'duration_days': current_streak
-                    })
-                current_streak = 0
-                streak_start = None
-        
-        # Dernière période si en cours
-        if current_streak >= 5:
-            dry_periods.append({
-                'start_date': streak_start,
-                'duration_days': current_streak
-            })
+        # Jours secs consécutifs : (début, longueur) de chaque série
+        starts, lengths = dry_runs(np.ascontiguousarray(precipitation, dtype=np.float64), 1.0)
+        
+        max_dry_streak = int(lengths.max()) if lengths.size else 0
+        dry_periods = [
+            {
+                'start_date': dates[start] if start < len(dates) else None,
+                'duration_days': int(n)
+            }
+            for start, n in zip(starts, lengths)
+            if n >= 5
+        ]
         
         # Classification
         severity = 'normal'
@@ -423,6 +449,172 @@ def analyze_drought_risk_from_forecast(forecast_data: Dict) -> Dict:
     except Exception as e:
         return {'severity': 'unknown', 'confidence': 0, 'periods': []}
 
+def layers_to_geojson(layers: List, cache_key: str) -> Dict:
+    """
+    Construit une FeatureCollection unique pour un lot de couches
+    
+    Le résultat est conservé en session, indexé par la signature du lot
+    (mêmes couches filtrées => même GeoJSON, sans reconstruction).
+    
+    Args:
+        layers: Couches RiskLayer à sérialiser
+        cache_key: Clé du lot (ex: type de risque)
+    
+    Returns:
+        FeatureCollection GeoJSON (chaque feature porte un 'id')
+    """
+    signature = tuple(id(layer) for layer in layers)
+    cache = st.session_state.setdefault('layers_geojson_cache', {})
+    
+    cached = cache.get(cache_key)
+    if cached and cached[0] == signature:
+        return cached[1]
+    
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": f"{cache_key}_{i}",
+                "geometry": layer.geometry,
+                "properties": {
+                    "zone_name": layer.properties.get('zone_name', 'Zone'),
+                    "level": layer.level,
+                    "risk_type": cache_key
+                }
+            }
+            for i, layer in enumerate(layers)
+        ]
+    }
+    
+    cache[cache_key] = (signature, geojson)
+    return geojson
+
+def layers_choropleth(
+    layers: List,
+    risk_type: str,
+    hover_texts: List[str],
+    name: str,
+    opacity: float,
+    cache_key: Optional[str] = None
+) -> go.Choroplethmapbox:
+    """
+    Trace choroplèthe Mapbox unique pour un lot de couches d'un même type
+    
+    Remplace une trace Scattermapbox par polygone : une seule source GeoJSON
+    et un seul appel de rendu côté navigateur.
+    
+    Args:
+        layers: Couches du même type de risque
+        risk_type: Type de risque (échelle de couleurs)
+        hover_texts: Texte de survol, une entrée par couche
+        name: Nom de la trace (légende)
+        opacity: Opacité du remplissage
+        cache_key: Clé du GeoJSON en session (par défaut : risk_type)
+    
+    Returns:
+        Trace go.Choroplethmapbox
+    """
+    geojson = layers_to_geojson(layers, cache_key or risk_type)
+    
+    # Échelle discrète : un palier par niveau (+ gris pour niveau inconnu)
+    color_scale = get_risk_color_scale(risk_type)
+    levels = list(color_scale.keys())
+    colors = list(color_scale.values()) + ['#999999']
+    n_colors = len(colors)
+    
+    discrete_scale = []
+    for i, color in enumerate(colors):
+        discrete_scale += [[i / n_colors, color], [(i + 1) / n_colors, color]]
+    
+    level_index = {level: i for i, level in enumerate(levels)}
+    z = [level_index.get(layer.level, len(levels)) for layer in layers]
+    
+    return go.Choroplethmapbox(
+        geojson=geojson,
+        locations=[feature['id'] for feature in geojson['features']],
+        z=z,
+        zmin=-0.5,
+        zmax=n_colors - 0.5,
+        colorscale=discrete_scale,
+        showscale=False,
+        marker_opacity=opacity,
+        marker_line_width=1,
+        marker_line_color=[colors[i] for i in z],
+        text=hover_texts,
+        hoverinfo='text',
+        name=name,
+        legendgroup=risk_type,
+        showlegend=True
+    )
+
+@st.cache_data(ttl=300, show_spinner=False)
+def build_risk_types_figure(by_type: Tuple[Tuple[str, int], ...]) -> go.Figure:
+    """
+    Graphique en barres du nombre de couches par type de risque
+    
+    Args:
+        by_type: Paires (type, nombre) — clé de cache
+    
+    Returns:
+        Figure Plotly
+    """
+    risk_types_labels = [label for label, _ in by_type]
+    risk_counts = [count for _, count in by_type]
+    
+    fig = go.Figure(data=[
+        go.Bar(
+            x=risk_types_labels,
+            y=risk_counts,
+            marker_color=['#2196F3', '#ffc107', '#f44336', '#9c27b0', '#00bcd4'][:len(risk_types_labels)],
+            text=risk_counts,
+            textposition='auto'
+        )
+    ])
+    
+    fig.update_layout(
+        title="Nombre de Couches par Type de Risque",
+        xaxis_title="Type de Risque",
+        yaxis_title="Nombre de Couches",
+        height=400,
+        template='plotly_white'
+    )
+    
+    return fig
+
+@st.cache_data(ttl=300, show_spinner=False)
+def build_risk_levels_figure(by_level: Tuple[Tuple[str, int], ...]) -> go.Figure:
+    """
+    Camembert de la distribution des niveaux de risque
+    
+    Args:
+        by_level: Paires (niveau, nombre) — clé de cache
+    
+    Returns:
+        Figure Plotly
+    """
+    level_labels = [level for level, _ in by_level]
+    level_counts = [count for _, count in by_level]
+    
+    # Couleurs selon niveau
+    colors = [RISK_STATUS_COLORS.get(level, '#6c757d') for level in level_labels]
+    
+    fig = go.Figure(data=[
+        go.Pie(
+            labels=[l.upper() for l in level_labels],
+            values=level_counts,
+            marker=dict(colors=colors),
+            hole=0.4
+        )
+    ])
+    
+    fig.update_layout(
+        title="Distribution des Niveaux de Risque",
+        height=400
+    )
+    
+    return fig
+
 def initialize_demo_data():
     """Initialise les données avec les vraies stations de Supabase"""
     
@@ -647,20 +839,22 @@ if not stations_df.empty:
     prev_col1, prev_col2 = st.columns([2, 1])
     
     with prev_col1:
-        # Créer options
-        station_options = [
-            f"{row['localite']} - {row.get('region', 'N/A')}"
-            for _, row in stations_df.iterrows()
-        ]
+        # Créer options (concaténation vectorisée ; options = positions)
+        regions = (
+            stations_df["region"].fillna("N/A").astype(str)
+            if "region" in stations_df.columns
+            else pd.Series("N/A", index=stations_df.index)
+        )
+        station_labels = (stations_df["localite"].astype(str) + " - " + regions).tolist()
         
-        selected_station_label = st.selectbox(
+        selected_idx = st.selectbox(
             "📍 Station",
-            options=station_options,
+            options=range(len(station_labels)),
+            format_func=station_labels.__getitem__,
             key="forecast_station"
         )
         
         # Récupérer station
-        selected_idx = station_options.index(selected_station_label)
         selected_station = stations_df.iloc[selected_idx]
     
     with prev_col2:
@@ -691,12 +885,7 @@ if not stations_df.empty:
         risk_col1, risk_col2, risk_col3, risk_col4 = st.columns(4)
         
         with risk_col1:
-            flood_color = {
-                'low': '#28a745',
-                'moderate': '#ffc107',
-                'high': '#fd7e14',
-                'critical': '#dc3545'
-            }.get(flood_risk['risk_level'], '#6c757d')
+            flood_color = RISK_STATUS_COLORS.get(flood_risk['risk_level'], '#6c757d')
             
             st.markdown(f"""
                 <div style="background: white; padding: 1rem; border-radius: 12px; border-top: 4px solid {flood_color}; text-align: center;">
@@ -882,26 +1071,12 @@ with st.expander("⚙️ Configurer les filtres", expanded=True):
         
         temporal_period = st.selectbox(
             "Période",
-            options=[
-                "Aujourd'hui",
-                "7 derniers jours",
-                "30 derniers jours",
-                "3 derniers mois",
-                "Personnalisée"
-            ],
+            options=PERIOD_LABELS,
             key="temporal_period"
         )
         
         # Mapping vers TemporalPeriod
-        period_map = {
-            "Aujourd'hui": TemporalPeriod.TODAY,
-            "7 derniers jours": TemporalPeriod.WEEK,
-            "30 derniers jours": TemporalPeriod.MONTH,
-            "3 derniers mois": TemporalPeriod.QUARTER,
-            "Personnalisée": TemporalPeriod.CUSTOM
-        }
-        
-        selected_period = period_map[temporal_period]
+        selected_period = PERIOD_OPTIONS[temporal_period]
         
         # Si période custom
         start_date = None
@@ -916,41 +1091,26 @@ with st.expander("⚙️ Configurer les filtres", expanded=True):
         
         risk_types = st.multiselect(
             "Types",
-            options=['Inondation', 'Sécheresse', 'Tempête', 'Érosion', 'Chaleur'],
+            options=RISK_TYPE_LABELS,
             default=['Inondation', 'Sécheresse'],
             key="risk_types"
         )
         
         # Mapping
-        risk_type_map = {
-            'Inondation': 'flood',
-            'Sécheresse': 'drought',
-            'Tempête': 'storm',
-            'Érosion': 'erosion',
-            'Chaleur': 'heat'
-        }
-        
-        selected_risks = set(risk_type_map[rt] for rt in risk_types)
+        selected_risks = set(RISK_TYPE_OPTIONS[rt] for rt in risk_types)
     
     with filter_col3:
         st.markdown("**⚠️ Niveaux d'Alerte**")
         
         alert_levels = st.multiselect(
             "Niveaux",
-            options=['🟢 Faible', '🟡 Modéré', '🟠 Élevé', '🔴 Critique'],
+            options=ALERT_LEVEL_LABELS,
             default=['🟠 Élevé', '🔴 Critique'],
             key="alert_levels"
         )
         
         # Mapping
-        level_map = {
-            '🟢 Faible': 'low',
-            '🟡 Modéré': 'moderate',
-            '🟠 Élevé': 'high',
-            '🔴 Critique': 'critical'
-        }
-        
-        selected_levels = {level_map[al] for al in alert_levels}
+        selected_levels = {ALERT_LEVEL_OPTIONS[al] for al in alert_levels}
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -981,8 +1141,13 @@ composite_filter = CompositeFilter(
     alert_level=alert_level_filter
 )
 
-# Appliquer filtres
-filtered_layers = composite_filter.apply(risk_mapper.layers)
+# Appliquer filtres via l'index bitmap (reconstruit si les couches changent)
+layer_index = st.session_state.get('layer_index')
+if layer_index is None or len(layer_index) != len(risk_mapper.layers):
+    layer_index = LayerBitmapIndex(risk_mapper.layers)
+    st.session_state['layer_index'] = layer_index
+
+filtered_layers = composite_filter.apply_indexed(layer_index)
 
 st.info(f"""
 📊 **Résultats du filtrage**
@@ -999,18 +1164,34 @@ st.markdown('<hr class="custom-divider">', unsafe_allow_html=True)
 # TABS PRINCIPALES
 # ========================================
 
-tab1, tab2, tab3, tab4 = st.tabs([
-    "🗺️ Carte Interactive",
-    "📋 Zones Critiques",
-    "📊 Analyses Détaillées",
-    "📈 Statistiques & Tendances"
-])
+# st.tabs exécute le corps de tous les onglets à chaque rerun : on pilote
+# l'affichage par un radio (stylé en barre d'onglets) pour ne construire
+# que la vue active.
+TAB_MAP = "🗺️ Carte Interactive"
+TAB_CRITICAL = "📋 Zones Critiques"
+TAB_ANALYSIS = "📊 Analyses Détaillées"
+TAB_STATS = "📈 Statistiques & Tendances"
+
+# Nombre de fiches « zone critique » rendues par page
+CRITICAL_ZONES_PAGE_SIZE = 10
+
+# Vue multi-risques : zones plus petites que ce seuil affichées en points
+# regroupés (clustering) plutôt qu'en polygones
+SMALL_LAYER_AREA_KM2 = 1000
+
+active_tab = st.radio(
+    "Vue",
+    options=[TAB_MAP, TAB_CRITICAL, TAB_ANALYSIS, TAB_STATS],
+    horizontal=True,
+    label_visibility="collapsed",
+    key="active_tab"
+)
 
 # ========================================
 # TAB 1: CARTE INTERACTIVE
 # ========================================
 
-with tab1:
+if active_tab == TAB_MAP:
     st.markdown("### 🗺️ Cartographie Multi-Risques")
     
     # Sélection du type de carte
@@ -1027,56 +1208,46 @@ with tab1:
     with map_col2:
         satellite_style = st.selectbox(
             "🛰️ Style Carte",
-            options=[
-                "OpenStreetMap Standard",
-                "OpenStreetMap Satellite",
-                "Satellite Streets (Mapbox)",
-                "Outdoor (Mapbox)"
-            ],
+            options=MAP_STYLE_LABELS,
             index=1,
             key="satellite_style"
         )
         
         # Mapping vers style Mapbox
-        style_map = {
-            "OpenStreetMap Standard": "open-street-map",
-            "OpenStreetMap Satellite": "satellite",
-            "Satellite Streets (Mapbox)": "satellite-streets",
-            "Outdoor (Mapbox)": "outdoors"
-        }
-        
-        mapbox_style = style_map[satellite_style]
+        mapbox_style = MAP_STYLE_OPTIONS[satellite_style]
     
     with map_col3:
         show_labels = st.checkbox("Labels", value=True, key="show_labels")
     
+    # Couches effectivement dessinées : filtered_layers est déjà filtré par
+    # niveau (CompositeFilter), les niveaux désélectionnés ne sont pas tracés
+    map_layers = filtered_layers
+    
+    # Index par type de risque, construit une seule fois pour les 3 vues
+    # (RiskLayer garantit risk_type : pas de hasattr par couche)
+    layers_by_type: Dict[str, List] = {}
+    for layer in map_layers:
+        layers_by_type.setdefault(layer.risk_type.value, []).append(layer)
+    
     # Créer carte basée sur le type sélectionné
-    if map_type == 'Risque Inondation':
-        flood_layers = [l for l in filtered_layers if hasattr(l, 'risk_type') and l.risk_type.value == 'flood']
+    if not map_layers:
+        st.warning("⚠️ Aucune couche à afficher avec les filtres actuels")
+    
+    elif map_type == 'Risque Inondation':
+        flood_layers = layers_by_type.get('flood', [])
         
         if flood_layers:
-            # Créer carte Plotly
-            fig = go.Figure()
-            
-            for layer in flood_layers:
-                coords = layer.geometry['coordinates'][0]
-                lons = [c[0] for c in coords]
-                lats = [c[1] for c in coords]
-                
-                color_scale = get_risk_color_scale('flood')
-                color = color_scale.get(layer.level, '#999999')
-                
-                fig.add_trace(go.Scattermapbox(
-                    lon=lons,
-                    lat=lats,
-                    mode='lines',
-                    fill='toself',
-                    fillcolor=color + '66',  # Transparence
-                    line=dict(color=color, width=2),
-                    name=layer.properties.get('zone_name', 'Zone'),
-                    text=f"{layer.properties.get('zone_name')}<br>Risque: {get_risk_level_label(layer.level, 'flood')}",
-                    hoverinfo='text'
-                ))
+            # Une seule trace choroplèthe (1 source GeoJSON) pour toutes les zones
+            fig = go.Figure(layers_choropleth(
+                flood_layers,
+                'flood',
+                hover_texts=[
+                    f"{layer.properties.get('zone_name')}<br>Risque: {get_risk_level_label(layer.level, 'flood')}"
+                    for layer in flood_layers
+                ],
+                name="Inondation",
+                opacity=0.4
+            ))
             
             fig.update_layout(
                 mapbox=dict(
@@ -1093,45 +1264,27 @@ with tab1:
             
             # Légende
             st.markdown("**Légende :**")
-            leg_col1, leg_col2, leg_col3, leg_col4 = st.columns(4)
-            
-            with leg_col1:
-                st.markdown('<div class="legend-item"><div class="legend-color" style="background: #28a745;"></div>Faible</div>', unsafe_allow_html=True)
-            with leg_col2:
-                st.markdown('<div class="legend-item"><div class="legend-color" style="background: #ffc107;"></div>Modéré</div>', unsafe_allow_html=True)
-            with leg_col3:
-                st.markdown('<div class="legend-item"><div class="legend-color" style="background: #fd7e14;"></div>Élevé</div>', unsafe_allow_html=True)
-            with leg_col4:
-                st.markdown('<div class="legend-item"><div class="legend-color" style="background: #dc3545;"></div>Critique</div>', unsafe_allow_html=True)
+            for leg_col, legend_html in zip(st.columns(4), MAP_LEGEND_HTML['flood']):
+                with leg_col:
+                    st.markdown(legend_html, unsafe_allow_html=True)
         
         else:
             st.warning("⚠️ Aucune couche d'inondation à afficher avec les filtres actuels")
     
     elif map_type == 'Risque Sécheresse':
-        drought_layers = [l for l in filtered_layers if hasattr(l, 'risk_type') and l.risk_type.value == 'drought']
+        drought_layers = layers_by_type.get('drought', [])
         
         if drought_layers:
-            fig = go.Figure()
-            
-            for layer in drought_layers:
-                coords = layer.geometry['coordinates'][0]
-                lons = [c[0] for c in coords]
-                lats = [c[1] for c in coords]
-                
-                color_scale = get_risk_color_scale('drought')
-                color = color_scale.get(layer.level, '#999999')
-                
-                fig.add_trace(go.Scattermapbox(
-                    lon=lons,
-                    lat=lats,
-                    mode='lines',
-                    fill='toself',
-                    fillcolor=color + '66',
-                    line=dict(color=color, width=2),
-                    name=layer.properties.get('zone_name', 'Zone'),
-                    text=f"{layer.properties.get('zone_name')}<br>Sévérité: {get_risk_level_label(layer.level, 'drought')}",
-                    hoverinfo='text'
-                ))
+            fig = go.Figure(layers_choropleth(
+                drought_layers,
+                'drought',
+                hover_texts=[
+                    f"{layer.properties.get('zone_name')}<br>Sévérité: {get_risk_level_label(layer.level, 'drought')}"
+                    for layer in drought_layers
+                ],
+                name="Sécheresse",
+                opacity=0.4
+            ))
             
             fig.update_layout(
                 mapbox=dict(
@@ -1148,46 +1301,65 @@ with tab1:
             
             # Légende
             st.markdown("**Légende :**")
-            leg_col1, leg_col2, leg_col3, leg_col4 = st.columns(4)
-            
-            with leg_col1:
-                st.markdown('<div class="legend-item"><div class="legend-color" style="background: #fef0d9;"></div>Faible</div>', unsafe_allow_html=True)
-            with leg_col2:
-                st.markdown('<div class="legend-item"><div class="legend-color" style="background: #fdcc8a;"></div>Modéré</div>', unsafe_allow_html=True)
-            with leg_col3:
-                st.markdown('<div class="legend-item"><div class="legend-color" style="background: #fc8d59;"></div>Élevé</div>', unsafe_allow_html=True)
-            with leg_col4:
-                st.markdown('<div class="legend-item"><div class="legend-color" style="background: #d7301f;"></div>Critique</div>', unsafe_allow_html=True)
+            for leg_col, legend_html in zip(st.columns(4), MAP_LEGEND_HTML['drought']):
+                with leg_col:
+                    st.markdown(legend_html, unsafe_allow_html=True)
         
         else:
             st.warning("⚠️ Aucune couche de sécheresse à afficher avec les filtres actuels")
     
     else:  # Multi-Risques
-        if filtered_layers:
+        if layers_by_type:
+            # Une trace par type de risque (et non par zone) : la légende
+            # active/désactive un type de risque entier
             fig = go.Figure()
             
-            for layer in filtered_layers:
-                coords = layer.geometry['coordinates'][0]
-                lons = [c[0] for c in coords]
-                lats = [c[1] for c in coords]
+            for risk_type, type_layers in layers_by_type.items():
+                risk_label = '🌊' if risk_type == 'flood' else '🌵' if risk_type == 'drought' else '⚠️'
                 
-                risk_type = layer.risk_type.value if hasattr(layer.risk_type, 'value') else str(layer.risk_type)
-                color_scale = get_risk_color_scale(risk_type)
-                color = color_scale.get(layer.level, '#999999')
+                # Petites zones -> centroïdes regroupés (clustering Mapbox),
+                # grandes zones -> polygones
+                big_layers = []
+                small_layers = []
+                for layer in type_layers:
+                    if layer.properties.get('area_km2', 0) < SMALL_LAYER_AREA_KM2:
+                        small_layers.append(layer)
+                    else:
+                        big_layers.append(layer)
                 
-                risk_label = '🌊' if risk_type == 'flood' else '🌵' if risk_type == 'drought' else '⚠️'
+                if big_layers:
+                    fig.add_trace(layers_choropleth(
+                        big_layers,
+                        risk_type,
+                        hover_texts=[
+                            f"{layer.properties.get('zone_name')}<br>Type: {risk_type}<br>Niveau: {layer.level}"
+                            for layer in big_layers
+                        ],
+                        name=f"{risk_label} {risk_type}",
+                        opacity=0.27,
+                        cache_key=f"multi_{risk_type}"
+                    ))
                 
-                fig.add_trace(go.Scattermapbox(
-                    lon=lons,
-                    lat=lats,
-                    mode='lines',
-                    fill='toself',
-                    fillcolor=color + '44',
-                    line=dict(color=color, width=2),
-                    name=f"{risk_label} {layer.properties.get('zone_name', 'Zone')}",
-                    text=f"{layer.properties.get('zone_name')}<br>Type: {risk_type}<br>Niveau: {layer.level}",
-                    hoverinfo='text'
-                ))
+                if small_layers:
+                    color_scale = get_risk_color_scale(risk_type)
+                    
+                    fig.add_trace(go.Scattermapbox(
+                        lon=[layer.properties.get('center_lon') for layer in small_layers],
+                        lat=[layer.properties.get('center_lat') for layer in small_layers],
+                        mode='markers',
+                        marker=dict(
+                            size=10,
+                            color=[color_scale.get(layer.level, '#999999') for layer in small_layers]
+                        ),
+                        cluster=dict(enabled=True, maxzoom=9, step=[10, 50], size=[15, 22, 30]),
+                        text=[
+                            f"{layer.properties.get('zone_name')}<br>Type: {risk_type}<br>Niveau: {layer.level}"
+                            for layer in small_layers
+                        ],
+                        hoverinfo='text',
+                        name=f"{risk_label} {risk_type} (points)",
+                        legendgroup=risk_type
+                    ))
             
             fig.update_layout(
                 mapbox=dict(
@@ -1211,7 +1383,7 @@ with tab1:
 # TAB 2: ZONES CRITIQUES
 # ========================================
 
-with tab2:
+if active_tab == TAB_CRITICAL:
     st.markdown("### 📋 Zones en Situation Critique")
     
     critical_zones_list = zone_provider.get_critical_zones()
@@ -1219,110 +1391,101 @@ with tab2:
     if critical_zones_list:
         st.warning(f"⚠️ **{len(critical_zones_list)} zone(s) en situation critique identifiée(s)**")
         
-        for zone in critical_zones_list:
-            risk_status = zone.get_risk_status()
-            
-            # Déterminer couleur de bordure
-            border_color = '#dc3545' if risk_status['overall'] == 'critical' else '#fd7e14'
-            
-            st.markdown(f"""
-                <div class="zone-card" style="border-left: 4px solid {border_color};">
-                    <div class="zone-title">{zone.zone_name}</div>
-                    <div class="zone-meta">
-                        📍 {zone.zone_type.value.replace('_', ' ').title()} • 
-                        👥 {zone.population:,} habitants • 
-                        📏 {zone.area_km2:,.0f} km²
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-            
-            # Détails risques
-            risk_col1, risk_col2, risk_col3 = st.columns(3)
-            
-            with risk_col1:
-                flood_color = {
-                    'low': '#28a745',
-                    'moderate': '#ffc107',
-                    'high': '#fd7e14',
-                    'critical': '#dc3545'
-                }.get(risk_status['flood'], '#6c757d')
+        # Affichage progressif : seules les N premières fiches sont rendues
+        # à chaque rerun, les suivantes sur demande
+        page_size = CRITICAL_ZONES_PAGE_SIZE
+        shown = st.session_state.get('critical_shown', page_size)
+        
+        for zone in critical_zones_list[:shown]:
+            with st.container():
+                risk_status = zone.get_risk_status()
                 
-                st.markdown(f"""
-                    <div style="background: {flood_color}22; padding: 1rem; border-radius: 8px; border: 2px solid {flood_color};">
-                        <div style="font-size: 0.85rem; color: #666;">Risque Inondation</div>
-                        <div style="font-size: 1.5rem; font-weight: bold; color: {flood_color};">
-                            {risk_status['flood'].upper()}
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
-            
-            with risk_col2:
-                drought_color = {
-                    'low': '#28a745',
-                    'moderate': '#ffc107',
-                    'high': '#fd7e14',
-                    'critical': '#dc3545'
-                }.get(risk_status['drought'], '#6c757d')
+                # Déterminer couleur de bordure
+                border_color = '#dc3545' if risk_status['overall'] == 'critical' else '#fd7e14'
                 
                 st.markdown(f"""
-                    <div style="background: {drought_color}22; padding: 1rem; border-radius: 8px; border: 2px solid {drought_color};">
-                        <div style="font-size: 0.85rem; color: #666;">Risque Sécheresse</div>
-                        <div style="font-size: 1.5rem; font-weight: bold; color: {drought_color};">
-                            {risk_status['drought'].upper()}
+                    <div class="zone-card" style="border-left: 4px solid {border_color};">
+                        <div class="zone-title">{zone.zone_name}</div>
+                        <div class="zone-meta">
+                            📍 {zone.zone_type.value.replace('_', ' ').title()} • 
+                            👥 {zone.population:,} habitants • 
+                            📏 {zone.area_km2:,.0f} km²
                         </div>
                     </div>
                 """, unsafe_allow_html=True)
-            
-            with risk_col3:
-                overall_color = {
-                    'low': '#28a745',
-                    'moderate': '#ffc107',
-                    'high': '#fd7e14',
-                    'critical': '#dc3545'
-                }.get(risk_status['overall'], '#6c757d')
                 
-                st.markdown(f"""
-                    <div style="background: {overall_color}22; padding: 1rem; border-radius: 8px; border: 2px solid {overall_color};">
-                        <div style="font-size: 0.85rem; color: #666;">Risque Global</div>
-                        <div style="font-size: 1.5rem; font-weight: bold; color: {overall_color};">
-                            {risk_status['overall'].upper()}
+                # Détails risques (couleurs résolues une fois pour les 3 colonnes)
+                flood_color, drought_color, overall_color = (
+                    RISK_STATUS_COLORS.get(risk_status[k], '#6c757d')
+                    for k in ('flood', 'drought', 'overall')
+                )
+                
+                risk_col1, risk_col2, risk_col3 = st.columns(3)
+                
+                with risk_col1:
+                    st.markdown(f"""
+                        <div style="background: {flood_color}22; padding: 1rem; border-radius: 8px; border: 2px solid {flood_color};">
+                            <div style="font-size: 0.85rem; color: #666;">Risque Inondation</div>
+                            <div style="font-size: 1.5rem; font-weight: bold; color: {flood_color};">
+                                {risk_status['flood'].upper()}
+                            </div>
                         </div>
-                    </div>
-                """, unsafe_allow_html=True)
-            
-            # Alertes actives
-            active_alerts = [a for a in zone.active_alerts if a.is_active()]
-            
-            if active_alerts:
-                st.markdown("**🔔 Alertes Actives :**")
+                    """, unsafe_allow_html=True)
                 
-                for alert in active_alerts:
-                    alert_icon = '🌊' if alert.alert_type == 'flood' else '🌵' if alert.alert_type == 'drought' else '⚠️'
-                    
-                    alert_color = {
-                        'yellow': '#ffc107',
-                        'orange': '#fd7e14',
-                        'red': '#dc3545',
-                        'extreme': '#721c24'
-                    }.get(alert.level, '#6c757d')
-                    
+                with risk_col2:
                     st.markdown(f"""
-                        <div style="background: {alert_color}22; padding: 0.8rem; border-radius: 6px; border-left: 3px solid {alert_color}; margin-bottom: 0.5rem;">
-                            <div style="font-weight: 600; color: {alert_color};">
-                                {alert_icon} {alert.description}
+                        <div style="background: {drought_color}22; padding: 1rem; border-radius: 8px; border: 2px solid {drought_color};">
+                            <div style="font-size: 0.85rem; color: #666;">Risque Sécheresse</div>
+                            <div style="font-size: 1.5rem; font-weight: bold; color: {drought_color};">
+                                {risk_status['drought'].upper()}
                             </div>
-                            <div style="font-size: 0.85rem; color: #666; margin-top: 0.3rem;">
-                                ⏱️ Expire dans {alert.time_remaining()}
+                        </div>
+                    """, unsafe_allow_html=True)
+                
+                with risk_col3:
+                    st.markdown(f"""
+                        <div style="background: {overall_color}22; padding: 1rem; border-radius: 8px; border: 2px solid {overall_color};">
+                            <div style="font-size: 0.85rem; color: #666;">Risque Global</div>
+                            <div style="font-size: 1.5rem; font-weight: bold; color: {overall_color};">
+                                {risk_status['overall'].upper()}
                             </div>
                         </div>
                     """, unsafe_allow_html=True)
-            
-            # Bouton voir détails
-            if st.button(f"📄 Voir fiche détaillée", key=f"detail_{zone.zone_id}"):
-                st.session_state['selected_zone_id'] = zone.zone_id
+                
+                # Alertes actives
+                active_alerts = [a for a in zone.active_alerts if a.is_active()]
+                
+                if active_alerts:
+                    st.markdown("**🔔 Alertes Actives :**")
+                
+                    for alert in active_alerts:
+                        alert_icon = '🌊' if alert.alert_type == 'flood' else '🌵' if alert.alert_type == 'drought' else '⚠️'
+                    
+                        alert_color = ALERT_LEVEL_COLORS.get(alert.level, '#6c757d')
+                    
+                        st.markdown(f"""
+                            <div style="background: {alert_color}22; padding: 0.8rem; border-radius: 6px; border-left: 3px solid {alert_color}; margin-bottom: 0.5rem;">
+                                <div style="font-weight: 600; color: {alert_color};">
+                                    {alert_icon} {alert.description}
+                                </div>
+                                <div style="font-size: 0.85rem; color: #666; margin-top: 0.3rem;">
+                                    ⏱️ Expire dans {alert.time_remaining()}
+                                </div>
+                            </div>
+                        """, unsafe_allow_html=True)
+                
+                # Bouton voir détails
+                if st.button(f"📄 Voir fiche détaillée", key=f"detail_{zone.zone_id}"):
+                    st.session_state['selected_zone_id'] = zone.zone_id
+                    st.rerun()
+                
+                st.markdown("---")
+        
+        if shown < len(critical_zones_list):
+            remaining = len(critical_zones_list) - shown
+            if st.button(f"⬇️ Afficher {min(page_size, remaining)} zone(s) de plus ({remaining} restante(s))", key="critical_load_more"):
+                st.session_state['critical_shown'] = shown + page_size
                 st.rerun()
-            
-            st.markdown("---")
     
     else:
         st.success("✅ Aucune zone en situation critique actuellement")
@@ -1331,7 +1494,7 @@ with tab2:
 # TAB 3: ANALYSES DÉTAILLÉES
 # ========================================
 
-with tab3:
+if active_tab == TAB_ANALYSIS:
     st.markdown("### 📊 Analyses Détaillées par Zone")
     
     # Sélection zone
@@ -1382,12 +1545,7 @@ with tab3:
             
             with assess_col1:
                 flood_level = risk_status['flood']
-                flood_color = {
-                    'low': '#28a745',
-                    'moderate': '#ffc107',
-                    'high': '#fd7e14',
-                    'critical': '#dc3545'
-                }.get(flood_level, '#6c757d')
+                flood_color = RISK_STATUS_COLORS.get(flood_level, '#6c757d')
                 
                 st.markdown(f"""
                     <div style="background: white; padding: 1.5rem; border-radius: 12px; border: 3px solid {flood_color}; text-align: center;">
@@ -1401,12 +1559,7 @@ with tab3:
             
             with assess_col2:
                 drought_level = risk_status['drought']
-                drought_color = {
-                    'low': '#28a745',
-                    'moderate': '#ffc107',
-                    'high': '#fd7e14',
-                    'critical': '#dc3545'
-                }.get(drought_level, '#6c757d')
+                drought_color = RISK_STATUS_COLORS.get(drought_level, '#6c757d')
                 
                 st.markdown(f"""
                     <div style="background: white; padding: 1.5rem; border-radius: 12px; border: 3px solid {drought_color}; text-align: center;">
@@ -1420,12 +1573,7 @@ with tab3:
             
             with assess_col3:
                 overall_level = risk_status['overall']
-                overall_color = {
-                    'low': '#28a745',
-                    'moderate': '#ffc107',
-                    'high': '#fd7e14',
-                    'critical': '#dc3545'
-                }.get(overall_level, '#6c757d')
+                overall_color = RISK_STATUS_COLORS.get(overall_level, '#6c757d')
                 
                 st.markdown(f"""
                     <div style="background: white; padding: 1.5rem; border-radius: 12px; border: 3px solid {overall_color}; text-align: center;">
@@ -1544,7 +1692,7 @@ with tab3:
 # TAB 4: STATISTIQUES & TENDANCES
 # ========================================
 
-with tab4:
+if active_tab == TAB_STATS:
     st.markdown("### 📈 Statistiques Globales et Tendances")
     
     # Statistiques générales
@@ -1579,15 +1727,26 @@ with tab4:
         ))
     
     with stat_col3:
-        total_pop = sum(
-            zone.population or 0
-            for zone in zone_provider.zones.values()
-        )
+        # Populations matérialisées une fois en tableau NumPy (recalculé
+        # seulement si le nombre de zones change)
+        pop_index = st.session_state.get('zone_pop_index')
+        
+        if pop_index is None or pop_index[0] != len(zone_provider.zones):
+            zone_pos = {zone_id: i for i, zone_id in enumerate(zone_provider.zones)}
+            pop_arr = np.fromiter(
+                (zone.population or 0 for zone in zone_provider.zones.values()),
+                dtype=np.int64,
+                count=len(zone_pos)
+            )
+            pop_index = (len(zone_pos), zone_pos, pop_arr)
+            st.session_state['zone_pop_index'] = pop_index
         
-        critical_pop = sum(
-            zone.population or 0
-            for zone in zones_critiques
-        )
+        _, zone_pos, pop_arr = pop_index
+        
+        total_pop = int(pop_arr.sum())
+        
+        critical_idx = [zone_pos[zone.zone_id] for zone in zones_critiques if zone.zone_id in zone_pos]
+        critical_pop = int(pop_arr[critical_idx].sum())
         
         st.markdown("""
             **👥 Impact Population**
@@ -1607,27 +1766,8 @@ with tab4:
     st.markdown("#### 📊 Répartition des Risques")
     
     if stats['by_type']:
-        # Graphique en barres
-        risk_types_labels = list(stats['by_type'].keys())
-        risk_counts = list(stats['by_type'].values())
-        
-        fig_risk_types = go.Figure(data=[
-            go.Bar(
-                x=risk_types_labels,
-                y=risk_counts,
-                marker_color=['#2196F3', '#ffc107', '#f44336', '#9c27b0', '#00bcd4'][:len(risk_types_labels)],
-                text=risk_counts,
-                textposition='auto'
-            )
-        ])
-        
-        fig_risk_types.update_layout(
-            title="Nombre de Couches par Type de Risque",
-            xaxis_title="Type de Risque",
-            yaxis_title="Nombre de Couches",
-            height=400,
-            template='plotly_white'
-        )
+        # Graphique en barres (mis en cache par contenu des statistiques)
+        fig_risk_types = build_risk_types_figure(tuple(stats['by_type'].items()))
         
         st.plotly_chart(fig_risk_types, use_container_width=True)
     
@@ -1635,33 +1775,7 @@ with tab4:
     st.markdown("#### 🎯 Répartition par Niveau de Risque")
     
     if stats['by_level']:
-        level_labels = list(stats['by_level'].keys())
-        level_counts = list(stats['by_level'].values())
-        
-        # Couleurs selon niveau
-        level_colors = {
-            'low': '#28a745',
-            'moderate': '#ffc107',
-            'high': '#fd7e14',
-            'critical': '#dc3545',
-            'extreme': '#721c24'
-        }
-        
-        colors = [level_colors.get(level, '#6c757d') for level in level_labels]
-        
-        fig_levels = go.Figure(data=[
-            go.Pie(
-                labels=[l.upper() for l in level_labels],
-                values=level_counts,
-                marker=dict(colors=colors),
-                hole=0.4
-            )
-        ])
-        
-        fig_levels.update_layout(
-            title="Distribution des Niveaux de Risque",
-            height=400
-        )
+        fig_levels = build_risk_levels_figure(tuple(stats['by_level'].items()))
         
         st.plotly_chart(fig_levels, use_container_width=True)
 
@@ -1,12 +1,16 @@
+import hashlib
+
 import streamlit as st
 import pandas as pd
+import branca.colormap
 import folium
 from streamlit_folium import st_folium
 from datetime import date
 
 from core.auth import is_logged_in
 from core.ui import approval_gate
-from core.supabase_client import supabase_user
+from core.supabase_client import supabase_user_cached
+from core.module2.utils import simplify_geometry
 
 SOURCE = "open-meteo-dynamic-v2"
 
@@ -23,26 +27,49 @@ valid_date = st.date_input("valid_date", value=date.today()).isoformat()
 risk = st.selectbox("Risque", ["inondation", "secheresse"])
 indicator_code = "SCORE_INONDATION" if risk == "inondation" else "SCORE_SECHERESSE"
 
-u = supabase_user(st.session_state["access_token"])
-
-scores = (
-    u.table("risk_indicators")
-    .select("admin_code,value")
-    .eq("valid_date", valid_date)
-    .eq("risk", risk)
-    .eq("indicator_code", indicator_code)
-    .eq("source", SOURCE)
-    .execute()
-)
-df_scores = pd.DataFrame(scores.data or [])
+
+# Lectures soumises à RLS : le cache est cloisonné par utilisateur via
+# `user_key` (empreinte du jeton), le jeton lui-même n'est pas haché ("_")
+def user_cache_key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_admin_geojson(user_key: str, _access_token: str) -> list:
+    """Géométries des unités administratives (quasi statiques), parsées et simplifiées pour l'affichage"""
+    u = supabase_user_cached(_access_token)
+    rows = u.table("v_admin_units_geojson").select("code,name,geojson").execute().data or []
+    for row in rows:
+        row["geojson"] = simplify_geometry(row.get("geojson"))
+    return rows
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_scores(user_key: str, _access_token: str, valid_date: str, risk: str, indicator_code: str) -> list:
+    """Scores V2 d'un risque pour une date"""
+    u = supabase_user_cached(_access_token)
+    return (
+        u.table("risk_indicators")
+        .select("admin_code,value")
+        .eq("valid_date", valid_date)
+        .eq("risk", risk)
+        .eq("indicator_code", indicator_code)
+        .eq("source", SOURCE)
+        .execute()
+    ).data or []
+
+
+access_token = st.session_state["access_token"]
+user_key = user_cache_key(access_token)
+
+df_scores = pd.DataFrame(load_scores(user_key, access_token, valid_date, risk, indicator_code))
 if df_scores.empty:
     st.info("Aucun score disponible. Lance le pipeline V2.")
     st.stop()
 
 df_scores["value"] = pd.to_numeric(df_scores["value"], errors="coerce").fillna(0)
 
-geo = u.table("v_admin_units_geojson").select("code,name,geojson").execute()
-df_geo = pd.DataFrame(geo.data or [])
+df_geo = pd.DataFrame(load_admin_geojson(user_key, access_token))
 if df_geo.empty:
     st.error("Géométries absentes. Vérifie ref_admin_units.geom et la view v_admin_units_geojson.")
     st.stop()
@@ -52,32 +79,37 @@ if df.empty:
     st.warning("Aucune jointure admin_code ↔ ref_admin_units.code. Vérifie la cohérence des codes.")
     st.stop()
 
+df["value"] = df["value"].astype(float)
+
 fc = {
     "type": "FeatureCollection",
     "features": [
         {
             "type": "Feature",
-            "properties": {"code": r["code"], "name": r["name"], "score": float(r["value"])},
+            "properties": {"code": r["code"], "name": r["name"], "score": r["value"]},
             "geometry": r["geojson"],
         }
-        for _, r in df.iterrows()
+        for r in df[["code", "name", "geojson", "value"]].to_dict("records")
     ],
 }
 
 m = folium.Map(location=[6.5, 12.5], zoom_start=6, tiles="cartodbpositron")
 
-folium.Choropleth(
-    geo_data=fc,
-    data=df,
-    columns=["code", "value"],
-    key_on="feature.properties.code",
-    fill_opacity=0.75,
-    line_opacity=0.2,
-    legend_name=f"{indicator_code} — {valid_date}",
-).add_to(m)
+# Une seule couche GeoJson (couleur + infobulle) : la FeatureCollection
+# n'est sérialisée et rendue qu'une fois dans le navigateur
+vmin, vmax = float(df["value"].min()), float(df["value"].max())
+colormap = branca.colormap.linear.YlOrRd_09.scale(vmin, vmax if vmax > vmin else vmin + 1.0)
+colormap.caption = f"{indicator_code} — {valid_date}"
 
 folium.GeoJson(
     fc,
+    style_function=lambda f: {
+        "fillColor": colormap(f["properties"]["score"]),
+        "fillOpacity": 0.75,
+        "color": "#000000",
+        "weight": 1,
+        "opacity": 0.2,
+    },
     tooltip=folium.GeoJsonTooltip(
         fields=["name", "code", "score"],
         aliases=["Territoire", "Code", "Score"],
@@ -85,4 +117,6 @@ folium.GeoJson(
     ),
 ).add_to(m)
 
+colormap.add_to(m)
+
 st_folium(m, height=650, width=None)
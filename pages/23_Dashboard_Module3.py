@@ -23,19 +23,31 @@ Notes:
 
 from __future__ import annotations
 
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import os
+import string
+import threading
+import time
 import uuid
 
+import numpy as np
 import pandas as pd
 import requests
 import streamlit as st
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Plotly importé à l'usage (plot_forecast) : un utilisateur non connecté ou
+# non approuvé ne paie pas son import au démarrage de la page
+if TYPE_CHECKING:  # pragma: no cover
+    import plotly.graph_objects as go
 
 from core.ui import approval_gate
-from core.supabase_client import supabase_user
+from core.supabase_client import supabase_user_cached
+from core.alert_levels import LEVEL_FROM_CODE, compute_levels_batch
 
 APP_TZ = "Africa/Douala"
 
@@ -61,6 +73,33 @@ try:
 except Exception:  # pragma: no cover
     fetch_daily_forecast = None  # type: ignore
 
+# Session HTTP keep-alive partagée (core si dispo)
+try:
+    from core.open_meteo import http_session  # type: ignore
+except Exception:  # pragma: no cover
+    _HTTP = requests.Session()
+
+    def http_session() -> requests.Session:  # type: ignore
+        return _HTTP
+
+# Cache disque des réponses Open-Meteo (core si dispo, sinon appel direct)
+try:
+    from core.open_meteo import FORECAST_DISK_TTL, LONG_RANGE_DISK_TTL, get_json_cached  # type: ignore
+except Exception:  # pragma: no cover
+    FORECAST_DISK_TTL = LONG_RANGE_DISK_TTL = 0
+
+    def get_json_cached(url: str, params: Dict[str, Any], timeout: Any, ttl: int, context: Optional[str] = None) -> dict:  # type: ignore
+        r = http_session().get(url, params=params, timeout=timeout)
+        r.raise_for_status()
+        return r.json()
+
+# Optionnel: dtypes Arrow pour les tableaux affichés (pandas sinon)
+try:
+    import pyarrow  # type: ignore  # noqa: F401
+    PYARROW_AVAILABLE = True
+except Exception:  # pragma: no cover
+    PYARROW_AVAILABLE = False
+
 # Optionnel: Climate wrapper si vous avez patché core/open_meteo.py
 try:
     from core.open_meteo import fetch_climate_daily as core_fetch_climate_daily  # type: ignore
@@ -80,8 +119,11 @@ st.set_page_config(
 # -----------------------------
 # Styles (moderne)
 # -----------------------------
-st.markdown(
-    """
+# Feuille unique, constante de module : les gabarits HTML de la page ne
+# portent que des classes (aucun attribut style répété par carte).
+# Elle est réémise à chaque rerun : Streamlit retire du DOM tout élément
+# non redessiné, un drapeau "déjà injectée" ferait disparaître les styles.
+PAGE_CSS = """
     <style>
       @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;800&display=swap');
       * { font-family: 'Inter', sans-serif; }
@@ -97,16 +139,21 @@ st.markdown(
       .module-title { font-size: 2.05rem; font-weight: 800; margin-bottom: .35rem; }
       .module-subtitle { font-size: 1.0rem; opacity: .95; }
 
-      .metric-box {
+      /* KPI : st.metric natifs, style appliqué via la clé du conteneur */
+      .st-key-m3_kpis div[data-testid="stMetric"] {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
         padding: 1.05rem;
         border-radius: 14px;
-        color: white;
         text-align: center;
         box-shadow: 0 6px 18px rgba(0,0,0,0.12);
       }
-      .metric-value { font-size: 2.0rem; font-weight: 800; margin: .30rem 0; }
-      .metric-label { font-size: .9rem; opacity: .9; }
+      .st-key-m3_kpis div[data-testid="stMetric"] * { color: white; justify-content: center; }
+      .st-key-m3_kpis div[data-testid="stMetricValue"] { font-size: 2.0rem; font-weight: 800; }
+      .st-key-m3_kpis div[data-testid="stColumn"]:nth-child(2) div[data-testid="stMetric"] { background: linear-gradient(135deg, #fa709a 0%, #fee140 100%); }
+      .st-key-m3_kpis div[data-testid="stColumn"]:nth-child(3) div[data-testid="stMetric"] { background: linear-gradient(135deg, #30cfd0 0%, #330867 100%); }
+      .st-key-m3_kpis div[data-testid="stColumn"]:nth-child(4) div[data-testid="stMetric"] { background: linear-gradient(135deg, #43e97b 0%, #38f9d7 100%); }
+      .st-key-m3_kpis div[data-testid="stColumn"]:nth-child(5) div[data-testid="stMetric"] { background: linear-gradient(135deg, #a8edea 0%, #fed6e3 100%); }
+      .st-key-m3_kpis div[data-testid="stColumn"]:nth-child(5) div[data-testid="stMetric"] * { color: #333; }
 
       .soft {
         background: #f8f9fa;
@@ -148,10 +195,15 @@ st.markdown(
       .pill.orange { background: #ffe5d0; color: #7a3b00; }
       .pill.yellow { background: #fff3cd; color: #856404; }
       .pill.green { background: #d4edda; color: #155724; }
+
+      .card-head { display: flex; justify-content: space-between; gap: 12px; align-items: flex-start; }
+      .card-title { font-weight: 800; font-size: 1.1rem; }
+      .card-sub { opacity: .8; margin-top: .2rem; }
+      .card-body { margin-top: .7rem; line-height: 1.6; }
+      .muted { opacity: .75; }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+    """
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
 # -----------------------------
 # Guards
@@ -187,32 +239,89 @@ with c_back:
 # Supabase helpers (tolérant)
 # -----------------------------
 def supa():
-    return supabase_user(st.session_state["access_token"])
+    # Client mis en cache par jeton (st.cache_resource) : un seul pool HTTP
+    # pour tous les helpers safe_* d'un même rendu
+    return supabase_user_cached(st.session_state["access_token"])
 
 
-def safe_table_exists(table_name: str) -> bool:
+def user_cache_key() -> str:
+    # Empreinte du jeton : cloisonne par utilisateur les caches de lectures RLS
+    return hashlib.sha256(st.session_state["access_token"].encode("utf-8")).hexdigest()
+
+
+def _probe_table(client: Any, table_name: str) -> bool:
     try:
-        _ = supa().table(table_name).select("*").limit(1).execute()
+        # limit(0) : la requête valide la table sans renvoyer de ligne
+        _ = client.table(table_name).select("*").limit(0).execute()
         return True
     except Exception:
         return False
 
 
-def safe_select(
-    table: str, order: Optional[Tuple[str, bool]] = None, limit: int = 200
-) -> List[Dict[str, Any]]:
-    try:
-        q = supa().table(table).select("*")
-        if order:
-            col, desc = order
-            q = q.order(col, desc=desc)
-        res = q.limit(limit).execute()
-        return res.data or []
-    except Exception:
-        return []
+# Sondes en parallèle (1 RTT au lieu de 4). Un échec peut n'être qu'une erreur
+# réseau passagère : résultat brut gardé 60 s seulement.
+@st.cache_resource(ttl=60, show_spinner=False)
+def _probe_tables(tables: Tuple[str, ...]) -> Dict[str, bool]:
+    client = supa()
+    with ThreadPoolExecutor(max_workers=len(tables), thread_name_prefix="m3-probe") as ex:
+        return dict(zip(tables, ex.map(lambda t: _probe_table(client, t), tables)))
+
+
+class _TablesMissing(Exception):
+    pass
+
+
+# Le schéma ne change pas entre deux déploiements : seul un résultat positif
+# complet est conservé une heure (une exception n'est jamais mise en cache).
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _tables_all_present(tables: Tuple[str, ...]) -> Dict[str, bool]:
+    found = _probe_tables(tables)
+    if not all(found.values()):
+        raise _TablesMissing()
+    return found
 
 
-def safe_insert(table: str, payload: Dict[str, Any]) -> bool:
+def tables_exist(tables: Tuple[str, ...]) -> Dict[str, bool]:
+    try:
+        return _tables_all_present(tables)
+    except _TablesMissing:
+        return _probe_tables(tables)
+
+
+# Lectures des tables de suivi (destinataires, ACK) : TTL court, cloisonné par
+# utilisateur (RLS) via `user_key`, invalidé explicitement après chaque écriture
+# réussie. Les erreurs sont levées (jamais mises en cache) et interceptées par
+# session_rows.
+@st.cache_data(ttl=30, show_spinner=False)
+def select_cached(
+    user_key: str, table: str, order: Optional[Tuple[str, bool]] = None, limit: int = 200
+) -> List[Dict[str, Any]]:
+    q = supa().table(table).select("*")
+    if order:
+        col, desc = order
+        q = q.order(col, desc=desc)
+    return q.limit(limit).execute().data or []
+
+
+# Projection sur une seule colonne, paginée par .range() : évite de
+# rapatrier des lignes complètes quand seuls des identifiants sont utiles.
+# Au plus max_pages pages ; une page en échec lève (pas de liste tronquée en cache).
+@st.cache_data(ttl=30, show_spinner=False)
+def select_column_cached(
+    user_key: str, table: str, column: str, page_size: int = 1000, max_pages: int = 2
+) -> List[Any]:
+    values: List[Any] = []
+    for page in range(max_pages):
+        start = page * page_size
+        batch = supa().table(table).select(column).range(start, start + page_size - 1).execute().data or []
+        values.extend(row.get(column) for row in batch)
+        if len(batch) < page_size:
+            break
+    return values
+
+
+def safe_insert(table: str, payload: Dict[str, Any] | List[Dict[str, Any]]) -> bool:
+    """Insertion tolérante ; une liste = insertion multi-lignes (une seule requête)."""
     try:
         _ = supa().table(table).insert(payload).execute()
         return True
@@ -227,6 +336,45 @@ ALERT_LEVELS = ["green", "yellow", "orange", "red"]
 LEVEL_LABEL = {"green": "VERT", "yellow": "JAUNE", "orange": "ORANGE", "red": "ROUGE"}
 RISK_TYPES = ["flood", "drought"]
 RISK_LABEL = {"flood": "Inondation", "drought": "Sécheresse"}
+LEVEL_EMOJI = {"green": "🟢", "yellow": "🟡", "orange": "🟠", "red": "🔴"}
+RISK_EMOJI = {"flood": "🌊", "drought": "🌵"}
+# Libellés d'affichage pré-calculés (format_func = simple lookup dict)
+RISK_DISPLAY = {k: f"{RISK_EMOJI[k]} {v}" for k, v in RISK_LABEL.items()}
+LEVEL_DISPLAY = {k: f"{LEVEL_EMOJI[k]} {v}" for k, v in LEVEL_LABEL.items()}
+# Libellé de niveau tel qu'affiché sur les badges (majuscules, déjà prêt)
+LEVEL_BADGE = {k: v.upper() for k, v in LEVEL_LABEL.items()}
+
+# Carte d'alerte (onglet "Alertes") : gabarit unique, sans indentation
+# pour que le bloc concaténé ne soit pas interprété comme du code Markdown
+ALERT_CARD_TPL = (
+    '<div class="alert-card {level}">'
+    '<div class="card-head">'
+    '<div>'
+    '<div class="card-title">{icon} {risk_lbl} — {zone}</div>'
+    '<div class="card-sub">Région: <b>{region}</b></div>'
+    '</div>'
+    '<div class="pill {level}">{level_lbl}</div>'
+    '</div>'
+    '<div class="card-body">'
+    '<div><b>Signal :</b> {summary}</div>'
+    '<div><b>Émise :</b> {issued_at} • <b>Expire :</b> {expires_at}</div>'
+    '</div>'
+    '</div>'
+)
+
+# Carte de diagnostic (onglet "Détection") : même structure, sans dates
+DETECTION_CARD_TPL = (
+    '<div class="alert-card {level}">'
+    '<div class="card-head">'
+    '<div>'
+    '<div class="card-title">{icon} {risk_lbl} — {zone}</div>'
+    '<div class="card-sub">Région: <b>{region}</b> • Horizon: <b>{horizon}</b></div>'
+    '</div>'
+    '<div class="pill {level}">{level_lbl}</div>'
+    '</div>'
+    '<div class="card-body"><div><b>Signal :</b> {summary}</div></div>'
+    '</div>'
+)
 
 SEVERITY_FROM_LEVEL = {"green": 1, "yellow": 2, "orange": 3, "red": 4}
 LEVEL_FROM_SEVERITY = {1: "green", 2: "yellow", 3: "orange", 4: "red"}
@@ -236,6 +384,27 @@ def now() -> datetime:
     return datetime.now()
 
 
+def new_ids(n: int) -> List[str]:
+    """
+    n identifiants UUIDv7 (RFC 9562) : horodatage ms sur 48 bits en tête, donc
+    insertions quasi séquentielles dans les index B-tree (colonne uuid inchangée).
+    Aléa tiré d'un seul appel os.urandom ; dans un lot, les 12 bits rand_a
+    portent un compteur pour conserver l'ordre de création.
+    """
+    ms = time.time_ns() // 1_000_000
+    raw = os.urandom(8 * n)
+    ids: List[str] = []
+    for i in range(n):
+        rand_b = int.from_bytes(raw[8 * i:8 * i + 8], "big") & ((1 << 62) - 1)
+        value = ((ms + (i >> 12)) << 80) | (0x7 << 76) | ((i & 0xFFF) << 64) | (0b10 << 62) | rand_b
+        ids.append(str(uuid.UUID(int=value)))
+    return ids
+
+
+def new_id() -> str:
+    return new_ids(1)[0]
+
+
 def default_rules() -> Dict[str, Any]:
     return {
         "flood": {"yellow": 50.0, "orange": 80.0, "red": 120.0},
@@ -266,19 +435,28 @@ def get_user_location() -> Dict[str, Any]:
     return loc
 
 
-@st.cache_data(ttl=300)
+# Référentiel quasi statique : une lecture par utilisateur (RLS) et par heure
+# (cache_resource, pas de sérialisation à chaque rerun). Le DataFrame est
+# partagé entre les reruns : lecture seule.
+@st.cache_resource(ttl=3600, max_entries=64, show_spinner=False)
+def _stations_raw(user_key: str) -> pd.DataFrame:
+    res = supa().table("mnocc_stations").select("*").order("region").order("localite").execute()
+    df = pd.DataFrame(res.data or [])
+    if df.empty:
+        return df
+    df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce").astype(np.float32)
+    df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce").astype(np.float32)
+    if "id" in df.columns:
+        df["id"] = df["id"].astype(str)
+    df = df.dropna(subset=["id", "localite", "latitude", "longitude"])
+    # Indexé par id : la localité choisie se lit par .loc, sans dictionnaire miroir
+    return df.set_index("id")
+
+
 def get_stations() -> pd.DataFrame:
+    # Une erreur lève dans _stations_raw => rien n'est mis en cache
     try:
-        res = supa().table("mnocc_stations").select("*").order("region").order("localite").execute()
-        df = pd.DataFrame(res.data or [])
-        if df.empty:
-            return df
-        df["latitude"] = pd.to_numeric(df["latitude"], errors="coerce")
-        df["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
-        if "id" in df.columns:
-            df["id"] = df["id"].astype(str)
-        df = df.dropna(subset=["id", "localite", "latitude", "longitude"])
-        return df
+        return _stations_raw(user_cache_key())
     except Exception:
         return pd.DataFrame()
 
@@ -314,9 +492,7 @@ def fetch_forecast_daily(lat: float, lon: float, days: int) -> Dict[str, Any]:
         "precipitation_unit": "mm",
         "timeformat": "iso8601",
     }
-    r = requests.get(FORECAST_API, params=params, timeout=20)
-    r.raise_for_status()
-    return r.json()
+    return get_json_cached(FORECAST_API, params, timeout=(5, 20), ttl=FORECAST_DISK_TTL)
 
 
 @st.cache_data(ttl=900)
@@ -337,9 +513,7 @@ def fetch_seasonal_daily(lat: float, lon: float, days: int) -> Dict[str, Any]:
         "precipitation_unit": "mm",
         "timeformat": "iso8601",
     }
-    r = requests.get(SEASONAL_API, params=params, timeout=30)
-    r.raise_for_status()
-    return r.json()
+    return get_json_cached(SEASONAL_API, params, timeout=(5, 30), ttl=LONG_RANGE_DISK_TTL)
 
 
 @st.cache_data(ttl=900)
@@ -356,9 +530,7 @@ def fetch_climate_daily(lat: float, lon: float, start_date: str, end_date: str,
         "precipitation_unit": "mm",
         "timeformat": "iso8601",
     }
-    r = requests.get(CLIMATE_API, params=params, timeout=40)
-    r.raise_for_status()
-    return r.json()
+    return get_json_cached(CLIMATE_API, params, timeout=(5, 40), ttl=LONG_RANGE_DISK_TTL)
 
 
 def _http_error_details(e: Exception) -> str:
@@ -373,109 +545,164 @@ def _http_error_details(e: Exception) -> str:
     return f"{type(e).__name__}: {e}"
 
 
-def fetch_daily_any(lat: float, lon: float, days: int, kind: str) -> Tuple[Dict[str, Any], str]:
+FORECAST_MAX_DAYS_DIRECT = 16
+
+
+class DailyCandidate(NamedTuple):
     """
-    Priorité:
-    - core (si dispo et compatible)
-    - sinon direct: forecast / seasonal / climate selon kind
-    Fallbacks:
-    - seasonal -> climate -> forecast(16)
-    - climate  -> forecast(16)
+    Source candidate, par ordre de priorité. Un palier regroupe des sources
+    équivalentes (core / direct d'une même API) ; les paliers suivants sont
+    des replis de moindre qualité (horizon réduit).
     """
+    tier: int
+    label: str
+    call: Callable[[], Dict[str, Any]]
+
+
+class HorizonRequest(NamedTuple):
+    """Paramètres normalisés une seule fois par appel de fetch_daily_any."""
+    days: int
+    forecast_days: int  # borné à la limite Forecast API
+    start: date
+    end: date
+
+
+def _horizon_request(days: int) -> HorizonRequest:
+    d = int(days)
+    s = date.today()
+    return HorizonRequest(d, min(d, FORECAST_MAX_DAYS_DIRECT), s, s + timedelta(days=d))
+
+
+# Délai avant de lancer le candidat suivant en parallèle (requête "hedgée")
+HEDGE_DELAY_S = 2.0
+
+
+def _daily_candidates(lat: float, lon: float, h: HorizonRequest, kind: str) -> List[DailyCandidate]:
+    climate: List[DailyCandidate] = []
+    if core_fetch_climate_daily is not None:
+        climate.append(DailyCandidate(0, "core.open_meteo (climate)", lambda: core_fetch_climate_daily(lat, lon, h.start, h.end, model="MRI_AGCM3_2_S")))  # type: ignore
+    climate.append(DailyCandidate(0, "climate_direct", lambda: fetch_climate_daily(lat, lon, h.start.isoformat(), h.end.isoformat(), "MRI_AGCM3_2_S")))
+
+    forecast: List[DailyCandidate] = []
+    if fetch_daily_forecast is not None:
+        forecast.append(DailyCandidate(0, "core.open_meteo (forecast)", lambda: fetch_daily_forecast(lat, lon, h.forecast_days, seasonal=False)))  # type: ignore
+    forecast.append(DailyCandidate(0, "forecast_direct", lambda: fetch_forecast_daily(lat, lon, h.forecast_days)))
 
-    # 1) core prioritaire
     if kind == "forecast":
-        if fetch_daily_forecast is not None:
-            try:
-                raw = fetch_daily_forecast(lat, lon, min(int(days), 16), seasonal=False)  # type: ignore
-                return raw, "core.open_meteo (forecast)"
-            except Exception as e:
-                try:
-                    raw = fetch_forecast_daily(lat, lon, min(int(days), 16))
-                    return raw, f"forecast_fallback (core err: {_http_error_details(e)})"
-                except Exception as e2:
-                    return {}, f"forecast_failed ({_http_error_details(e2)})"
-        raw = fetch_forecast_daily(lat, lon, min(int(days), 16))
-        return raw, "forecast_direct"
+        return forecast
+
+    forecast_fallback = DailyCandidate(9, "forecast_fallback", forecast[-1].call)
 
     if kind == "seasonal":
-        # core seasonal si dispo
+        seasonal: List[DailyCandidate] = []
         if fetch_daily_forecast is not None:
-            try:
-                raw = fetch_daily_forecast(lat, lon, int(days), seasonal=True)  # type: ignore
-                return raw, "core.open_meteo (seasonal)"
-            except Exception as e:
-                # fallback direct seasonal
-                try:
-                    raw = fetch_seasonal_daily(lat, lon, int(days))
-                    return raw, f"seasonal_direct (core err: {_http_error_details(e)})"
-                except Exception as e2:
-                    # fallback climate
-                    try:
-                        s = date.today()
-                        e3 = s + timedelta(days=int(days))
-                        if core_fetch_climate_daily is not None:
-                            raw = core_fetch_climate_daily(lat, lon, s, e3, model="MRI_AGCM3_2_S")  # type: ignore
-                            return raw, f"core.open_meteo (climate fallback, seasonal failed: {_http_error_details(e2)})"
-                        raw = fetch_climate_daily(lat, lon, s.isoformat(), e3.isoformat(), "MRI_AGCM3_2_S")
-                        return raw, f"climate_fallback (seasonal failed: {_http_error_details(e2)})"
-                    except Exception as e3:
-                        raw = fetch_forecast_daily(lat, lon, 16)
-                        return raw, f"forecast_fallback (seasonal+climate failed: {_http_error_details(e3)})"
-
-        # pas de core => direct seasonal
-        try:
-            raw = fetch_seasonal_daily(lat, lon, int(days))
-            return raw, "seasonal_direct"
-        except Exception as e2:
-            # fallback climate
-            try:
-                s = date.today()
-                e3 = s + timedelta(days=int(days))
-                if core_fetch_climate_daily is not None:
-                    raw = core_fetch_climate_daily(lat, lon, s, e3, model="MRI_AGCM3_2_S")  # type: ignore
-                    return raw, f"core.open_meteo (climate fallback, seasonal failed: {_http_error_details(e2)})"
-                raw = fetch_climate_daily(lat, lon, s.isoformat(), e3.isoformat(), "MRI_AGCM3_2_S")
-                return raw, f"climate_fallback (seasonal failed: {_http_error_details(e2)})"
-            except Exception as e3:
-                raw = fetch_forecast_daily(lat, lon, 16)
-                return raw, f"forecast_fallback (seasonal+climate failed: {_http_error_details(e3)})"
+            seasonal.append(DailyCandidate(0, "core.open_meteo (seasonal)", lambda: fetch_daily_forecast(lat, lon, h.days, seasonal=True)))  # type: ignore
+        seasonal.append(DailyCandidate(0, "seasonal_direct", lambda: fetch_seasonal_daily(lat, lon, h.days)))
+        return seasonal + [c._replace(tier=1) for c in climate] + [forecast_fallback]
 
     # kind == "climate" (1 an)
-    s = date.today()
-    e2 = s + timedelta(days=int(days))
+    return climate + [forecast_fallback]
+
+
+def _hedged_first(candidates: List[DailyCandidate]) -> Tuple[Dict[str, Any], str]:
+    """
+    Requêtes "hedgées" : le candidat prioritaire part immédiatement, le suivant
+    après HEDGE_DELAY_S sans réponse (ou dès un échec). Le premier succès du
+    palier le plus prioritaire encore possible l'emporte ; les autres sont
+    abandonnés. Lève RuntimeError si tous les candidats échouent.
+    """
+    n = len(candidates)
+    tiers = sorted({c.tier for c in candidates})
+    futures: List[Optional[Future]] = [None] * n
+    errors: Dict[int, str] = {}
+    launched = 0
+    ex = ThreadPoolExecutor(max_workers=n, thread_name_prefix="m3-openmeteo")
+
+    # Les fetchers directs sont mis en cache (st.cache_data) : les threads
+    # de travail reçoivent le contexte du script courant
+    ctx = get_script_run_ctx()
+
+    def run_with_ctx(fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+
+    def launch_next() -> None:
+        nonlocal launched
+        if launched < n:
+            futures[launched] = ex.submit(run_with_ctx, candidates[launched].call)
+            launched += 1
+
+    try:
+        launch_next()
+        while True:
+            for i, f in enumerate(futures):
+                if f is not None and i not in errors and f.done() and f.exception() is not None:
+                    errors[i] = f"{candidates[i].label}: {_http_error_details(f.exception())}"
+                    launch_next()
+
+            for tier in tiers:
+                idx = [i for i, c in enumerate(candidates) if c.tier == tier]
+                # exception() revérifiée : un futur peut échouer entre les deux balayages
+                ok = [
+                    i for i in idx
+                    if futures[i] is not None and futures[i].done() and i not in errors
+                    and futures[i].exception() is None
+                ]
+                if ok:
+                    win = ok[0]
+                    prior = [errors[k] for k in sorted(errors) if k < win]
+                    label = candidates[win].label + (f" ({' | '.join(prior)})" if prior else "")
+                    return futures[win].result(), label
+                if any(i not in errors for i in idx):
+                    break  # palier encore en cours : on attend
+            else:
+                raise RuntimeError(" | ".join(errors[k] for k in sorted(errors)))
+
+            pending = [f for f in futures if f is not None and not f.done()]
+            if not pending:
+                launch_next()
+                continue
+            done, _ = wait(pending, timeout=HEDGE_DELAY_S if launched < n else None, return_when=FIRST_COMPLETED)
+            if not done:
+                launch_next()
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
 
-    if core_fetch_climate_daily is not None:
-        try:
-            raw = core_fetch_climate_daily(lat, lon, s, e2, model="MRI_AGCM3_2_S")  # type: ignore
-            return raw, "core.open_meteo (climate)"
-        except Exception as e:
-            try:
-                raw = fetch_climate_daily(lat, lon, s.isoformat(), e2.isoformat(), "MRI_AGCM3_2_S")
-                return raw, f"climate_direct (core err: {_http_error_details(e)})"
-            except Exception as e2:
-                raw = fetch_forecast_daily(lat, lon, 16)
-                return raw, f"forecast_fallback (climate failed: {_http_error_details(e2)})"
 
+@st.cache_data(ttl=900, show_spinner=False)
+def _fetch_daily_hedged(lat: float, lon: float, days: int, kind: str) -> Tuple[Dict[str, Any], str]:
+    return _hedged_first(_daily_candidates(lat, lon, _horizon_request(days), kind))
+
+
+def fetch_daily_any(lat: float, lon: float, days: int, kind: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Priorité:
+    - core (si dispo et compatible), direct de la même API en parallèle différé
+    Fallbacks:
+    - seasonal -> climate -> forecast(16)
+    - climate  -> forecast(16)
+    Résultat mis en cache 15 min (les échecs ne sont pas mis en cache).
+    """
     try:
-        raw = fetch_climate_daily(lat, lon, s.isoformat(), e2.isoformat(), "MRI_AGCM3_2_S")
-        return raw, "climate_direct"
+        return _fetch_daily_hedged(lat, lon, int(days), kind)
     except Exception as e:
-        raw = fetch_forecast_daily(lat, lon, 16)
-        return raw, f"forecast_fallback (climate failed: {_http_error_details(e)})"
+        return {}, f"{kind}_failed ({e})"
 
 
-def _pad_list(x: Any, n: int) -> List[Any]:
+def _as_f64(x: Any, n: int) -> np.ndarray:
+    """Série Open-Meteo -> float64 de longueur n (tronquée / complétée par NaN)."""
+    out = np.full(n, np.nan, dtype=np.float64)
     if x is None:
-        x = []
-    if not isinstance(x, list):
-        try:
-            x = list(x)
-        except Exception:
-            x = []
-    if len(x) >= n:
-        return x[:n]
-    return x + [None] * (n - len(x))
+        return out
+    try:
+        a = np.asarray(x, dtype=object).ravel()
+    except Exception:
+        return out
+    m = min(a.size, n)
+    if m:
+        out[:m] = pd.to_numeric(a[:m], errors="coerce")
+    return out
 
 
 def daily_to_df(raw: Dict[str, Any]) -> pd.DataFrame:
@@ -485,32 +712,49 @@ def daily_to_df(raw: Dict[str, Any]) -> pd.DataFrame:
     if n == 0:
         return pd.DataFrame()
 
-    precip = _pad_list(d.get("precipitation_sum", []), n)
-    tmax = _pad_list(d.get("temperature_2m_max", []), n)
-    tmin = _pad_list(d.get("temperature_2m_min", []), n)
-
     wind = d.get("wind_speed_10m_max", None)
     if wind is None:
         wind = d.get("windspeed_10m_max", None)
-    wind = _pad_list(wind or [], n)
 
+    # Dates invalides écartées par masque sur les tableaux, avant construction
+    # du DataFrame (pas de dropna ni de copie a posteriori)
+    dates = pd.to_datetime(time, errors="coerce", cache=True).to_numpy()
+    valid = ~np.isnat(dates)
+    if not valid.all():
+        dates = dates[valid]
+
+    def col(x: Any) -> np.ndarray:
+        a = _as_f64(x, n)
+        return a if dates.size == n else a[valid]
+
+    tmax = col(d.get("temperature_2m_max"))
+    tmin = col(d.get("temperature_2m_min"))
+    # float32 : précision largement suffisante (mm, °C, km/h), mémoire et
+    # payload Plotly/Arrow divisés par deux
     df = pd.DataFrame(
         {
-            "date": pd.to_datetime(time, errors="coerce"),
-            "precip_mm": pd.to_numeric(precip, errors="coerce"),
-            "tmax_c": pd.to_numeric(tmax, errors="coerce"),
-            "tmin_c": pd.to_numeric(tmin, errors="coerce"),
-            "wind_kmh": pd.to_numeric(wind, errors="coerce"),
+            "date": dates,
+            "precip_mm": col(d.get("precipitation_sum")).astype(np.float32),
+            "tmax_c": tmax.astype(np.float32),
+            "tmin_c": tmin.astype(np.float32),
+            "wind_kmh": col(wind).astype(np.float32),
+            "tmean_c": ((tmax + tmin) * 0.5).astype(np.float32),
         }
     )
-    df = df.dropna(subset=["date"])
-    if df.empty:
+    if df.empty or df["date"].is_monotonic_increasing:
         return df
-    df["tmean_c"] = (df["tmax_c"] + df["tmin_c"]) / 2.0
     return df.sort_values("date")
 
 
-def plot_forecast(df: pd.DataFrame, title: str) -> go.Figure:
+@st.cache_resource(show_spinner=False)
+def _forecast_fig_shell() -> Dict[str, Any]:
+    """
+    Squelette statique du graphique (grille 2x2, traces vides, axes, layout),
+    construit une fois par process et conservé en dict (jamais modifié).
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     fig = make_subplots(
         rows=2,
         cols=2,
@@ -524,95 +768,176 @@ def plot_forecast(df: pd.DataFrame, title: str) -> go.Figure:
         horizontal_spacing=0.10,
     )
 
-    fig.add_trace(go.Bar(x=df["date"], y=df["precip_mm"], name="Précip.", showlegend=False), row=1, col=1)
+    fig.add_trace(go.Bar(name="Précip.", showlegend=False), row=1, col=1)
 
-    fig.add_trace(go.Scatter(x=df["date"], y=df["tmax_c"], name="Tmax", mode="lines", showlegend=False), row=1, col=2)
-    fig.add_trace(go.Scatter(x=df["date"], y=df["tmin_c"], name="Tmin", mode="lines", fill="tonexty", showlegend=False), row=1, col=2)
+    fig.add_trace(go.Scatter(name="Tmax", mode="lines", showlegend=False), row=1, col=2)
+    fig.add_trace(go.Scatter(name="Tmin", mode="lines", fill="tonexty", showlegend=False), row=1, col=2)
 
-    fig.add_trace(go.Scatter(x=df["date"], y=df["wind_kmh"], name="Vent", mode="lines", fill="tozeroy", showlegend=False), row=2, col=1)
+    fig.add_trace(go.Scatter(name="Vent", mode="lines", fill="tozeroy", showlegend=False), row=2, col=1)
 
-    fig.add_trace(go.Box(y=df["tmax_c"], name="Tmax", showlegend=False), row=2, col=2)
+    fig.add_trace(go.Box(name="Tmax", showlegend=False), row=2, col=2)
 
     fig.update_xaxes(rangeslider=dict(visible=True), row=1, col=1)
     fig.update_xaxes(rangeslider=dict(visible=True), row=1, col=2)
 
     fig.update_layout(
-        title=title,
         height=720,
         hovermode="x unified",
         template="plotly_white",
         margin=dict(t=80, b=30, l=25, r=25),
     )
+    return fig.to_dict()
+
+
+def _box_stats(values: np.ndarray) -> Dict[str, Any]:
+    """
+    Boîte à moustaches pré-calculée (quartiles linéaires comme plotly.js,
+    moustaches à 1,5 IQR sur les données) : 6 valeurs envoyées au lieu de N.
+    """
+    v = values[np.isfinite(values)].astype(np.float64)
+    if v.size == 0:
+        return {"y": []}
+    q1, med, q3 = np.percentile(v, [25, 50, 75])
+    iqr = q3 - q1
+    return {
+        "q1": [q1],
+        "median": [med],
+        "q3": [q3],
+        "lowerfence": [v[v >= q1 - 1.5 * iqr].min()],
+        "upperfence": [v[v <= q3 + 1.5 * iqr].max()],
+        "mean": [v.mean()],
+    }
+
+
+FORECAST_MAX_POINTS = 500
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets sur un axe régulier (pas journalier) :
+    positions des n_out points conservés, premier et dernier inclus.
+    NaN traités comme 0 pour le choix des points (les valeurs tracées restent NaN).
+    """
+    n = y.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    yy = np.nan_to_num(y.astype(np.float64), nan=0.0)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nxt_hi = edges[b + 2] if b + 2 < n_out - 1 else n
+        # Sommet C : moyenne du seau suivant
+        cx = (hi + nxt_hi - 1) * 0.5
+        cy = yy[hi:nxt_hi].mean()
+        j = np.arange(lo, hi)
+        area = np.abs((a - cx) * (yy[j] - yy[a]) - (a - j) * (cy - yy[a]))
+        a = int(j[area.argmax()])
+        out[b + 1] = a
+    return out
+
+
+def plot_forecast(df: pd.DataFrame, title: str) -> go.Figure:
+    import plotly.graph_objects as go
+
+    # Figure recréée depuis le squelette : seules les séries x/y sont injectées
+    fig = go.Figure(_forecast_fig_shell())
+    x = df["date"].to_numpy(dtype="datetime64[ns]")
+    precip, tmax, tmin, wind = (df[c].to_numpy() for c in ("precip_mm", "tmax_c", "tmin_c", "wind_kmh"))
+    # Séries longues sous-échantillonnées (LTTB) ; Tmax/Tmin partagent les mêmes
+    # abscisses pour le remplissage "tonexty". La boîte garde toutes les valeurs.
+    i_pr = lttb_indices(precip, FORECAST_MAX_POINTS)
+    i_t = lttb_indices(tmax, FORECAST_MAX_POINTS)
+    i_w = lttb_indices(wind, FORECAST_MAX_POINTS)
+    with fig.batch_update():
+        fig.data[0].update(x=x[i_pr], y=precip[i_pr])
+        fig.data[1].update(x=x[i_t], y=tmax[i_t])
+        fig.data[2].update(x=x[i_t], y=tmin[i_t])
+        fig.data[3].update(x=x[i_w], y=wind[i_w])
+        fig.data[4].update(**_box_stats(tmax))
+        fig.update_layout(title=title)
     return fig
 
 
-def compute_flood_level(df: pd.DataFrame, rules: Dict[str, Any]) -> Tuple[str, str]:
-    if df.empty or "precip_mm" not in df.columns:
-        return "green", "Aucune donnée précipitation disponible."
+def forecast_key(df: pd.DataFrame) -> str:
+    """Empreinte du contenu des prévisions (hash vectorisé des lignes)."""
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+
+# Figure et table reconstruites uniquement quand les prévisions ou le titre
+# changent (pas à chaque clic dans un autre onglet)
+@st.cache_data(show_spinner=False, max_entries=32)
+def forecast_figure(key: str, title: str, _df: pd.DataFrame) -> go.Figure:
+    return plot_forecast(_df, title)
 
-    max_1d = float(df["precip_mm"].max(skipna=True) or 0.0)
-    day = "N/A"
-    if df["precip_mm"].notna().any():
-        row = df.loc[df["precip_mm"].idxmax()]
-        if pd.notna(row["date"]):
-            day = str(pd.to_datetime(row["date"]).date())
-
-    thr = rules["flood"]
-    if max_1d >= thr["red"]:
-        level = "red"
-    elif max_1d >= thr["orange"]:
-        level = "orange"
-    elif max_1d >= thr["yellow"]:
-        level = "yellow"
-    else:
-        level = "green"
 
-    return level, f"Max précipitations prévues: {max_1d:.1f} mm/j (jour: {day})."
+@st.cache_data(show_spinner=False, max_entries=32)
+def forecast_table(key: str, _df: pd.DataFrame) -> pd.DataFrame:
+    return _df[["date", "precip_mm", "tmax_c", "tmin_c", "tmean_c", "wind_kmh"]]
 
 
-def compute_drought_level(df: pd.DataFrame, rules: Dict[str, Any]) -> Tuple[str, str]:
+FORECAST_AGGS = {"precip_mm": "max", "tmax_c": "max", "tmin_c": "min", "wind_kmh": "max"}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def forecast_aggregates(key: str, _df: pd.DataFrame) -> Dict[str, float]:
+    """Extrêmes des prévisions en un seul agg (NaN => 0)."""
+    return {k: float(v) for k, v in _df.agg(FORECAST_AGGS).fillna(0.0).items()}
+
+
+# -----------------------------
+# Détection : niveaux par seuils (noyau dans core.alert_levels)
+# -----------------------------
+def _date_at(df: pd.DataFrame, idx: int) -> Optional[datetime]:
+    """
+    Date du jour `idx`. La colonne est déjà en datetime64 (daily_to_df) :
+    lecture du tableau NumPy, seul l'élément retenu est converti.
+    """
+    if idx < 0 or "date" not in df.columns:
+        return None
+    d0 = df["date"].to_numpy(dtype="datetime64[ns]")[idx]
+    return None if np.isnat(d0) else pd.Timestamp(d0).to_pydatetime()
+
+
+def detect_levels(df: pd.DataFrame, rules: Dict[str, Any]) -> Optional[Tuple[np.ndarray, ...]]:
+    """Un seul passage du noyau par rerun, partagé par les niveaux flood et drought."""
     if df.empty or "precip_mm" not in df.columns:
+        return None
+    return compute_levels_batch(df["precip_mm"].to_numpy(dtype=float), rules)
+
+
+def compute_flood_level(df: pd.DataFrame, levels: Optional[Tuple[np.ndarray, ...]]) -> Tuple[str, str]:
+    if levels is None:
         return "green", "Aucune donnée précipitation disponible."
 
-    pr = df["precip_mm"].fillna(0.0).tolist()
-    dates = df["date"].tolist()
-
-    max_streak = 0
-    cur = 0
-    start_best: Optional[datetime] = None
-    start_cur: Optional[datetime] = None
-
-    for i, p in enumerate(pr):
-        if float(p) < 1.0:
-            if cur == 0:
-                start_cur = pd.to_datetime(dates[i]).to_pydatetime() if pd.notna(dates[i]) else None
-            cur += 1
-            if cur > max_streak:
-                max_streak = cur
-                start_best = start_cur
-        else:
-            cur = 0
-            start_cur = None
-
-    thr = rules["drought"]
-    if max_streak >= thr["red"]:
-        level = "red"
-    elif max_streak >= thr["orange"]:
-        level = "orange"
-    elif max_streak >= thr["yellow"]:
-        level = "yellow"
-    else:
-        level = "green"
+    flood_code, _, max_1d, idx_max, _, _ = levels
+    level = LEVEL_FROM_CODE[int(flood_code[0])]
+    d = _date_at(df, int(idx_max[0]))
+    day = str(d.date()) if d else "N/A"
+    return level, f"Max précipitations prévues: {float(max_1d[0]):.1f} mm/j (jour: {day})."
+
+
+def compute_drought_level(df: pd.DataFrame, levels: Optional[Tuple[np.ndarray, ...]]) -> Tuple[str, str]:
+    if levels is None:
+        return "green", "Aucune donnée précipitation disponible."
+
+    # Séries de jours secs (< 1 mm, NaN => sec) : première série la plus longue
+    _, drought_code, _, _, max_streak, idx_streak = levels
+    level = LEVEL_FROM_CODE[int(drought_code[0])]
+    start_best = _date_at(df, int(idx_streak[0]))
 
     avg_tmax = float(df["tmax_c"].mean(skipna=True) or 0.0)
     start_txt = start_best.date().isoformat() if start_best else "N/A"
-    return level, f"Série sèche prévue: {max_streak} jour(s) (début: {start_txt}), Tmax moyenne: {avg_tmax:.1f}°C."
+    return level, f"Série sèche prévue: {int(max_streak[0])} jour(s) (début: {start_txt}), Tmax moyenne: {avg_tmax:.1f}°C."
 
 
-DB_RISK_ALERTS = safe_table_exists("risk_alerts")
-DB_RECIP = safe_table_exists("alert_recipients")
-DB_ACK = safe_table_exists("alert_ack")
-DB_OUTBOX = safe_table_exists("notification_outbox")
+_DB_TABLES = tables_exist(("risk_alerts", "alert_recipients", "alert_ack", "notification_outbox"))
+DB_RISK_ALERTS = _DB_TABLES["risk_alerts"]
+DB_RECIP = _DB_TABLES["alert_recipients"]
+DB_ACK = _DB_TABLES["alert_ack"]
+DB_OUTBOX = _DB_TABLES["notification_outbox"]
 
 
 def ensure_session_state():
@@ -637,11 +962,9 @@ def save_alert_demo(a: Dict[str, Any]) -> None:
     st.session_state["m3_alerts"].insert(0, a)
 
 
-def try_save_risk_alerts(a: Dict[str, Any]) -> bool:
-    if not DB_RISK_ALERTS:
-        return False
-
-    payload = {
+def risk_alert_payload(a: Dict[str, Any]) -> Dict[str, Any]:
+    """Ligne risk_alerts (colonnes DB uniquement ; channels/signal_summary restent côté session)."""
+    return {
         "risk": a.get("risk_type"),
         "severity": int(SEVERITY_FROM_LEVEL.get(a.get("level", "green"), 1)),
         "title": a.get("title", ""),
@@ -653,53 +976,362 @@ def try_save_risk_alerts(a: Dict[str, Any]) -> bool:
         "end_at": a.get("expires_at"),
         "status": "active",
     }
-    return safe_insert("risk_alerts", payload)
 
 
-def is_active(a: Dict[str, Any]) -> bool:
+def try_save_risk_alerts_many(alerts: List[Dict[str, Any]]) -> bool:
+    """Insertion multi-lignes : un seul aller-retour PostgREST pour tout le lot."""
+    if not DB_RISK_ALERTS or not alerts:
+        return False
+    return safe_insert("risk_alerts", [risk_alert_payload(a) for a in alerts])
+
+
+def alert_masks(alerts: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Masques (actives, actives critiques) : statut "active" et non expirées,
+    critiques = niveau rouge. Les échéances sont parsées une fois dans
+    alerts_frame ; ne reste ici qu'une comparaison vectorisée à l'instant
+    courant. Échéance absente ou illisible => active.
+    """
+    if not alerts:
+        empty = np.zeros(0, dtype=bool)
+        return empty, empty
+
+    df = alerts_frame(alerts)
+    exp = df["expires_at_dt"]
+    active = ((df["status"] == "active") & (exp.isna() | (exp >= pd.Timestamp(now())))).to_numpy()
+    critical = active & (df["level"] == "red").to_numpy()
+    return active, critical
+
+
+def alert_labels(df: pd.DataFrame, with_issued: bool = False) -> List[str]:
+    """Libellés de sélection des alertes, construits par colonnes (pas de dict.get par alerte)."""
+    labels = df["risk_icon"] + " " + df["zone_name"].fillna("").astype(str) + " — " + df["level_label"]
+    if with_issued:
+        labels = labels + " — " + df["issued_at"].fillna("").astype(str)
+    return labels.tolist()
+
+
+# Horodatages d'alerte écrits à la seconde (isoformat(timespec="seconds"))
+# => format fixe, parsing vectorisé sans inférence
+ALERT_TS_FORMAT = "%Y-%m-%dT%H:%M:%S"
+# Colonnes dérivées ajoutées par alerts_frame (exclues de l'export CSV)
+ALERT_DERIVED_COLUMNS = ["issued_at_dt", "expires_at_dt", "risk_icon", "risk_label", "level_icon", "level_label"]
+ALERT_FRAME_COLUMNS = ["alert_id", "risk_type", "level", "zone_name", "region", "issued_at", "expires_at", "status"]
+
+
+def session_frame(slot: str, sig: Any, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """DataFrame mémorisé en session sous `slot`, reconstruit seulement si `sig` change."""
+    cached = st.session_state.get(slot)
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    df = build()
+    st.session_state[slot] = (sig, df)
+    return df
+
+
+def head_signature(records: List[Dict[str, Any]], id_key: str) -> Tuple[int, Any]:
+    """Listes alimentées en tête uniquement : (taille, premier id) identifie le contenu."""
+    return len(records), records[0].get(id_key) if records else None
+
+
+def alerts_signature(alerts: List[Dict[str, Any]]) -> Tuple[int, Any]:
+    return head_signature(alerts, "alert_id")
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def alerts_csv(key: Tuple[Any, ...], _df: pd.DataFrame) -> bytes:
+    """Export CSV des alertes filtrées, recalculé seulement si (liste, filtres) change."""
+    return recent_first(_df).drop(columns=ALERT_DERIVED_COLUMNS, errors="ignore").to_csv(index=False).encode("utf-8")
+
+
+def recent_first(df: pd.DataFrame, limit: Optional[int] = None) -> pd.DataFrame:
+    """
+    Alertes les plus récentes d'abord (date d'émission illisible => en dernier).
+    Avec `limit`, sélection top-k (nlargest) au lieu d'un tri complet.
+    """
+    ts = pd.Series(df["issued_at_dt"].to_numpy(dtype="datetime64[ns]").view(np.int64), index=df.index)
+    if limit is not None and limit < len(df):
+        order = ts.nlargest(limit, keep="first")
+    else:
+        order = ts.sort_values(ascending=False, kind="mergesort")
+    return df.loc[order.index]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def alerts_cards_html(key: Tuple[Any, ...], _df: pd.DataFrame, limit: int = 120) -> str:
+    """Cartes d'alerte (les `limit` plus récentes) en un seul bloc HTML."""
+    top = recent_first(_df, limit)
+
+    def col(name: str) -> pd.Series:
+        return top[name].astype(str) if name in top.columns else pd.Series("", index=top.index)
+
+    fields = {
+        "level": col("level"),
+        "icon": top["risk_icon"],
+        "risk_lbl": top["risk_label"],
+        "zone": col("zone_name"),
+        "region": col("region"),
+        "level_lbl": top["level_label"],
+        "summary": col("signal_summary"),
+        "issued_at": col("issued_at"),
+        "expires_at": col("expires_at"),
+    }
+    # Gabarit déroulé en concaténations de Series (littéral + colonne, en pandas)
+    html = pd.Series("", index=top.index, dtype=object)
+    for literal, field, _, _ in string.Formatter().parse(ALERT_CARD_TPL):
+        html = html + literal
+        if field:
+            html = html + fields[field]
+    return "".join(html.to_numpy())
+
+
+ALERT_CARDS_MAX_DEFAULT = 10
+ALERT_TABLE_LIMIT = 200
+ALERT_TABLE_COLUMNS = {
+    "risk": st.column_config.TextColumn("Risque", width="medium"),
+    "level": st.column_config.TextColumn("Niveau", width="small"),
+    "zone_name": st.column_config.TextColumn("Zone"),
+    "region": st.column_config.TextColumn("Région"),
+    "signal_summary": st.column_config.TextColumn("Signal", width="large"),
+    "issued_at": st.column_config.TextColumn("Émise"),
+    "expires_at": st.column_config.TextColumn("Expire"),
+    "status": st.column_config.TextColumn("Statut", width="small"),
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def alerts_table(key: Tuple[Any, ...], _df: pd.DataFrame, limit: int = ALERT_TABLE_LIMIT) -> pd.DataFrame:
+    """Vue tabulaire (sérialisée en Arrow) des alertes filtrées, libellés avec icônes."""
+    top = recent_first(_df, limit)
+    out = pd.DataFrame({
+        "risk": top["risk_icon"] + " " + top["risk_label"],
+        "level": top["level_icon"] + " " + top["level_label"],
+    })
+    for c in ("zone_name", "region", "signal_summary", "issued_at", "expires_at", "status"):
+        out[c] = top[c] if c in top.columns else None
+    return out
+
+
+def alerts_frame(alerts: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    DataFrame des alertes typé une seule fois : risk_type/level/status en
+    category (comparaisons sur codes entiers), issued_at_dt en datetime.
+    Mémorisé en session, invalidé par alerts_signature.
+    """
+    return session_frame("m3_alerts_df", alerts_signature(alerts), lambda: _build_alerts_frame(alerts))
+
+
+def _category_lookup(cat: pd.Series, table: Dict[str, str], default: Optional[str] = None) -> np.ndarray:
+    """
+    Applique `table` aux seules modalités d'une colonne category (une recherche
+    par modalité, pas par ligne). Modalité inconnue => `default`, sinon elle-même.
+    """
+    cats = cat.cat.categories
+    values = np.array([table.get(c, c if default is None else default) for c in cats], dtype=object)
+    return values[cat.cat.codes.to_numpy()]
+
+
+def _build_alerts_frame(alerts: List[Dict[str, Any]]) -> pd.DataFrame:
+    df = pd.DataFrame(alerts) if alerts else pd.DataFrame(columns=ALERT_FRAME_COLUMNS)
+    if not df.empty:
+        for c in ALERT_FRAME_COLUMNS:
+            if c not in df.columns:
+                df[c] = None
+        for c in ("risk_type", "level", "status"):
+            df[c] = df[c].astype(str).astype("category")
+        # Libellés/icônes calculés une fois ici (cartes, tableau, sélecteurs),
+        # par modalité puis diffusés par codes
+        df["risk_icon"] = _category_lookup(df["risk_type"], RISK_EMOJI, "⚠️")
+        df["risk_label"] = _category_lookup(df["risk_type"], RISK_LABEL)
+        df["level_icon"] = _category_lookup(df["level"], LEVEL_EMOJI, "⚪")
+        df["level_label"] = _category_lookup(df["level"], LEVEL_BADGE)
+        df["issued_at_dt"] = pd.to_datetime(df["issued_at"], format=ALERT_TS_FORMAT, errors="coerce", cache=True)
+        # Échéances normalisées en heure murale UTC (offsets éventuels absorbés)
+        df["expires_at_dt"] = pd.to_datetime(
+            df["expires_at"].astype(object), format="ISO8601", errors="coerce", utc=True, cache=True
+        ).dt.tz_localize(None)
+    return df
+
+
+# Colonnes texte répétitives => category (payload Arrow réduit pour st.dataframe)
+DISPLAY_CATEGORIES = ("status", "role", "organization", "zone", "alert_id", "recipient_id")
+
+
+def display_frame(records: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    DataFrame d'affichage : colonnes répétitives en category, autres colonnes
+    texte en dtypes Arrow si pyarrow est présent (transfert st.dataframe sans
+    conversion cellule par cellule des colonnes object).
+    """
+    df = pd.DataFrame(records) if records else pd.DataFrame(columns=columns)
+    if df.empty:
+        return df
+    df = df.astype({c: "category" for c in DISPLAY_CATEGORIES if c in df.columns})
+    if PYARROW_AVAILABLE:
+        try:
+            df = df.convert_dtypes(dtype_backend="pyarrow")
+        except Exception:
+            pass  # colonnes hétérogènes : on garde les dtypes pandas
+    return df
+
+
+def recipients_frame(recipients: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    DataFrame d'affichage des destinataires, mémorisé en session.
+    Nouveaux destinataires toujours en tête (session et tri DB created_at desc).
+    """
+    return session_frame(
+        "m3_recipients_df",
+        head_signature(recipients, "recipient_id"),
+        lambda: display_frame(recipients, columns=["name", "organization", "role", "zone", "channels"]),
+    )
+
+
+DB_READ_TTL_S = 30
+
+
+def invalidate_db_reads() -> None:
+    """Purge les lectures DB mises en cache (à appeler après toute écriture réussie)."""
+    select_cached.clear()
+    select_column_cached.clear()
+    st.session_state["m3_db_rev"] = st.session_state.get("m3_db_rev", 0) + 1
+
+
+def session_rows(slot: str, load: Callable[[], List[Any]]) -> List[Any]:
+    """
+    Lecture DB mémorisée en session par (révision d'écriture, tranche de TTL) :
+    les reruns réutilisent la même liste au lieu de désérialiser à nouveau la
+    copie st.cache_data. Une écriture (invalidate_db_reads) ou la fin de la
+    tranche de DB_READ_TTL_S secondes force la relecture. Une lecture en échec
+    renvoie [] sans être mémorisée : elle est retentée au rerun suivant.
+    """
+    key = (st.session_state.get("m3_db_rev", 0), int(time.time() // DB_READ_TTL_S))
+    cached = st.session_state.get(slot)
+    if cached is not None and cached[0] == key:
+        return cached[1]
     try:
-        if a.get("status") != "active":
-            return False
-        exp = a.get("expires_at")
-        if isinstance(exp, str):
-            exp_dt = datetime.fromisoformat(exp.replace("Z", ""))
-        elif isinstance(exp, datetime):
-            exp_dt = exp
-        else:
-            return True
-        return exp_dt >= now()
+        rows = load()
     except Exception:
-        return a.get("status") == "active"
+        return []
+    st.session_state[slot] = (key, rows)
+    return rows
 
 
 def load_recipients() -> List[Dict[str, Any]]:
     if DB_RECIP:
-        return safe_select("alert_recipients", order=("created_at", True), limit=1000)
+        return session_rows(
+            "m3_recipients_db", lambda: select_cached(user_cache_key(), "alert_recipients", order=("created_at", True), limit=1000)
+        )
     return st.session_state["m3_recipients"]
 
 
 def save_recipient(r: Dict[str, Any]) -> None:
     if DB_RECIP and safe_insert("alert_recipients", r):
+        invalidate_db_reads()
         return
     st.session_state["m3_recipients"].insert(0, r)
 
 
 def load_ack() -> List[Dict[str, Any]]:
     if DB_ACK:
-        return safe_select("alert_ack", order=("acked_at", True), limit=2000)
+        return session_rows("m3_ack_db", lambda: select_cached(user_cache_key(), "alert_ack", order=("acked_at", True), limit=2000))
     return st.session_state["m3_ack"]
 
 
+def load_ack_alert_ids() -> List[str]:
+    """Identifiants d'alerte de tous les ACK (une entrée par ACK) — suffisant pour les KPI"""
+    if DB_ACK:
+        return session_rows("m3_ack_ids_db", lambda: [str(x) for x in select_column_cached(user_cache_key(), "alert_ack", "alert_id")])
+    return [str(x.get("alert_id")) for x in st.session_state["m3_ack"]]
+
+
 def add_ack(ack: Dict[str, Any]) -> None:
     if DB_ACK and safe_insert("alert_ack", ack):
+        invalidate_db_reads()
         return
     st.session_state["m3_ack"].insert(0, ack)
 
 
-def push_outbox(item: Dict[str, Any]) -> None:
-    if DB_OUTBOX and safe_insert("notification_outbox", item):
+OUTBOX_INSERT_CHUNK = 500
+
+
+def push_outbox_many(items: List[Dict[str, Any]]) -> None:
+    """
+    Diffusion groupée : insert multi-lignes par tranches de OUTBOX_INSERT_CHUNK
+    (taille de requête PostgREST bornée). Les tranches non insérées basculent
+    en session, en une seule extension.
+    """
+    if not items:
         return
-    st.session_state["m3_outbox"].insert(0, item)
+    pending = items
+    if DB_OUTBOX:
+        for start in range(0, len(items), OUTBOX_INSERT_CHUNK):
+            if not safe_insert("notification_outbox", items[start:start + OUTBOX_INSERT_CHUNK]):
+                pending = items[start:]
+                break
+        else:
+            return
+    st.session_state["m3_outbox"][:0] = pending[::-1]
+
+
+def push_outbox(item: Dict[str, Any]) -> None:
+    push_outbox_many([item])
+
+
+def stations_key(stations: pd.DataFrame) -> Tuple[str, str]:
+    """
+    Clé du référentiel chargé : utilisateur (RLS) + empreinte du contenu
+    (ids, localités, régions), stable d'un rerun à l'autre et qui change au
+    rechargement ou à l'expiration de _stations_raw.
+    """
+    cols = [c for c in ("localite", "region") if c in stations.columns]
+    digest = hashlib.sha1(pd.util.hash_pandas_object(stations[cols], index=True).to_numpy().tobytes()).hexdigest()
+    return user_cache_key(), digest
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def station_options(
+    region_sel: str, stations_key: Tuple[str, str], _stations: pd.DataFrame
+) -> Tuple[List[str], Dict[str, str]]:
+    """
+    (ids, libellés) des stations d'une région, construits par colonnes.
+    `stations_key` identifie le référentiel chargé (voir stations_key()).
+    """
+    df_f = _stations
+    if region_sel != "Toutes" and "region" in df_f.columns:
+        df_f = df_f[df_f["region"].astype(str) == str(region_sel)]
+    df_f = df_f.sort_values(["localite"])
+
+    def text(name: str) -> pd.Series:
+        if name not in df_f.columns:
+            return pd.Series("", index=df_f.index)
+        return df_f[name].astype(object).fillna("").astype(str)
+
+    ids = df_f.index.tolist()
+    locs = text("localite")
+    regs = text("region")
+    labels = ("🏷️ " + locs + " — " + regs.where(regs != "", "—")).tolist()
+    return ids, dict(zip(ids, labels))
+
+
+def station_location(stations: pd.DataFrame, sid: str) -> Dict[str, Any]:
+    """Localité d'une station : lecture d'une seule ligne du référentiel (index id)."""
+    row = stations.loc[sid]
+
+    def text(name: str) -> str:
+        v = row.get(name)
+        return str(v) if pd.notna(v) else ""
+
+    return {
+        "id": sid,
+        "station_id": sid,
+        "lat": float(row["latitude"]),
+        "lon": float(row["longitude"]),
+        "localite": text("localite"),
+        "region": text("region"),
+        "admin_code": text("admin_code") or None,
+        "accuracy": None,
+    }
 
 
 # -----------------------------
@@ -707,6 +1339,9 @@ def push_outbox(item: Dict[str, Any]) -> None:
 # -----------------------------
 with st.sidebar:
     st.markdown("### 📍 Localisation & Prévisions")
+    if st.button("🔄 Recharger stations", key="m3_reload_stations", use_container_width=True):
+        _stations_raw.clear()
+        st.rerun()
 
     regions: List[str] = ["Toutes"]
     if not stations_df.empty and "region" in stations_df.columns:
@@ -717,40 +1352,11 @@ with st.sidebar:
 
     loc_ids: List[str] = ["me"]
     loc_labels: Dict[str, str] = {"me": f"📍 Ma position — {user_loc.get('region','') or ''}".strip()}
-    loc_map: Dict[str, Dict[str, Any]] = {
-        "me": {
-            "id": None,
-            "station_id": None,
-            "lat": user_loc["lat"],
-            "lon": user_loc["lon"],
-            "localite": user_loc.get("localite", "Ma position"),
-            "region": user_loc.get("region", ""),
-            "admin_code": None,
-            "accuracy": user_loc.get("accuracy"),
-        }
-    }
 
     if not stations_df.empty:
-        df_f = stations_df.copy()
-        if region_sel != "Toutes" and "region" in df_f.columns:
-            df_f = df_f[df_f["region"].astype(str) == str(region_sel)]
-        df_f = df_f.sort_values(["localite"])
-
-        for _, r in df_f.iterrows():
-            sid = str(r["id"])
-            label = f"🏷️ {r['localite']} — {r.get('region','') or '—'}"
-            loc_ids.append(sid)
-            loc_labels[sid] = label
-            loc_map[sid] = {
-                "id": sid,
-                "station_id": sid,
-                "lat": float(r["latitude"]),
-                "lon": float(r["longitude"]),
-                "localite": str(r["localite"]),
-                "region": str(r.get("region", "")),
-                "admin_code": (str(r.get("admin_code")) if r.get("admin_code") else None),
-                "accuracy": None,
-            }
+        st_ids, st_labels = station_options(region_sel, stations_key(stations_df), stations_df)
+        loc_ids += st_ids
+        loc_labels.update(st_labels)
 
     if st.session_state.get("m3_localite") not in loc_ids:
         st.session_state["m3_localite"] = "me"
@@ -761,26 +1367,22 @@ with st.sidebar:
         format_func=lambda k: loc_labels.get(k, k),
         key="m3_localite",
     )
-    selected_loc = loc_map[loc_sel]
+    if loc_sel == "me":
+        selected_loc = {
+            "id": None,
+            "station_id": None,
+            "lat": user_loc["lat"],
+            "lon": user_loc["lon"],
+            "localite": user_loc.get("localite", "Ma position"),
+            "region": user_loc.get("region", ""),
+            "admin_code": None,
+            "accuracy": user_loc.get("accuracy"),
+        }
+    else:
+        selected_loc = station_location(stations_df, loc_sel)
 
     horizon_label = st.selectbox("Échelle de prévision", options=list(HORIZON_CHOICES.keys()), key="m3_horizon")
 
-    st.markdown("---")
-    st.markdown("### Filtres alertes")
-    risk_filter = st.multiselect(
-        "Types de risque",
-        options=RISK_TYPES,
-        default=["flood", "drought"],
-        format_func=lambda x: f"{'🌊' if x=='flood' else '🌵'} {RISK_LABEL[x]}",
-    )
-    level_filter = st.multiselect(
-        "Niveaux",
-        options=["green", "yellow", "orange", "red"],
-        default=["yellow", "orange", "red"],
-        format_func=lambda x: f"{'🟢' if x=='green' else '🟡' if x=='yellow' else '🟠' if x=='orange' else '🔴'} {LEVEL_LABEL[x]}",
-    )
-    status_filter = st.multiselect("Statut", options=["active", "expired", "cancelled"], default=["active"])
-
 
 # -----------------------------
 # Chargement prévisions
@@ -790,7 +1392,8 @@ H_DAYS = int(hconf["days"])
 KIND = str(hconf["kind"])
 
 with st.spinner("📡 Chargement des prévisions (Open-Meteo)…"):
-    raw_fc, fc_source = fetch_daily_any(float(selected_loc["lat"]), float(selected_loc["lon"]), H_DAYS, KIND)
+    # Coordonnées arrondies (~10 m) : clé de cache stable pour la position GPS
+    raw_fc, fc_source = fetch_daily_any(round(float(selected_loc["lat"]), 4), round(float(selected_loc["lon"]), 4), H_DAYS, KIND)
 
 df_fc = daily_to_df(raw_fc)
 
@@ -819,37 +1422,67 @@ if KIND == "forecast" and H_DAYS > 16:
 # -----------------------------
 # KPIs
 # -----------------------------
+# Chargées une fois par rerun et réutilisées par tous les onglets
+# (chaque écriture est suivie d'un st.rerun)
 alerts = load_alerts_demo()
 recipients = load_recipients()
-acks = load_ack()
-
-active_alerts = [a for a in alerts if is_active(a)]
-critical_active = [a for a in active_alerts if a.get("level") == "red"]
-
-ack_df = pd.DataFrame(acks) if acks else pd.DataFrame(columns=["alert_id"])
-ack_rate = 0.0
-if active_alerts:
-    acked_ids = set(ack_df["alert_id"].astype(str).tolist()) if not ack_df.empty else set()
-    acked_alerts = sum(1 for a in active_alerts if str(a.get("alert_id")) in acked_ids)
-    ack_rate = (acked_alerts / len(active_alerts)) * 100.0
-
-k1, k2, k3, k4, k5 = st.columns(5)
-with k1:
-    st.markdown(f"""<div class="metric-box"><div class="metric-value">{len(active_alerts)}</div><div class="metric-label">Alertes actives</div></div>""", unsafe_allow_html=True)
-with k2:
-    st.markdown(f"""<div class="metric-box" style="background: linear-gradient(135deg, #fa709a 0%, #fee140 100%);"><div class="metric-value">{len(critical_active)}</div><div class="metric-label">Actives critiques</div></div>""", unsafe_allow_html=True)
-with k3:
-    st.markdown(f"""<div class="metric-box" style="background: linear-gradient(135deg, #30cfd0 0%, #330867 100%);"><div class="metric-value">{len(recipients)}</div><div class="metric-label">Destinataires</div></div>""", unsafe_allow_html=True)
-with k4:
-    st.markdown(f"""<div class="metric-box" style="background: linear-gradient(135deg, #43e97b 0%, #38f9d7 100%);"><div class="metric-value">{len(acks)}</div><div class="metric-label">ACK cumulés</div></div>""", unsafe_allow_html=True)
-with k5:
-    st.markdown(f"""<div class="metric-box" style="background: linear-gradient(135deg, #a8edea 0%, #fed6e3 100%); color:#333;"><div class="metric-value">{ack_rate:.0f}%</div><div class="metric-label">Taux ACK (actives)</div></div>""", unsafe_allow_html=True)
+
+# Décision "active" prise une seule fois par rerun (un parse vectorisé des échéances)
+active_mask, critical_mask = alert_masks(alerts)
+active_pos = np.flatnonzero(active_mask)
+
+
+def ack_stats(
+    alerts: List[Dict[str, Any]], active_mask: np.ndarray, critical_mask: np.ndarray, ack_ids: List[str]
+) -> Tuple[int, int, float]:
+    """
+    (actives, actives critiques, taux ACK %) mémorisés en session : recalcul
+    uniquement si l'ensemble des alertes actives ou le journal ACK change.
+    """
+    key = (alerts_signature(alerts), active_mask.tobytes(), len(ack_ids), ack_ids[-1] if ack_ids else None)
+    cached = st.session_state.get("m3_ack_stats")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    n_active = int(active_mask.sum())
+    n_critical = int(critical_mask.sum())
+    ack_rate = 0.0
+    if n_active:
+        ids = alerts_frame(alerts)["alert_id"].astype(str).to_numpy()[active_mask]
+        acked = np.isin(ids, np.asarray(ack_ids, dtype=object))
+        ack_rate = float(acked.sum()) / n_active * 100.0
+    stats = (n_active, n_critical, ack_rate)
+    st.session_state["m3_ack_stats"] = (key, stats)
+    return stats
+
+
+# Bandeau KPI rafraîchi seul toutes les 60 s, sans relancer le chargement
+# Open-Meteo ni les onglets (lectures DB servies par select_cached)
+@st.fragment(run_every=60)
+def render_kpis() -> None:
+    kpi_recipients = load_recipients()
+    kpi_ack_ids = load_ack_alert_ids()
+    kpi_alerts = load_alerts_demo()
+    n_active, n_critical, ack_rate = ack_stats(kpi_alerts, *alert_masks(kpi_alerts), kpi_ack_ids)
+
+    with st.container(key="m3_kpis"):
+        k1, k2, k3, k4, k5 = st.columns(5)
+        k1.metric("Alertes actives", n_active)
+        k2.metric("Actives critiques", n_critical)
+        k3.metric("Destinataires", len(kpi_recipients))
+        k4.metric("ACK cumulés", len(kpi_ack_ids))
+        k5.metric("Taux ACK (actives)", f"{ack_rate:.0f}%")
+
+
+render_kpis()
 
 st.markdown("")
 
 # -----------------------------
 # Tabs
 # -----------------------------
+# Les onglets interactifs sont des st.fragment : leurs widgets ne relancent
+# que l'onglet concerné (les écritures font un st.rerun complet).
 tab_loc, tab_detect, tab_alerts, tab_diff, tab_ack, tab_rules = st.tabs(
     [
         "📍 Localisation & Prévisions",
@@ -864,7 +1497,8 @@ tab_loc, tab_detect, tab_alerts, tab_diff, tab_ack, tab_rules = st.tabs(
 # =========================================================
 # TAB 0
 # =========================================================
-with tab_loc:
+@st.fragment
+def render_location_tab() -> None:
     st.markdown("#### Localisation sélectionnée")
     cA, cB, cC = st.columns([2.0, 2.0, 4.0])
     with cA:
@@ -878,74 +1512,62 @@ with tab_loc:
 
     st.markdown("---")
     st.markdown(f"#### Prévisions — {horizon_label} (source: {fc_source})")
-    fig = plot_forecast(df_fc, f"Prévisions {horizon_label} — {selected_loc.get('localite','Localité')}")
+    fc_key = forecast_key(df_fc)
+    fig = forecast_figure(fc_key, f"Prévisions {horizon_label} — {selected_loc.get('localite','Localité')}", df_fc)
     st.plotly_chart(fig, use_container_width=True)
 
     with st.expander("📄 Données (table)", expanded=False):
         st.dataframe(
-            df_fc[["date", "precip_mm", "tmax_c", "tmin_c", "tmean_c", "wind_kmh"]].copy(),
+            forecast_table(fc_key, df_fc),
             use_container_width=True,
             hide_index=True,
         )
 
     st.markdown("---")
+    aggs = forecast_aggregates(fc_key, df_fc)
     s1, s2, s3, s4 = st.columns(4)
     with s1:
-        st.metric("Max pluie (mm/j)", f"{float(df_fc['precip_mm'].max(skipna=True) or 0):.1f}")
+        st.metric("Max pluie (mm/j)", f"{aggs['precip_mm']:.1f}")
     with s2:
-        st.metric("Max Tmax (°C)", f"{float(df_fc['tmax_c'].max(skipna=True) or 0):.1f}")
+        st.metric("Max Tmax (°C)", f"{aggs['tmax_c']:.1f}")
     with s3:
-        st.metric("Min Tmin (°C)", f"{float(df_fc['tmin_c'].min(skipna=True) or 0):.1f}")
+        st.metric("Min Tmin (°C)", f"{aggs['tmin_c']:.1f}")
     with s4:
-        st.metric("Max vent (km/h)", f"{float(df_fc['wind_kmh'].max(skipna=True) or 0):.1f}")
+        st.metric("Max vent (km/h)", f"{aggs['wind_kmh']:.1f}")
+
+
+with tab_loc:
+    render_location_tab()
 
 # =========================================================
 # TAB 1
 # =========================================================
-with tab_detect:
+@st.fragment
+def render_detect_tab() -> None:
     st.markdown("#### Détection automatique (sur l’horizon sélectionné)")
     st.caption("V1: seuils simples (pluie journalière et séries de jours secs). Ajustez les seuils dans l’onglet Règles & Seuils.")
 
     rules = st.session_state["m3_rules"]
-    flood_level, flood_summary = compute_flood_level(df_fc, rules)
-    drought_level, drought_summary = compute_drought_level(df_fc, rules)
+    levels = detect_levels(df_fc, rules)
+    flood_level, flood_summary = compute_flood_level(df_fc, levels)
+    drought_level, drought_summary = compute_drought_level(df_fc, levels)
 
     d1, d2 = st.columns(2)
-    with d1:
-        st.markdown(
-            f"""
-            <div class="alert-card {flood_level}">
-              <div style="display:flex; justify-content:space-between; align-items:flex-start; gap:12px;">
-                <div>
-                  <div style="font-weight:800; font-size:1.1rem;">🌊 Inondation — {selected_loc.get('localite','')}</div>
-                  <div style="opacity:.8;">Région: <b>{selected_loc.get('region','')}</b> • Horizon: <b>{horizon_label}</b></div>
-                </div>
-                <div class="pill {flood_level}">{LEVEL_LABEL.get(flood_level, flood_level)}</div>
-              </div>
-              <div style="margin-top:.65rem; line-height:1.6;">
-                <div><b>Signal :</b> {flood_summary}</div>
-              </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-
-    with d2:
-        st.markdown(
-            f"""
-            <div class="alert-card {drought_level}">
-              <div style="display:flex; justify-content:space-between; align-items:flex-start; gap:12px;">
-                <div>
-                  <div style="font-weight:800; font-size:1.1rem;">🌵 Sécheresse — {selected_loc.get('localite','')}</div>
-                  <div style="opacity:.8;">Région: <b>{selected_loc.get('region','')}</b> • Horizon: <b>{horizon_label}</b></div>
-                </div>
-                <div class="pill {drought_level}">{LEVEL_LABEL.get(drought_level, drought_level)}</div>
-              </div>
-              <div style="margin-top:.65rem; line-height:1.6;">
-                <div><b>Signal :</b> {drought_summary}</div>
-              </div>
-            </div>
-            """,
+    for col, risk_type, level, summary in (
+        (d1, "flood", flood_level, flood_summary),
+        (d2, "drought", drought_level, drought_summary),
+    ):
+        col.markdown(
+            DETECTION_CARD_TPL.format(
+                level=level,
+                icon=RISK_EMOJI[risk_type],
+                risk_lbl=RISK_LABEL[risk_type],
+                zone=selected_loc.get("localite", ""),
+                region=selected_loc.get("region", ""),
+                horizon=horizon_label,
+                level_lbl=LEVEL_LABEL.get(level, level),
+                summary=summary,
+            ),
             unsafe_allow_html=True,
         )
 
@@ -959,7 +1581,7 @@ with tab_detect:
               <b>Coord:</b> {format_coordinates(float(selected_loc["lat"]), float(selected_loc["lon"]))} •
               <b>Horizon:</b> {horizon_label} •
               <b>Source:</b> {fc_source}
-              <br><span style="opacity:.75;">Changez Région/Localité/Horizon dans la barre latérale.</span>
+              <br><span class="muted">Changez Région/Localité/Horizon dans la barre latérale.</span>
             </div>
             """,
             unsafe_allow_html=True,
@@ -987,7 +1609,7 @@ with tab_detect:
         message = f"{summary}\nLocalité: {zone} | Région: {reg} | Horizon: {horizon_label} | Source: {fc_source}"
 
         a = {
-            "alert_id": str(uuid.uuid4()),
+            "alert_id": new_id(),
             "risk_type": risk_type,
             "level": level,
             "zone_name": zone,
@@ -997,8 +1619,8 @@ with tab_detect:
             "lat": float(selected_loc["lat"]),
             "lon": float(selected_loc["lon"]),
             "signal_summary": summary,
-            "issued_at": issued.isoformat(),
-            "expires_at": exp.isoformat(),
+            "issued_at": issued.isoformat(timespec="seconds"),
+            "expires_at": exp.isoformat(timespec="seconds"),
             "status": "active",
             "channels": ["web"],
             "created_by": st.session_state.get("user_email", ""),
@@ -1016,97 +1638,114 @@ with tab_detect:
         if gen_flood or gen_both:
             a = build_demo_alert("flood", flood_level, flood_summary)
             if a:
-                if not try_save_risk_alerts(a):
-                    save_alert_demo(a)
                 created.append(a)
 
         if gen_drought or gen_both:
             a = build_demo_alert("drought", drought_level, drought_summary)
             if a:
-                if not try_save_risk_alerts(a):
-                    save_alert_demo(a)
                 created.append(a)
 
+        if created and not try_save_risk_alerts_many(created):
+            for a in created:
+                save_alert_demo(a)
+
         if created:
             st.success(f"✅ {len(created)} alerte(s) créée(s).")
             st.rerun()
         else:
             st.info("Aucune alerte générée (niveaux VERTS, non créés par défaut).")
 
+
+with tab_detect:
+    render_detect_tab()
+
 # =========================================================
 # TAB 2
 # =========================================================
-with tab_alerts:
+@st.fragment
+def render_alerts_tab() -> None:
     st.markdown("#### Alertes filtrées (actives & historique)")
-    alerts = load_alerts_demo()
 
-    df_alerts = pd.DataFrame(alerts) if alerts else pd.DataFrame(
-        columns=["alert_id", "risk_type", "level", "zone_name", "region", "issued_at", "expires_at", "status"]
+    # Filtres dans le fragment (et non dans la sidebar) : les modifier ne
+    # relance que cet onglet, jamais le chargement des prévisions.
+    f1, f2, f3 = st.columns(3)
+    risk_filter = f1.multiselect(
+        "Types de risque",
+        options=RISK_TYPES,
+        default=["flood", "drought"],
+        format_func=RISK_DISPLAY.get,
+        key="m3_risk_filter",
     )
+    level_filter = f2.multiselect(
+        "Niveaux",
+        options=ALERT_LEVELS,
+        default=["yellow", "orange", "red"],
+        format_func=LEVEL_DISPLAY.get,
+        key="m3_level_filter",
+    )
+    status_filter = f3.multiselect(
+        "Statut", options=["active", "expired", "cancelled"], default=["active"], key="m3_status_filter"
+    )
+
+    df_alerts = alerts_frame(alerts)
 
     if df_alerts.empty:
         st.info("Aucune alerte (utilisez l’onglet Détection & Génération).")
     else:
-        df_alerts["risk_type"] = df_alerts["risk_type"].astype(str)
-        df_alerts["level"] = df_alerts["level"].astype(str)
-        df_alerts["status"] = df_alerts["status"].astype(str)
-
-        df_f = df_alerts[
+        mask = (
             df_alerts["risk_type"].isin(risk_filter)
             & df_alerts["level"].isin(level_filter + ["green"])
             & df_alerts["status"].isin(status_filter)
-        ].copy()
-
-        df_f["issued_at_dt"] = pd.to_datetime(df_f["issued_at"], errors="coerce")
-        df_f = df_f.sort_values("issued_at_dt", ascending=False)
+        )
+        # Pas de tri ici : chaque vue (cartes, tableau, CSV) ordonne ce qu'elle affiche
+        df_f = df_alerts.loc[mask]
 
         if df_f.empty:
             st.info("Aucune alerte pour les filtres sélectionnés.")
         else:
-            for _, a in df_f.head(120).iterrows():
-                risk = a.get("risk_type", "")
-                level = a.get("level", "green")
-                zone = a.get("zone_name", "")
-                region = a.get("region", "")
-                issued_at = str(a.get("issued_at", ""))
-                expires_at = str(a.get("expires_at", ""))
-                summary = str(a.get("signal_summary", ""))
-
-                icon = "🌊" if risk == "flood" else "🌵" if risk == "drought" else "⚠️"
-                level_lbl = LEVEL_LABEL.get(level, level).upper()
-
-                st.markdown(
-                    f"""
-                    <div class="alert-card {level}">
-                      <div style="display:flex; justify-content:space-between; gap:12px; align-items:flex-start;">
-                        <div>
-                          <div style="font-weight:800; font-size:1.1rem;">{icon} {RISK_LABEL.get(risk, risk)} — {zone}</div>
-                          <div style="opacity:.8; margin-top:.2rem;">Région: <b>{region}</b></div>
-                        </div>
-                        <div class="pill {level}">{level_lbl}</div>
-                      </div>
-                      <div style="margin-top:.7rem; line-height:1.6;">
-                        <div><b>Signal :</b> {summary}</div>
-                        <div><b>Émise :</b> {issued_at} • <b>Expire :</b> {expires_at}</div>
-                      </div>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
+            # Clé de vue (liste d'alertes + filtres) : cartes HTML et CSV
+            # ne sont reconstruits que lorsqu'elle change
+            view_key = (
+                alerts_signature(alerts),
+                tuple(sorted(risk_filter)),
+                tuple(sorted(level_filter)),
+                tuple(sorted(status_filter)),
+            )
+            # Tableau Arrow par défaut ; cartes HTML réservées aux petites sélections
+            as_cards = st.toggle(
+                "Vue cartes",
+                value=len(df_f) <= ALERT_CARDS_MAX_DEFAULT,
+                key="m3_alert_cards",
+                help=f"Affichage détaillé (les {ALERT_TABLE_LIMIT} plus récentes en tableau sinon).",
+            )
+            if as_cards:
+                st.markdown(alerts_cards_html(view_key, df_f), unsafe_allow_html=True)
+            else:
+                st.dataframe(
+                    alerts_table(view_key, df_f),
+                    column_config=ALERT_TABLE_COLUMNS,
+                    hide_index=True,
+                    use_container_width=True,
                 )
 
             with st.expander("📤 Export", expanded=False):
                 st.download_button(
                     "Télécharger CSV (alertes filtrées)",
-                    data=df_f.drop(columns=["issued_at_dt"]).to_csv(index=False).encode("utf-8"),
+                    data=alerts_csv(view_key, df_f),
                     file_name="module3_alertes.csv",
                     mime="text/csv",
                     use_container_width=True,
                 )
 
+
+with tab_alerts:
+    render_alerts_tab()
+
 # =========================================================
 # TAB 3
 # =========================================================
-with tab_diff:
+@st.fragment
+def render_diffusion_tab() -> None:
     st.markdown("#### Destinataires & diffusion (simulation / outbox)")
     st.caption("L’intégration SMS/Email/API sera branchée ensuite sur un service dédié. En attendant: outbox en session_state.")
 
@@ -1128,7 +1767,7 @@ with tab_diff:
                 st.warning("Veuillez renseigner au minimum Nom complet + Institution.")
             else:
                 payload = {
-                    "recipient_id": str(uuid.uuid4()),
+                    "recipient_id": new_id(),
                     "name": r_name.strip(),
                     "organization": r_org.strip(),
                     "role": r_role.strip(),
@@ -1142,25 +1781,20 @@ with tab_diff:
                 st.success("✅ Destinataire enregistré.")
                 st.rerun()
 
-    recipients = load_recipients()
-    df_r = pd.DataFrame(recipients) if recipients else pd.DataFrame(columns=["name", "organization", "role", "zone", "channels"])
+    df_r = recipients_frame(recipients)
     st.markdown("---")
     st.markdown("#### Liste de diffusion")
     st.dataframe(df_r, use_container_width=True, hide_index=True)
 
     st.markdown("---")
     st.markdown("#### Diffuser une alerte (simulation / outbox)")
-    active_alerts = [a for a in load_alerts_demo() if is_active(a)]
-    if not active_alerts:
+    if active_pos.size == 0:
         st.info("Aucune alerte active à diffuser. Créez une alerte depuis l’onglet Détection & Génération.")
     else:
-        alert_labels = []
-        for a in active_alerts:
-            icon = "🌊" if a.get("risk_type") == "flood" else "🌵"
-            alert_labels.append(f"{icon} {a.get('zone_name','')} — {LEVEL_LABEL.get(a.get('level','green'))}")
-
-        selected = st.selectbox("Alerte active", options=list(range(len(active_alerts))), format_func=lambda i: alert_labels[i], key="m3_alert_to_send")
-        a = active_alerts[int(selected)]
+        active_labels = alert_labels(alerts_frame(alerts).iloc[active_pos])
+        selected = st.selectbox("Alerte active", options=range(active_pos.size), format_func=active_labels.__getitem__, key="m3_alert_to_send")
+        # Seule l'alerte choisie est lue dans la liste (pas de sous-liste des actives)
+        a = alerts[int(active_pos[selected])]
 
         send_channels = st.multiselect("Canaux de diffusion", options=["web", "email", "sms", "api"], default=["web"], key="m3_send_channels")
         scope = st.selectbox("Cible", options=["Tous", "Filtrer par zone/région"], key="m3_scope")
@@ -1172,10 +1806,14 @@ with tab_diff:
         selected_recipients = recipients
         if scope == "Filtrer par zone/région" and zone_key.strip():
             kz = zone_key.strip().lower()
-            selected_recipients = [
-                r for r in recipients
-                if kz in str(r.get("zone", "")).lower() or kz in str(r.get("organization", "")).lower()
-            ]
+
+            def lc(name: str) -> pd.Series:
+                if name not in df_r.columns:
+                    return pd.Series("", index=df_r.index)
+                return df_r[name].astype(object).fillna("").astype(str).str.lower()
+
+            mask = lc("zone").str.contains(kz, regex=False) | lc("organization").str.contains(kz, regex=False)
+            selected_recipients = [recipients[i] for i in np.flatnonzero(mask.to_numpy())]
 
         st.caption(f"Destinataires ciblés: {len(selected_recipients)}")
 
@@ -1183,51 +1821,59 @@ with tab_diff:
             if not selected_recipients:
                 st.warning("Aucun destinataire ciblé.")
             else:
-                for r in selected_recipients:
-                    item = {
-                        "outbox_id": str(uuid.uuid4()),
+                created_at = now().isoformat()
+                payload = {
+                    "title": f"ONACC Alerte {LEVEL_LABEL.get(a.get('level','green'))} — {RISK_LABEL.get(a.get('risk_type',''), a.get('risk_type',''))}",
+                    "zone": a.get("zone_name"),
+                    "region": a.get("region"),
+                    "summary": a.get("signal_summary"),
+                    "issued_at": a.get("issued_at"),
+                    "expires_at": a.get("expires_at"),
+                }
+                items = [
+                    {
+                        "outbox_id": outbox_id,
                         "alert_id": str(a.get("alert_id")),
                         "recipient_id": str(r.get("recipient_id", "")),
                         "channels": send_channels,
                         "status": "queued",
-                        "created_at": now().isoformat(),
-                        "payload": {
-                            "title": f"ONACC Alerte {LEVEL_LABEL.get(a.get('level','green'))} — {RISK_LABEL.get(a.get('risk_type',''), a.get('risk_type',''))}",
-                            "zone": a.get("zone_name"),
-                            "region": a.get("region"),
-                            "summary": a.get("signal_summary"),
-                            "issued_at": a.get("issued_at"),
-                            "expires_at": a.get("expires_at"),
-                        },
+                        "created_at": created_at,
+                        "payload": payload,
                     }
-                    push_outbox(item)
+                    for outbox_id, r in zip(new_ids(len(selected_recipients)), selected_recipients)
+                ]
+                push_outbox_many(items)
 
                 st.success("✅ Diffusion enregistrée (outbox).")
                 st.rerun()
 
-    if st.session_state.get("m3_outbox"):
-        with st.expander("📦 Outbox (simulation)", expanded=False):
-            st.dataframe(pd.DataFrame(st.session_state["m3_outbox"]), use_container_width=True, hide_index=True)
+    outbox = st.session_state.get("m3_outbox")
+    if outbox:
+        # Tableau construit seulement si affiché, et mémorisé tant que l'outbox ne change pas
+        if st.toggle(f"📦 Outbox (simulation) — {len(outbox)} élément(s)", key="m3_show_outbox"):
+            df_out = session_frame("m3_outbox_df", head_signature(outbox, "outbox_id"), lambda: display_frame(outbox))
+            st.dataframe(df_out, use_container_width=True, hide_index=True)
+
+
+with tab_diff:
+    render_diffusion_tab()
 
 # =========================================================
 # TAB 4
 # =========================================================
-with tab_ack:
+@st.fragment
+def render_ack_tab() -> None:
     st.markdown("#### Accusés de réception (ACK) — suivi opérationnel")
     st.caption("Confirme que l’information a été reçue/lue/traitée (simulation).")
 
-    alerts_all = load_alerts_demo()
+    alerts_all = alerts
     if not alerts_all:
         st.info("Aucune alerte disponible.")
     else:
-        labels = []
-        for a in alerts_all[:300]:
-            icon = "🌊" if a.get("risk_type") == "flood" else "🌵"
-            labels.append(f"{icon} {a.get('zone_name','')} — {LEVEL_LABEL.get(a.get('level','green'))} — {a.get('issued_at','')}")
-        selected_idx = st.selectbox("Sélectionner une alerte", options=list(range(min(len(alerts_all), 300))), format_func=lambda i: labels[i], key="m3_ack_alert")
+        labels = alert_labels(alerts_frame(alerts_all).head(300), with_issued=True)
+        selected_idx = st.selectbox("Sélectionner une alerte", options=list(range(min(len(alerts_all), 300))), format_func=labels.__getitem__, key="m3_ack_alert")
         alert_sel = alerts_all[int(selected_idx)]
 
-        recipients = load_recipients()
         if not recipients:
             st.warning("Aucun destinataire enregistré (onglet Diffusion & Destinataires).")
         else:
@@ -1240,7 +1886,7 @@ with tab_ack:
 
             if st.button("✅ Enregistrer ACK", type="primary", use_container_width=True):
                 payload = {
-                    "ack_id": str(uuid.uuid4()),
+                    "ack_id": new_id(),
                     "alert_id": str(alert_sel.get("alert_id")),
                     "recipient_id": str(rec.get("recipient_id")),
                     "status": ack_status,
@@ -1253,16 +1899,23 @@ with tab_ack:
 
     st.markdown("---")
     st.markdown("#### Journal des ACK")
+    # Détail complet des ACK chargé uniquement pour ce journal
     acks = load_ack()
     if not acks:
         st.info("Aucun ACK enregistré.")
     else:
-        st.dataframe(pd.DataFrame(acks), use_container_width=True, hide_index=True)
+        df_ack = session_frame("m3_ack_df", head_signature(acks, "ack_id"), lambda: display_frame(acks))
+        st.dataframe(df_ack, use_container_width=True, hide_index=True)
+
+
+with tab_ack:
+    render_ack_tab()
 
 # =========================================================
 # TAB 5
 # =========================================================
-with tab_rules:
+@st.fragment
+def render_rules_tab() -> None:
     st.markdown("#### Règles & Seuils (V1) — configurables")
     st.caption("Seuils simples. Les seuils avancés (SPI/SPEI, percentiles, multi-indicateurs) iront dans Module 8.")
 
@@ -1302,6 +1955,10 @@ with tab_rules:
             st.success("✅ Règles réinitialisées.")
             st.rerun()
 
+
+with tab_rules:
+    render_rules_tab()
+
 st.markdown("---")
 st.caption(
     f"Module 3 — Alertes précoces | ONACC (Streamlit) | "
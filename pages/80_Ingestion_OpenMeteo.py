@@ -1,12 +1,44 @@
 # pages/80_Ingestion_OpenMeteo.py
 import streamlit as st
 import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
 from core.auth import is_logged_in
 from core.supabase_client import supabase_user, supabase_service
 from core.ui import approval_gate
-from core.open_meteo import fetch_daily_forecast, horizon_plan
+from core.open_meteo import HTTP_POOL_MAXSIZE, fetch_daily_forecast, horizon_plan
+
+# Un thread par connexion du pool HTTP partagé (pas de connexion jetée)
+FETCH_WORKERS = HTTP_POOL_MAXSIZE
+UPSERT_CHUNK = 500
+BULK_UPSERT_CHUNK = 5000
+STATION_PAGE_SIZE = 1000
+PAYLOAD_VARS = ("temperature_2m_max", "temperature_2m_min", "precipitation_sum", "wind_speed_10m_max")
+
+
+# Fonction SQL (Supabase) pour l'upsert groupé : une seule instruction
+# INSERT ... SELECT ... ON CONFLICT par appel, sans typage colonne à colonne
+# (jsonb_populate_recordset suit le schéma de la table).
+#
+#   create or replace function upsert_climate_forecasts(rows jsonb)
+#   returns void language sql as $$
+#     insert into climate_forecasts (station_id, horizon, source, run_at, valid_date, payload)
+#     select station_id, horizon, source, run_at, valid_date, payload
+#     from jsonb_populate_recordset(null::climate_forecasts, rows)
+#     on conflict (station_id, horizon, source, valid_date)
+#     do update set run_at = excluded.run_at, payload = excluded.payload;
+#   $$;
+
+
+@st.cache_data(ttl=1800, show_spinner=False, max_entries=4096)
+def cached_daily_forecast(lat: float, lon: float, days: int, seasonal: bool) -> dict:
+    # Relance d'ingestion / stations voisines : pas de nouvel aller-retour HTTP
+    return fetch_daily_forecast(lat, lon, days=days, seasonal=seasonal)
+
 
 st.title("Ingestion Open-Meteo → climate_forecasts")
 
@@ -34,15 +66,25 @@ if run_btn:
         st.stop()
 
     uclient = supabase_user(st.session_state["access_token"])
-    stations = uclient.table("mnocc_stations").select("id,localite,latitude,longitude,region").limit(int(limit)).execute()
-    if getattr(stations, "error", None):
-        st.error(stations.error.message)
-        st.stop()
-
-    rows = stations.data or []
-    if not rows:
-        st.warning("Aucune station trouvée.")
-        st.stop()
+    n_max = int(limit)
+
+    def station_pages():
+        # Lecture paginée (.range) : PostgREST plafonne chaque réponse (~1000 lignes)
+        for start in range(0, n_max, STATION_PAGE_SIZE):
+            end = min(start + STATION_PAGE_SIZE, n_max) - 1
+            res = (
+                uclient.table("mnocc_stations")
+                .select("id,localite,latitude,longitude,region")
+                .order("id")
+                .range(start, end)
+                .execute()
+            )
+            if getattr(res, "error", None):
+                raise RuntimeError(res.error.message)
+            page = res.data or []
+            yield page
+            if len(page) < end - start + 1:
+                break
 
     run_at = datetime.now(timezone.utc).isoformat()
     svc = supabase_service()
@@ -50,43 +92,76 @@ if run_btn:
     inserted_total = 0
     errors = 0
 
+    seasonal = (plan.api != "https://api.open-meteo.com/v1/forecast")
+    ctx = get_script_run_ctx()
+
+    def fetch_station(s: dict) -> dict:
+        # Thread de travail : contexte du script requis par st.cache_data
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        # Coordonnées arrondies (~100 m) : stations quasi confondues => même entrée de cache
+        lat = round(float(s["latitude"]), 3)
+        lon = round(float(s["longitude"]), 3)
+        return cached_daily_forecast(lat, lon, int(plan.days), seasonal)
+
+    # Phase 1 : téléchargements en parallèle (I/O réseau, GIL relâché). Chaque
+    # page de stations est soumise dès réception : la lecture de la page
+    # suivante recouvre les appels Open-Meteo de la précédente.
+    rows = []
+    payload_rows = []
     prog = st.progress(0.0)
-    for i, s in enumerate(rows, start=1):
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        futs = {}
         try:
-            seasonal = (plan.api != "https://api.open-meteo.com/v1/forecast")
-            data = fetch_daily_forecast(s["latitude"], s["longitude"], days=plan.days, seasonal=seasonal)
-
-            daily = data.get("daily", {})
-            times = daily.get("time", [])
-            if not times:
-                prog.progress(i / len(rows))
-                continue
-
-            payload_rows = []
-            tmax = daily.get("temperature_2m_max", [None] * len(times))
-            tmin = daily.get("temperature_2m_min", [None] * len(times))
-            pr   = daily.get("precipitation_sum", [None] * len(times))
-            wmx  = daily.get("wind_speed_10m_max", [None] * len(times))
-
-            for idx, t in enumerate(times):
-                payload_rows.append({
-                    "station_id": s["id"],
-                    "horizon": plan.horizon,
-                    "source": plan.source,
-                    "run_at": run_at,
-                    "valid_date": t,
-                    "payload": {
-                        "temperature_2m_max": tmax[idx],
-                        "temperature_2m_min": tmin[idx],
-                        "precipitation_sum": pr[idx],
-                        "wind_speed_10m_max": wmx[idx],
+            for page in station_pages():
+                rows.extend(page)
+                futs.update({ex.submit(fetch_station, s): s for s in page})
+        except Exception as e:
+            ex.shutdown(wait=False, cancel_futures=True)
+            st.error(str(e))
+            st.stop()
+
+        if not rows:
+            st.warning("Aucune station trouvée.")
+            st.stop()
+
+        for i, fut in enumerate(as_completed(futs), start=1):
+            s = futs[fut]
+            try:
+                daily = fut.result().get("daily", {})
+                times = daily.get("time", [])
+                cols = [daily.get(k) or [None] * len(times) for k in PAYLOAD_VARS]
+
+                # Colonnes zippées (itération C) ; None conservé tel quel => JSON null
+                payloads = [dict(zip(PAYLOAD_VARS, vals)) for vals in zip(*cols)]
+                payload_rows.extend(
+                    {
+                        "station_id": s["id"],
+                        "horizon": plan.horizon,
+                        "source": plan.source,
+                        "run_at": run_at,
+                        "valid_date": t,
+                        "payload": p,
                     }
-                })
-
-            # Upsert par blocs (évite doublons)
-            chunk = 300
-            for j in range(0, len(payload_rows), chunk):
-                part = payload_rows[j:j+chunk]
+                    for t, p in zip(times, payloads)
+                )
+            except Exception:
+                errors += 1
+
+            prog.progress(i / len(rows))
+
+    # Phase 2 : upsert ensembliste côté base (upsert_climate_forecasts, un appel
+    # par bloc de BULK_UPSERT_CHUNK lignes) ; repli sur l'upsert REST par blocs
+    # de UPSERT_CHUNK si la fonction n'est pas déployée
+    use_rpc = True
+    chunk = BULK_UPSERT_CHUNK
+    j = 0
+    while j < len(payload_rows):
+        part = payload_rows[j:j+chunk]
+        try:
+            if use_rpc:
+                svc.rpc("upsert_climate_forecasts", {"rows": part}).execute()
+            else:
                 up = (
                     svc.table("climate_forecasts")
                     .upsert(part, on_conflict="station_id,horizon,source,valid_date")
@@ -94,13 +169,15 @@ if run_btn:
                 )
                 if getattr(up, "error", None):
                     errors += 1
-
-            inserted_total += len(payload_rows)
-
+                    j += len(part)
+                    continue
+            inserted_total += len(part)
         except Exception:
+            if use_rpc:
+                use_rpc, chunk = False, UPSERT_CHUNK
+                continue
             errors += 1
-
-        prog.progress(i / len(rows))
+        j += len(part)
 
     st.success(f"Ingestion terminée. Lignes upsertées (approx.): {inserted_total}. Erreurs: {errors}.")
 
@@ -1,9 +1,17 @@
 # pages/81_Veille_Hourly_OpenMeteo.py
+import pandas as pd
 import streamlit as st
 from core.auth import is_logged_in
 from core.ui import approval_gate
 from core.vigilance_hourly import ingest_hourly_observations, compute_vigilance_indicators_today
 
+
+def top_n(df: pd.DataFrame, col: str, n: int = 10) -> pd.DataFrame:
+    # Sélection partielle (nlargest, O(N)) au lieu d'un tri complet ; NaN exclus
+    values = pd.to_numeric(df[col], errors="coerce")
+    return df.loc[values.nlargest(n).index]
+
+
 st.title("Module 1 — Veille hydro-météorologique (Open-Meteo hourly)")
 
 if not is_logged_in():
@@ -37,7 +45,7 @@ else:
     colA, colB = st.columns(2)
     with colA:
         st.caption("Top 10 — Excès de pluie (24h)")
-        st.dataframe(df.sort_values("prcp_24h_mm", ascending=False).head(10), use_container_width=True)
+        st.dataframe(top_n(df, "prcp_24h_mm"), use_container_width=True)
     with colB:
         st.caption("Top 10 — Stress thermique (Heat Index max 24h)")
-        st.dataframe(df.sort_values("heat_index_max_24h_c", ascending=False).head(10), use_container_width=True)
+        st.dataframe(top_n(df, "heat_index_max_24h_c"), use_container_width=True)
@@ -1,11 +1,13 @@
 # pages/82_Veille_Scores_V2.py
+import hashlib
+
 import streamlit as st
 import pandas as pd
 from datetime import date
 
 from core.auth import is_logged_in
 from core.ui import approval_gate
-from core.supabase_client import supabase_user
+from core.supabase_client import supabase_user_cached
 from core.vigilance_scores import run_scores_pipeline, IC_FLOOD_SCORE, IC_DROUGHT_SCORE, SOURCE_HOURLY, RISK_FLOOD, RISK_DROUGHT
 
 st.title("Module 1 — Veille V2 (Scores Flood/Drought → risk_indicators)")
@@ -17,23 +19,18 @@ if not is_logged_in():
 if not approval_gate():
     st.stop()
 
-valid_date = st.date_input("Date (valid_date)", value=date.today()).isoformat()
+def user_cache_key() -> str:
+    # Empreinte du jeton : cloisonne les caches par utilisateur (RLS) sans
+    # placer le JWT brut dans la clé de cache
+    return hashlib.sha256(st.session_state["access_token"].encode("utf-8")).hexdigest()
 
-if st.button("Calculer & sauvegarder (Flood/Drought scores)"):
-    with st.spinner("Calcul & sauvegarde en cours..."):
-        stats = run_scores_pipeline(valid_date=valid_date)
-    st.success(
-        f"OK — admin_units: {stats['admin_units']}, rows: {stats['rows']}, upserted: {stats['upserted']}, errors: {stats['errors']}"
-    )
-
-st.divider()
-st.subheader("Lecture des zones critiques (depuis risk_indicators)")
-
-u = supabase_user(st.session_state["access_token"])
 
-def load_scores(risk: str, indicator_code: str) -> pd.DataFrame:
+# Lectures mises en cache par (date, risque, indicateur, utilisateur) : changer
+# de date ne relance la requête qu'une fois
+@st.cache_data(ttl=300, show_spinner=False)
+def load_scores(valid_date: str, risk: str, indicator_code: str, user_key: str) -> pd.DataFrame:
     res = (
-        u.table("risk_indicators")
+        supabase_user_cached(st.session_state["access_token"]).table("risk_indicators")
         .select("admin_code,value,valid_date,created_at")
         .eq("valid_date", valid_date)
         .eq("risk", risk)
@@ -47,11 +44,27 @@ def load_scores(risk: str, indicator_code: str) -> pd.DataFrame:
     df["value"] = pd.to_numeric(df["value"], errors="coerce")
     return df.sort_values("value", ascending=False)
 
+
+valid_date = st.date_input("Date (valid_date)", value=date.today()).isoformat()
+
+if st.button("Calculer & sauvegarder (Flood/Drought scores)"):
+    with st.spinner("Calcul & sauvegarde en cours..."):
+        stats = run_scores_pipeline(valid_date=valid_date)
+    load_scores.clear()
+    st.success(
+        f"OK — admin_units: {stats['admin_units']}, rows: {stats['rows']}, upserted: {stats['upserted']}, errors: {stats['errors']}"
+    )
+
+st.divider()
+st.subheader("Lecture des zones critiques (depuis risk_indicators)")
+
+user_key = user_cache_key()
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.caption("Top Flood Score")
-    df_f = load_scores(RISK_FLOOD, IC_FLOOD_SCORE)
+    df_f = load_scores(valid_date, RISK_FLOOD, IC_FLOOD_SCORE, user_key)
     if df_f.empty:
         st.info("Aucun Flood Score pour cette date.")
     else:
@@ -59,7 +72,7 @@ with col1:
 
 with col2:
     st.caption("Top Drought Score")
-    df_d = load_scores(RISK_DROUGHT, IC_DROUGHT_SCORE)
+    df_d = load_scores(valid_date, RISK_DROUGHT, IC_DROUGHT_SCORE, user_key)
     if df_d.empty:
         st.info("Aucun Drought Score pour cette date.")
     else:
@@ -1,9 +1,13 @@
 # pages/90_Admin_Approvals.py
 from __future__ import annotations
 
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from supabase import create_client
 
 from core.supabase_client import supa_service
@@ -16,7 +20,17 @@ st.set_page_config(
 )
 
 # --- Styles CSS ultra-modernes ---
-st.markdown("""
+# Une seule feuille, un seul élément : réémise à chaque rerun (Streamlit retire
+# les éléments non réémis, un emit unique mis en cache ferait disparaître le
+# style), mais minifiée une fois par process (cache_resource : le script de
+# page est ré-exécuté à chaque rerun) pour alléger chaque envoi
+@st.cache_resource(show_spinner=False)
+def _minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};])\s*", r"\1", css).strip()
+
+PAGE_CSS = _minify_css("""
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap');
         
@@ -75,6 +89,12 @@ st.markdown("""
             font-weight: 500;
         }
         
+        .stats-grid {
+            display: grid;
+            grid-template-columns: repeat(4, minmax(0, 1fr));
+            gap: 1rem;
+        }
+        
         /* Request card (liste) */
         .request-card {
             background: white;
@@ -319,30 +339,226 @@ st.markdown("""
             animation: fadeIn 0.5s ease-out;
         }
     </style>
-""", unsafe_allow_html=True)
+""")
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
+
+# (libellé, clé de comptage, couleur d'accent ou None pour le style par défaut)
+STATS_CARDS = (
+    ("📋 Total demandes", "total", None),
+    ("⏳ En attente", "pending", "#ff9800"),
+    ("✅ Approuvées", "approved", "#4caf50"),
+    ("❌ Rejetées", "rejected", "#f44336"),
+)
+
+# Fiche de la demande sélectionnée et encadrés de statut : gabarits sans
+# indentation pour que le bloc concaténé ne soit pas lu comme du code Markdown
+DETAIL_CARD_TPL = (
+    '<div class="detail-card">'
+    '<div class="detail-section">'
+    '<div class="detail-label">Nom complet</div>'
+    '<div class="detail-value">👤 {fullname}</div>'
+    '</div>'
+    '<div class="detail-section">'
+    '<div class="detail-label">Email</div>'
+    '<div class="detail-value">📧 {email}</div>'
+    '</div>'
+    '<div class="detail-section">'
+    '<div class="detail-label">Organisation</div>'
+    '<div class="detail-value">🏢 {org}</div>'
+    '</div>'
+    '<div class="detail-section">'
+    '<div class="detail-label">Téléphone</div>'
+    '<div class="detail-value">📱 {phone}</div>'
+    '</div>'
+    '<div class="detail-section">'
+    '<div class="detail-label">Rôle demandé</div>'
+    '<div class="detail-value"><span class="role-badge">{requested_role}</span></div>'
+    '</div>'
+    '<div class="detail-section">'
+    '<div class="detail-label">Date de demande</div>'
+    '<div class="detail-value">📅 {created_at}</div>'
+    '</div>'
+    '</div>'
+)
+
+PROVISIONED_BOX = (
+    '<div class="success-box">'
+    '✅ <strong>Compte utilisateur créé</strong><br>'
+    'Un compte a déjà été provisionné pour cette demande.'
+    '</div>'
+)
+
+EMAIL_SENT_BOX_TPL = (
+    '<div class="info-box">'
+    '📧 <strong>Email envoyé</strong><br>'
+    'Identifiants envoyés le {sent_at}'
+    '</div>'
+)
+
+ERROR_BOX_TPL = (
+    '<div class="error-box">'
+    '⚠️ <strong>Erreur détectée</strong><br>'
+    '{error}'
+    '</div>'
+)
+
+def _stats_card(label: str, n: int, color) -> str:
+    if color is None:
+        return (
+            f'<div class="stats-card"><div class="stats-number">{n}</div>'
+            f'<div class="stats-label">{label}</div></div>'
+        )
+    return (
+        f'<div class="stats-card" style="border-left-color: {color};">'
+        f'<div class="stats-number" style="color: {color};">{n}</div>'
+        f'<div class="stats-label">{label}</div></div>'
+    )
 
 SUPER_ADMINS = set((st.secrets.get("SUPER_ADMIN_EMAILS") or []))
 
 def now_utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
-@st.cache_resource(show_spinner=False)
-def user_client_cached():
-    return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_ANON_KEY"])
+# Les threads de travail appellent des ressources en cache (supa_service) :
+# ils reçoivent le contexte du script courant
+def run_in_script_ctx(ctx, fn, *args, **kwargs):
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+    return fn(*args, **kwargs)
 
-def attach_user_session(c):
+# Le client est mis en cache, pas les requêtes : un client par jeton, session
+# GoTrue attachée une seule fois à sa création (aucun set_session par rerun,
+# et jamais de jeton d'un autre utilisateur sur un client partagé)
+@st.cache_resource(show_spinner=False, max_entries=64, ttl=3600)
+def user_client_cached(access_token: str, refresh_token: str):
+    c = create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_ANON_KEY"])
+    c.auth.set_session(access_token, refresh_token)
+    try:
+        c.postgrest.auth(access_token)
+    except Exception:
+        pass
+    return c
+
+def attach_user_session():
     token = st.session_state.get("access_token")
     refresh = st.session_state.get("refresh_token")
     if not token or not refresh:
-        return False
-    c.auth.set_session(token, refresh)
+        return None
+    return user_client_cached(token, refresh)
+
+# Lectures access_requests : TTL court, purgées après chaque mutation
+# (approbation, renvoi, journalisation d'erreur)
+#
+# Comptage agrégé côté base (une ligne par statut au lieu de toutes les demandes) :
+#   create or replace function access_request_counts()
+#   returns table(status text, n bigint) language sql stable as $$
+#     select status, count(*) from access_requests group by status
+#   $$;
+COUNTED_STATUSES = ("pending", "approved", "rejected")
+
+def _count_requests(svc, status=None) -> int:
+    # head=True : PostgREST ne renvoie que l'en-tête Content-Range, aucune ligne.
+    # Client passé par l'appelant : aucun accès au cache depuis les threads
+    q = svc.table("access_requests").select("id", count="exact", head=True)
+    if status is not None:
+        q = q.eq("status", status)
+    return int(q.execute().count or 0)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_status_counts() -> dict:
+    svc = supa_service()
+    try:
+        by_status = {r["status"]: int(r["n"]) for r in (svc.rpc("access_request_counts", {}).execute().data or [])}
+    except Exception:
+        # Fonction absente : un comptage head=True par statut, en parallèle
+        with ThreadPoolExecutor(max_workers=len(COUNTED_STATUSES) + 1) as ex:
+            f_total = ex.submit(_count_requests, svc)
+            by_status = dict(zip(
+                COUNTED_STATUSES,
+                ex.map(lambda s: _count_requests(svc, s), COUNTED_STATUSES),
+            ))
+            total = f_total.result()
+        return {**by_status, "total": total}
+    return {
+        "pending": by_status.get("pending", 0),
+        "approved": by_status.get("approved", 0),
+        "rejected": by_status.get("rejected", 0),
+        "total": sum(by_status.values()),
+    }
+
+# Liste paginée : seules les colonnes affichées dans la liste, par pages de
+# PENDING_PAGE_SIZE ; la ligne complète n'est lue que pour la demande sélectionnée
+PENDING_PAGE_SIZE = 50
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_pending_summaries(limit: int) -> list:
+    return (
+        supa_service().table("access_requests")
+        .select("id,fullname,email,created_at")
+        .eq("status", "pending")
+        .order("created_at", desc=True)
+        .range(0, limit - 1)
+        .execute()
+        .data
+    ) or []
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_request_detail(request_id: str):
+    rows = (
+        supa_service().table("access_requests")
+        .select(
+            "id,fullname,email,org,phone,requested_role,status,created_at,"
+            "provisioned_user_id,temp_password_sent_at,last_error,provision_error"
+        )
+        .eq("id", request_id)
+        .limit(1)
+        .execute()
+        .data
+    ) or []
+    return rows[0] if rows else None
+
+# Journalisation d'erreur atomique, horodatage côté base :
+#   create or replace function log_req_error(p_id uuid, p_err text)
+#   returns void language sql as $$
+#     update access_requests
+#        set last_error = p_err, provision_error = p_err, last_error_at = now()
+#      where id = p_id
+#   $$;
+def log_request_error(request_id: str, err: str) -> None:
+    svc = supa_service()
+    try:
+        svc.rpc("log_req_error", {"p_id": request_id, "p_err": err}).execute()
+        return
+    except Exception:
+        pass
+    # Fonction absente : mise à jour REST équivalente
     try:
-        c.postgrest.auth(token)
+        svc.table("access_requests").update({
+            "last_error": err,
+            "provision_error": err,
+            "last_error_at": now_utc_iso(),
+        }).eq("id", request_id).execute()
     except Exception:
         pass
-    return True
 
-def current_email(c) -> str:
+def invalidate_requests() -> None:
+    fetch_pending_summaries.clear()
+    fetch_request_detail.clear()
+    fetch_status_counts.clear()
+
+# Message de succès conservé pour le rerun suivant
+def flash(message: str, balloons: bool = False) -> None:
+    st.session_state["_admin_flash"] = (message, balloons)
+
+def show_flash() -> None:
+    pending_flash = st.session_state.pop("_admin_flash", None)
+    if pending_flash:
+        message, balloons = pending_flash
+        st.success(message)
+        if balloons:
+            st.balloons()
+
+def _fetch_email(c) -> str:
     try:
         u = c.auth.get_user()
         if hasattr(u, "user") and getattr(u.user, "email", None):
@@ -353,6 +569,17 @@ def current_email(c) -> str:
         return ""
     return ""
 
+def current_email(c) -> str:
+    # get_user() interroge GoTrue : résultat mémorisé en session pour le jeton courant
+    token = st.session_state.get("access_token")
+    cached = st.session_state.get("_admin_email")
+    if cached and cached[0] == token:
+        return cached[1]
+    email = _fetch_email(c)
+    if email:
+        st.session_state["_admin_email"] = (token, email)
+    return email
+
 # --- Header personnalisé ---
 st.markdown("""
     <div class="admin-header animate-in">
@@ -364,8 +591,8 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- Auth guard ---
-uc = user_client_cached()
-if not attach_user_session(uc):
+uc = attach_user_session()
+if uc is None:
     st.warning("⚠️ Veuillez vous connecter pour accéder à cette page.")
     if st.button("🔐 Se connecter", type="primary"):
         st.switch_page("pages/02_Connexion.py")
@@ -385,64 +612,28 @@ if me not in SUPER_ADMINS:
 
 svc = supa_service()
 
-# --- Statistiques globales ---
-st.markdown("### 📊 Vue d'ensemble des demandes")
-
-all_requests = svc.table("access_requests").select("id,status").execute().data or []
-pending_count = len([r for r in all_requests if r.get("status") == "pending"])
-approved_count = len([r for r in all_requests if r.get("status") == "approved"])
-rejected_count = len([r for r in all_requests if r.get("status") == "rejected"])
-total_count = len(all_requests)
-
-stats_cols = st.columns(4)
+show_flash()
 
-with stats_cols[0]:
-    st.markdown(f"""
-        <div class="stats-card">
-            <div class="stats-number">{total_count}</div>
-            <div class="stats-label">📋 Total demandes</div>
-        </div>
-    """, unsafe_allow_html=True)
+# --- Lectures (en cache) ---
+counts = fetch_status_counts()
+pending_limit = st.session_state.setdefault("pending_limit", PENDING_PAGE_SIZE)
+pending = fetch_pending_summaries(pending_limit)
+pending_count = counts["pending"]
 
-with stats_cols[1]:
-    st.markdown(f"""
-        <div class="stats-card" style="border-left-color: #ff9800;">
-            <div class="stats-number" style="color: #ff9800;">{pending_count}</div>
-            <div class="stats-label">⏳ En attente</div>
-        </div>
-    """, unsafe_allow_html=True)
-
-with stats_cols[2]:
-    st.markdown(f"""
-        <div class="stats-card" style="border-left-color: #4caf50;">
-            <div class="stats-number" style="color: #4caf50;">{approved_count}</div>
-            <div class="stats-label">✅ Approuvées</div>
-        </div>
-    """, unsafe_allow_html=True)
+# --- Statistiques globales ---
+st.markdown("### 📊 Vue d'ensemble des demandes")
 
-with stats_cols[3]:
-    st.markdown(f"""
-        <div class="stats-card" style="border-left-color: #f44336;">
-            <div class="stats-number" style="color: #f44336;">{rejected_count}</div>
-            <div class="stats-label">❌ Rejetées</div>
-        </div>
-    """, unsafe_allow_html=True)
+# Les 4 cartes en un seul élément (grille CSS) au lieu de 4 colonnes × 1 markdown
+st.markdown(
+    '<div class="stats-grid">'
+    + "".join(_stats_card(label, counts[key], color) for label, key, color in STATS_CARDS)
+    + "</div>",
+    unsafe_allow_html=True,
+)
 
 st.markdown('<hr class="custom-divider">', unsafe_allow_html=True)
 
 # --- Pending list ---
-pending = (
-    svc.table("access_requests")
-    .select(
-        "id,fullname,email,org,phone,requested_role,status,created_at,"
-        "provisioned_user_id,temp_password_sent_at,last_error,provision_error"
-    )
-    .eq("status", "pending")
-    .order("created_at", desc=True)
-    .execute()
-    .data
-) or []
-
 if not pending:
     st.markdown("""
         <div class="empty-state">
@@ -454,104 +645,65 @@ if not pending:
     st.stop()
 
 # --- Liste et détails ---
-st.markdown(f"### 📋 Demandes en attente ({len(pending)})")
+st.markdown(f"### 📋 Demandes en attente ({max(pending_count, len(pending))})")
 
 col_list, col_detail = st.columns([1, 2])
 
 with col_list:
     st.markdown("#### 📌 Liste des demandes")
     
-    # Utiliser un selectbox plus visuel
-    if "selected_request_idx" not in st.session_state:
+    # Un seul widget pour toute la liste : la sélection met à jour la session
+    # sans bouton par ligne ni st.rerun() explicite
+    if st.session_state.get("selected_request_idx", 0) >= len(pending):
         st.session_state.selected_request_idx = 0
     
-    for idx, req in enumerate(pending):
-        created_date = req.get("created_at", "")[:10] if req.get("created_at") else "N/A"
-        
-        card_class = "request-card"
-        if idx == st.session_state.selected_request_idx:
-            card_class += " request-card-selected"
-        
-        if st.button(
-            f"{req.get('fullname', 'N/A')}",
-            key=f"select_req_{idx}",
-            use_container_width=True,
-            type="secondary" if idx != st.session_state.selected_request_idx else "primary"
-        ):
-            st.session_state.selected_request_idx = idx
+    def _request_label(i: int) -> str:
+        r = pending[i]
+        created_date = r.get("created_at", "")[:10] if r.get("created_at") else "N/A"
+        return f"{r.get('fullname', 'N/A')}  —  📧 {r.get('email', 'N/A')} • 📅 {created_date}"
+    
+    st.radio(
+        "Demandes",
+        options=range(len(pending)),
+        format_func=_request_label,
+        key="selected_request_idx",
+        label_visibility="collapsed",
+    )
+    
+    if len(pending) >= pending_limit and pending_count > len(pending):
+        if st.button(f"⬇️ Afficher plus ({pending_count - len(pending)} restantes)", use_container_width=True):
+            st.session_state.pending_limit = pending_limit + PENDING_PAGE_SIZE
             st.rerun()
-        
-        st.caption(f"📧 {req.get('email', 'N/A')} • 📅 {created_date}")
-        if idx < len(pending) - 1:
-            st.markdown("<hr style='margin: 0.5rem 0; opacity: 0.2;'>", unsafe_allow_html=True)
 
 with col_detail:
-    req = pending[st.session_state.selected_request_idx]
+    summary = pending[st.session_state.selected_request_idx]
+    req = fetch_request_detail(summary["id"]) or summary
     
     st.markdown("#### 👤 Détails de la demande")
     
-    # Card principal avec infos
-    st.markdown(f"""
-        <div class="detail-card">
-            <div class="detail-section">
-                <div class="detail-label">Nom complet</div>
-                <div class="detail-value">👤 {req.get('fullname', 'N/A')}</div>
-            </div>
-            
-            <div class="detail-section">
-                <div class="detail-label">Email</div>
-                <div class="detail-value">📧 {req.get('email', 'N/A')}</div>
-            </div>
-            
-            <div class="detail-section">
-                <div class="detail-label">Organisation</div>
-                <div class="detail-value">🏢 {req.get('org', 'N/A')}</div>
-            </div>
-            
-            <div class="detail-section">
-                <div class="detail-label">Téléphone</div>
-                <div class="detail-value">📱 {req.get('phone', 'Non renseigné')}</div>
-            </div>
-            
-            <div class="detail-section">
-                <div class="detail-label">Rôle demandé</div>
-                <div class="detail-value">
-                    <span class="role-badge">{req.get('requested_role', 'N/A')}</span>
-                </div>
-            </div>
-            
-            <div class="detail-section">
-                <div class="detail-label">Date de demande</div>
-                <div class="detail-value">📅 {req.get('created_at', 'N/A')[:19] if req.get('created_at') else 'N/A'}</div>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
+    # Card principal avec infos + encadrés de statut, en un seul élément
+    created_at = req.get("created_at")
+    parts = [DETAIL_CARD_TPL.format(
+        fullname=req.get("fullname", "N/A"),
+        email=req.get("email", "N/A"),
+        org=req.get("org", "N/A"),
+        phone=req.get("phone", "Non renseigné"),
+        requested_role=req.get("requested_role", "N/A"),
+        created_at=created_at[:19] if created_at else "N/A",
+    )]
     
     # Statut provisioning
     if req.get("provisioned_user_id"):
-        st.markdown("""
-            <div class="success-box">
-                ✅ <strong>Compte utilisateur créé</strong><br>
-                Un compte a déjà été provisionné pour cette demande.
-            </div>
-        """, unsafe_allow_html=True)
+        parts.append(PROVISIONED_BOX)
     
     if req.get("temp_password_sent_at"):
-        st.markdown(f"""
-            <div class="info-box">
-                📧 <strong>Email envoyé</strong><br>
-                Identifiants envoyés le {req.get('temp_password_sent_at', 'N/A')[:19]}
-            </div>
-        """, unsafe_allow_html=True)
+        parts.append(EMAIL_SENT_BOX_TPL.format(sent_at=req["temp_password_sent_at"][:19]))
     
-    if req.get("provision_error") or req.get("last_error"):
-        error_msg = req.get("provision_error") or req.get("last_error")
-        st.markdown(f"""
-            <div class="error-box">
-                ⚠️ <strong>Erreur détectée</strong><br>
-                {error_msg}
-            </div>
-        """, unsafe_allow_html=True)
+    error_msg = req.get("provision_error") or req.get("last_error")
+    if error_msg:
+        parts.append(ERROR_BOX_TPL.format(error=error_msg))
+    
+    st.markdown("".join(parts), unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -569,38 +721,47 @@ with col_detail:
         ):
             with st.spinner("🔄 Traitement en cours..."):
                 try:
-                    # 1) Update status
-                    svc.table("access_requests").update({
-                        "status": "approved",
-                        "reviewed_by": me,
-                        "reviewed_at": now_utc_iso(),
-                        "approved_role": req.get("requested_role"),
-                        "last_error": None,
-                        "provision_error": None,
-                    }).eq("id", req["id"]).execute()
-                    
-                    # 2) Provision user
-                    provision_user_for_access_request(
-                        request_id=req["id"],
-                        email=req["email"],
-                        fullname=req.get("fullname"),
-                        org=req.get("org"),
-                        phone=req.get("phone"),
-                    )
+                    # Statut et provisioning en parallèle (indépendants). Le statut
+                    # ne touche pas aux colonnes d'erreur : le provisioning les
+                    # remet à zéro lui-même en cas de succès, et une erreur qu'il
+                    # journalise ne peut pas être écrasée par cette mise à jour.
+                    ctx = get_script_run_ctx()
+                    with ThreadPoolExecutor(max_workers=2) as ex:
+                        # 1) Update status (client résolu sur le thread principal)
+                        f_status = ex.submit(
+                            lambda: svc.table("access_requests").update({
+                                "status": "approved",
+                                "reviewed_by": me,
+                                "reviewed_at": now_utc_iso(),
+                                "approved_role": req.get("requested_role"),
+                            }).eq("id", req["id"]).execute()
+                        )
+                        # 2) Provision user
+                        f_provision = ex.submit(
+                            run_in_script_ctx, ctx,
+                            provision_user_for_access_request,
+                            request_id=req["id"],
+                            email=req["email"],
+                            fullname=req.get("fullname"),
+                            org=req.get("org"),
+                            phone=req.get("phone"),
+                        )
+                        status_error = f_status.exception()
+                        f_provision.result()
+                    # Compte créé mais demande restée "pending" : état partiel
+                    # explicite dans l'erreur journalisée
+                    if status_error is not None:
+                        raise RuntimeError(
+                            f"compte provisionné mais statut non mis à jour : {status_error}"
+                        )
                     
-                    st.success("✅ Demande approuvée avec succès !")
-                    st.balloons()
+                    invalidate_requests()
+                    flash("✅ Demande approuvée avec succès !", balloons=True)
                     st.rerun()
                     
                 except Exception as e:
-                    try:
-                        svc.table("access_requests").update({
-                            "last_error": str(e),
-                            "provision_error": str(e),
-                            "last_error_at": now_utc_iso()
-                        }).eq("id", req["id"]).execute()
-                    except Exception:
-                        pass
+                    log_request_error(req["id"], str(e))
+                    invalidate_requests()
                     st.error(f"❌ Échec de l'approbation : {e}")
     
     with action_col2:
@@ -624,18 +785,13 @@ with col_detail:
                             request_id=req["id"],
                         )
                         
-                        st.success("✅ Identifiants renvoyés avec succès !")
+                        invalidate_requests()
+                        flash("✅ Identifiants renvoyés avec succès !")
                         st.rerun()
                         
                     except Exception as e:
-                        try:
-                            svc.table("access_requests").update({
-                                "last_error": f"resend failed: {e}",
-                                "provision_error": f"resend failed: {e}",
-                                "last_error_at": now_utc_iso()
-                            }).eq("id", req["id"]).execute()
-                        except Exception:
-                            pass
+                        log_request_error(req["id"], f"resend failed: {e}")
+                        invalidate_requests()
                         st.error(f"❌ Échec de l'envoi : {e}")
     
     # Timeline
@@ -669,8 +825,9 @@ with col_detail:
                 </div>
             """, unsafe_allow_html=True)
     
-    # Données brutes
-    with st.expander("🔍 Données techniques (JSON)", expanded=False):
+    # Données brutes : sérialisées seulement à la demande (le corps d'un
+    # expander est exécuté à chaque rerun, même replié)
+    if st.checkbox("🔍 Afficher les données techniques (JSON)", key="show_json"):
         st.json(req)
 
 # Footer
@@ -0,0 +1,22 @@
+# scripts/convert_to_parquet.py
+"""
+Conversion unique des données historiques CSV -> Parquet (snappy)
+Les entraînements suivants (train_ml_models.py) lisent le Parquet :
+lecture colonnaire, types conservés, sans re-parsing du texte
+"""
+from pathlib import Path
+
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+SRC = Path('data/historical_weather_discharge.csv')
+DST = SRC.with_suffix('.parquet')
+
+print(f"📊 Lecture {SRC}...")
+table = pacsv.read_csv(
+    SRC,
+    read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 20)
+)
+
+pq.write_table(table, DST, compression='snappy')
+print(f"💾 {table.num_rows} lignes écrites dans {DST}")
@@ -3,20 +3,50 @@
 Script d'entraînement des modèles ML
 Utiliser pour entraînement batch avec données complètes
 """
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 from core.module1 import DischargePredictor, create_features_from_weather
 
+# Lecteur CSV multi-thread (optionnel)
+try:
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DATA_CSV = Path('data/historical_weather_discharge.csv')
+DATA_PARQUET = DATA_CSV.with_suffix('.parquet')  # voir scripts/convert_to_parquet.py
+
+
+def load_historical_data() -> pd.DataFrame:
+    """Parquet si disponible, sinon CSV (parseur pyarrow multi-thread si installé)"""
+    if DATA_PARQUET.exists():
+        return pd.read_parquet(DATA_PARQUET)
+    if PYARROW_AVAILABLE:
+        table = pacsv.read_csv(
+            DATA_CSV,
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 20)
+        )
+        return table.to_pandas()
+    return pd.read_csv(DATA_CSV)
+
+
 # 1. Charger données historiques
 print("📊 Chargement données...")
 # TODO: Charger vos vraies données
-data = pd.read_csv('data/historical_weather_discharge.csv')
+data = load_historical_data()
 
 # 2. Feature engineering
 print("🔧 Feature engineering...")
 features = create_features_from_weather(data)
 print(f"✅ {len(features.columns)} features créées")
 
+# Matrice normalisée float32 calculée une fois, partagée par RF et LSTM
+X, y, scaler, feature_names = DischargePredictor.prepare(features, target_col='discharge')
+prepared = (X, y, scaler, feature_names)
+
 # 3. Entraîner Random Forest
 print("\n🌲 Entraînement Random Forest...")
 rf_predictor = DischargePredictor(
@@ -26,8 +56,7 @@ rf_predictor = DischargePredictor(
 )
 
 metrics_rf = rf_predictor.train_random_forest(
-    features,
-    target_col='discharge',
+    prepared=prepared,
     n_estimators=200,
     max_depth=20
 )
@@ -49,8 +78,7 @@ try:
     )
     
     metrics_lstm = lstm_predictor.train_lstm(
-        features,
-        target_col='discharge',
+        prepared=prepared,
         epochs=100,
         batch_size=32,
         validation_split=0.2